@@ -8,6 +8,8 @@ from typing import TYPE_CHECKING
 from astrbot.api import logger
 from astrbot.api.event import AstrMessageEvent
 
+from ..utils import SIDECAR_DTYPES, attach_embeddings, read_ndjson, sidecar_path
+
 if TYPE_CHECKING:
     from ..manager import GraphMemoryManager
 
@@ -69,6 +71,11 @@ class CommandHandler:
             if not entities:
                 return f"未找到包含 '{query}' 的实体"
 
+            # 一次查询取出全部实体的前 3 条关系
+            relations = await self.manager.get_relations_for_entities(
+                [entity.name for entity in entities], per_entity_limit=3
+            )
+
             # 格式化输出
             lines = [f"找到 {len(entities)} 个实体:\n"]
             for i, entity in enumerate(entities, 1):
@@ -76,16 +83,16 @@ class CommandHandler:
                 lines.append(f"   描述: {entity.description}")
                 lines.append(f"   重要性: {entity.importance:.2f}, 访问次数: {entity.access_count}")
 
-                # 获取关系
-                relations = await self.manager.get_entity_relations(entity.name)
-                if relations:
-                    lines.append(f"   关系: {len(relations)} 条")
-                    for rel in relations[:3]:  # 只显示前3条
+                # 显示关系
+                top_relations, total = relations.get(entity.name, ([], 0))
+                if total:
+                    lines.append(f"   关系: {total} 条")
+                    for rel in top_relations:
                         direction = "→" if rel["direction"] == "outgoing" else "←"
                         target = rel["to"] if rel["direction"] == "outgoing" else rel["from"]
                         lines.append(f"     {direction} {target}: {rel['relation']}")
-                    if len(relations) > 3:
-                        lines.append(f"     ... 还有 {len(relations) - 3} 条关系")
+                    if total > len(top_relations):
+                        lines.append(f"     ... 还有 {total - len(top_relations)} 条关系")
                 lines.append("")
 
             return "\n".join(lines)
@@ -134,40 +141,71 @@ class CommandHandler:
         """处理 /memory_export 指令
 
         用法:
-        /memory_export [persona:<人格ID>]
+        /memory_export [persona:<人格ID>] [format:json|ndjson] [gzip:true|false]
+                       [embeddings:float16|float32]
         """
         try:
             # 解析参数
             args = event.message_str.strip().split()
             persona_id = None
+            export_format = "json"
+            compress = False
+            embedding_dtype = None
+            sidecar_line = ""
 
             for arg in args:
                 if arg.startswith("persona:"):
                     persona_id = arg.split(":", 1)[1]
+                elif arg.startswith("format:"):
+                    export_format = arg.split(":", 1)[1].lower()
+                elif arg.startswith("gzip:"):
+                    compress = arg.split(":", 1)[1].lower() == "true"
+                elif arg.startswith("embeddings:"):
+                    embedding_dtype = arg.split(":", 1)[1].lower()
+
+            if export_format not in ("json", "ndjson"):
+                return f"不支持的导出格式: {export_format}"
+            if embedding_dtype and embedding_dtype not in SIDECAR_DTYPES:
+                return f"不支持的向量精度: {embedding_dtype}"
+            if embedding_dtype and export_format != "ndjson":
+                return "导出向量需要使用 format:ndjson"
+
+            if export_format == "ndjson":
+                # 逐块写入文件，内存占用与图谱大小无关
+                filename = f"memory_export_{int(time.time())}.ndjson" + (".gz" if compress else "")
+                filepath = self.data_dir / filename
+                counts = await self.manager.export_graph_ndjson(
+                    filepath, persona_id, compress, embedding_dtype
+                )
+                if embedding_dtype:
+                    sidecar_line = f"\n- 向量文件: {sidecar_path(filepath)}"
+                entity_count = counts.get("entity", 0)
+                relation_count = counts.get("relation", 0)
+                session_count = counts.get("session", 0)
+            else:
+                # 导出图谱
+                data = await self.manager.export_graph(persona_id)
 
-            # 导出图谱
-            data = await self.manager.export_graph(persona_id)
+                if not data:
+                    return "导出失败或图谱为空"
 
-            if not data:
-                return "导出失败或图谱为空"
+                # 格式化输出
+                entity_count = len(data.get("entities", []))
+                relation_count = len(data.get("relations", []))
+                session_count = len(data.get("sessions", []))
 
-            # 格式化输出
-            entity_count = len(data.get("entities", []))
-            relation_count = len(data.get("relations", []))
-            session_count = len(data.get("sessions", []))
+                # 保存到文件
+                filename = f"memory_export_{int(time.time())}.json"
+                filepath = self.data_dir / filename
 
-            # 保存到文件
-            filename = f"memory_export_{int(time.time())}.json"
-            filepath = self.data_dir / filename
-
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                with open(filepath, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
 
             return f"""导出完成:
 - 实体数: {entity_count}
 - 关系数: {relation_count}
 - 会话数: {session_count}
-- 文件: {filepath}
+- 文件: {filepath}{sidecar_line}
 """
 
         except Exception as e:
@@ -198,11 +236,18 @@ class CommandHandler:
             if not filepath.exists():
                 return f"文件不存在: {filepath}"
 
-            with open(filepath, encoding="utf-8") as f:
-                data = json.load(f)
+            if filepath.name.endswith((".ndjson", ".ndjson.gz")):
+                # 逐条读取记录并分批载入，不在内存中构建完整图谱；
+                # 同目录下有导出的向量文件时直接使用，不重新生成
+                records = attach_embeddings(read_ndjson(filepath), filepath.parent)
+                stats = await self.manager.bulk_import(records, merge)
+                entity_count, relation_count = stats["entities"], stats["relations"]
+            else:
+                with open(filepath, encoding="utf-8") as f:
+                    data = json.load(f)
 
-            # 导入图谱
-            entity_count, relation_count = await self.manager.import_graph(data, merge)
+                # 导入图谱
+                entity_count, relation_count = await self.manager.import_graph(data, merge)
 
             return f"""导入完成:
 - 导入实体数: {entity_count}
@@ -218,13 +263,14 @@ class CommandHandler:
         """处理 /memory_disambiguate 指令
 
         用法:
-        /memory_disambiguate [threshold:<相似度>] [auto_merge:true|false]
+        /memory_disambiguate [threshold:<相似度>] [auto_merge:true|false] [full:true|false]
         """
         try:
             # 解析参数
             args = event.message_str.strip().split()
             threshold = 0.85
             auto_merge = False
+            full_scan = False
 
             for arg in args:
                 if arg.startswith("threshold:"):
@@ -236,16 +282,19 @@ class CommandHandler:
                         return f"无效的 threshold 参数: {arg}"
                 elif arg.startswith("auto_merge:"):
                     auto_merge = arg.split(":", 1)[1].lower() == "true"
+                elif arg.startswith("full:"):
+                    full_scan = arg.split(":", 1)[1].lower() == "true"
 
             # 执行消歧
-            result = await self.manager.run_disambiguation(threshold, auto_merge)
+            result = await self.manager.run_disambiguation(threshold, auto_merge, full_scan)
 
             if result["found"] == 0:
                 return "未找到相似实体"
 
             return f"""实体消歧完成:
+- 检查实体数: {result['checked']}
 - 找到相似实体对: {result['found']}
-- 合并实体对: {result['merged']}
+- 合并实体数: {result['merged']}
 - 相似度阈值: {threshold:.2f}
 - 自动合并: {'是' if auto_merge else '否'}
 """
@@ -1,6 +1,7 @@
 """GraphMemory 核心管理器"""
 
 import asyncio
+from collections.abc import Iterable
 from pathlib import Path
 
 from astrbot.api import logger
@@ -10,8 +11,9 @@ from astrbot.api.star import Context
 
 from .models import SessionNode
 from .retrieval import KnowledgeExtractor, MemoryRetriever
-from .services import EntityDisambiguation, FunctionCallingHandler
-from .storage import GraphStore, MemoryBuffer
+from .services import EntityDisambiguation, FunctionCallingHandler, ImportJobManager
+from .storage import ColdStore, GraphStore, MemoryBuffer, MergeVerdictCache
+from .utils import write_ndjson, write_ndjson_with_embeddings
 
 
 class GraphMemoryManager:
@@ -52,6 +54,7 @@ class GraphMemoryManager:
         self.function_calling = None
         self.disambiguation = None
         self._disambiguation_task = None
+        self.import_jobs = None
 
     async def ensure_initialized(self):
         """确保核心模块已初始化（延迟初始化）"""
@@ -77,7 +80,20 @@ class GraphMemoryManager:
                 logger.warning("[GraphMemory] 未配置 Embedding Provider，向量检索功能将不可用")
 
             # 初始化核心模块
-            self.graph_store = GraphStore(self.data_path, self.embedding_provider)
+            self.graph_store = GraphStore(
+                self.data_path,
+                self.embedding_provider,
+                decay_rate=self.config.get("time_decay_rate", 0.95),
+                decay_interval=self.config.get("prune_interval", 3600),
+                chunk_size=self.config.get("maintenance_chunk_size", 1000),
+                chunk_pause=self.config.get("maintenance_chunk_pause", 0.05),
+                cold_store=(
+                    ColdStore(self.data_path)
+                    if self.config.get("enable_cold_storage", True)
+                    else None
+                ),
+                layout_max_nodes=self.config.get("layout_max_nodes", 1000),
+            )
             self.extractor = KnowledgeExtractor(
                 self.context,
                 self.config.get("llm_provider_id", ""),
@@ -93,6 +109,8 @@ class GraphMemoryManager:
                 str(stopwords_path) if stopwords_path.exists() else None,
                 vector_weight=self.config.get("vector_search_weight", 0.7),
                 keyword_weight=self.config.get("keyword_search_weight", 0.3),
+                expansion_hops=self.config.get("graph_expansion_hops", 0),
+                expansion_budget=self.config.get("graph_expansion_budget", 10),
             )
             self.buffer = MemoryBuffer(
                 self.data_path,
@@ -111,8 +129,13 @@ class GraphMemoryManager:
                 self.graph_store,
                 self.embedding_provider,
                 self.config.get("llm_provider_id", ""),
+                verdict_cache=MergeVerdictCache(self.data_path),
+                quantization=self.config.get("embedding_quantization", "none"),
             )
 
+            # WebUI 分块上传导入任务
+            self.import_jobs = ImportJobManager(self.graph_store, self.data_path / "import_jobs")
+
             # 启动后台任务
             await self._startup()
 
@@ -142,6 +165,10 @@ class GraphMemoryManager:
             except asyncio.CancelledError:
                 logger.debug("[GraphMemory] 维护任务已取消")
 
+        # 中断正在进行的导入（下次启动后可续跑）
+        if self.import_jobs:
+            await self.import_jobs.shutdown()
+
         # 关闭缓冲区和数据库
         if self.buffer:
             await self.buffer.shutdown()
@@ -229,11 +256,25 @@ class GraphMemoryManager:
         await self.ensure_initialized()
         return await self.graph_store.search_entities(query, entity_type, limit)
 
+    async def search_archived(self, query: str, limit: int = 5) -> list[dict]:
+        """检索冷存储中的归档实体"""
+        await self.ensure_initialized()
+        return await self.graph_store.search_archived(query, limit)
+
     async def get_entity_relations(self, entity_name: str) -> list[dict]:
         """获取实体关系"""
         await self.ensure_initialized()
         return await self.graph_store.get_entity_relations(entity_name)
 
+    async def get_relations_for_entities(
+        self,
+        names: list[str],
+        per_entity_limit: int = 3,
+    ) -> dict[str, tuple[list[dict], int]]:
+        """批量获取实体的主要关系"""
+        await self.ensure_initialized()
+        return await self.graph_store.get_relations_for_entities(names, per_entity_limit)
+
     async def delete_entity(self, entity_name: str) -> tuple[bool, int]:
         """删除实体"""
         await self.ensure_initialized()
@@ -244,29 +285,76 @@ class GraphMemoryManager:
         await self.ensure_initialized()
         return await self.graph_store.export_graph(persona_id)
 
+    async def export_graph_ndjson(
+        self,
+        path: Path,
+        persona_id: str | None = None,
+        compress: bool = False,
+        embedding_dtype: str | None = None,
+    ) -> dict[str, int]:
+        """流式导出图谱到 NDJSON 文件
+
+        Args:
+            path: 输出文件路径
+            persona_id: 人格ID过滤（可选）
+            compress: 是否 gzip 压缩
+            embedding_dtype: 向量精度（float16 / float32），提供时向量写入旁路 .npy 文件
+
+        Returns:
+            各类记录的数量
+        """
+        await self.ensure_initialized()
+        if embedding_dtype:
+            records = self.graph_store.iter_export(persona_id, include_embeddings=True)
+            return await write_ndjson_with_embeddings(records, path, compress, embedding_dtype)
+        return await write_ndjson(self.graph_store.iter_export(persona_id), path, compress)
+
     async def import_graph(self, data: dict, merge: bool = True) -> tuple[int, int]:
         """导入图谱"""
         await self.ensure_initialized()
         return await self.graph_store.import_graph(data, merge)
 
+    async def bulk_import(self, records: Iterable[dict], merge: bool = True) -> dict[str, int]:
+        """批量导入图谱记录（NDJSON 导出格式），进度见 get_maintenance_progress
+
+        Returns:
+            导入统计信息
+        """
+        await self.ensure_initialized()
+        return await self.graph_store.bulk_import(records, merge)
+
     async def run_disambiguation(
         self,
         similarity_threshold: float = 0.85,
         auto_merge: bool = False,
+        full_scan: bool = False,
     ) -> dict:
         """运行实体消歧
 
         Args:
             similarity_threshold: 相似度阈值
             auto_merge: 是否自动合并（不使用 LLM 判断）
+            full_scan: 是否忽略水位线进行全量比较
 
         Returns:
-            消歧结果统计 {"found": int, "merged": int}
+            消歧结果统计 {"found": int, "merged": int, "checked": int}
         """
         await self.ensure_initialized()
         if not self.disambiguation:
-            return {"found": 0, "merged": 0}
-        return await self.disambiguation.run_disambiguation(similarity_threshold, auto_merge)
+            return {"found": 0, "merged": 0, "checked": 0}
+        return await self.disambiguation.run_disambiguation(
+            similarity_threshold, auto_merge, full_scan
+        )
+
+    def get_maintenance_progress(self) -> dict[str, dict]:
+        """获取维护任务进度
+
+        Returns:
+            {任务名: 进度信息}，未初始化时为空
+        """
+        if not self.graph_store:
+            return {}
+        return self.graph_store.get_maintenance_progress()
 
     # ==================== 内部方法 ====================
 
@@ -372,7 +460,6 @@ class GraphMemoryManager:
     async def _maintenance_loop(self):
         """维护循环"""
         prune_interval = self.config.get("prune_interval", 3600)
-        time_decay_rate = self.config.get("time_decay_rate", 0.95)
         min_importance_threshold = self.config.get("min_importance_threshold", 0.1)
         disambiguation_interval = self.config.get("disambiguation_interval", 7200)
         enable_disambiguation = self.config.get("enable_entity_disambiguation", False)
@@ -385,14 +472,23 @@ class GraphMemoryManager:
 
                 logger.info("[GraphMemory] 开始图谱维护...")
 
-                # 应用时间衰减
-                await self.graph_store.apply_time_decay(time_decay_rate)
+                # 时间衰减在读取时计算，这里只把偏离较大的存储值写回
+                await self.graph_store.compact_time_decay()
 
                 # 清理低重要性实体
                 count = await self.graph_store.prune_low_importance_entities(
                     min_importance_threshold
                 )
 
+                # 删除和更新留下的墓碑行过多时重写向量文件
+                await self.graph_store.compact_embedding_store()
+
+                # 社区划分在维护周期之间复用，维护后重新计算
+                self.graph_store.invalidate_communities()
+
+                # 以现有坐标为起点重新调整全局图谱布局
+                await self.graph_store.update_layout(full=True)
+
                 logger.info(f"[GraphMemory] 图谱维护完成，清理了 {count} 个实体")
 
                 # 实体消歧（如果启用且到达间隔时间）
@@ -407,7 +503,7 @@ class GraphMemoryManager:
                         )
                         logger.info(
                             f"[GraphMemory] 实体消歧完成: 找到 {result['found']} 对相似实体，"
-                            f"合并了 {result['merged']} 对"
+                            f"合并了 {result['merged']} 个实体"
                         )
                         last_disambiguation_time = current_time
 
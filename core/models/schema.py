@@ -1,5 +1,6 @@
 """KuzuDB Schema 定义和初始化"""
 
+from datetime import datetime, timezone
 
 import kuzu
 
@@ -42,6 +43,9 @@ def initialize_schema(db: kuzu.Database, conn: kuzu.Connection, embedding_dim: i
     # 创建关系表
     _create_rel_tables(conn)
 
+    # 为旧版本数据库补充新增列
+    _migrate_tables(conn)
+
     logger.info("[GraphMemory] Schema 初始化完成")
 
 
@@ -90,13 +94,28 @@ def _create_node_tables(conn: kuzu.Connection, embedding_dim: int):
                 importance FLOAT,
                 created_at TIMESTAMP,
                 last_accessed TIMESTAMP,
-                access_count INT64
+                access_count INT64,
+                updated_at TIMESTAMP,
+                last_decay_reference TIMESTAMP
             )
         """)
         logger.debug("[GraphMemory] Entity 节点表已创建")
     except Exception as e:
         logger.debug(f"[GraphMemory] Entity 节点表已存在或创建失败: {e}")
 
+    # EntityAlias 节点（实体合并后保留的旧名称）
+    try:
+        conn.execute("""
+            CREATE NODE TABLE IF NOT EXISTS EntityAlias (
+                alias STRING PRIMARY KEY,
+                canonical STRING,
+                merged_at TIMESTAMP
+            )
+        """)
+        logger.debug("[GraphMemory] EntityAlias 节点表已创建")
+    except Exception as e:
+        logger.debug(f"[GraphMemory] EntityAlias 节点表已存在或创建失败: {e}")
+
 
 def _create_rel_tables(conn: kuzu.Connection):
     """创建关系表"""
@@ -123,7 +142,8 @@ def _create_rel_tables(conn: kuzu.Connection):
                 strength FLOAT,
                 evidence STRING,
                 created_at TIMESTAMP,
-                last_updated TIMESTAMP
+                last_updated TIMESTAMP,
+                last_decay_reference TIMESTAMP
             )
         """)
         logger.debug("[GraphMemory] RELATED_TO 关系表已创建")
@@ -158,3 +178,38 @@ def _create_rel_tables(conn: kuzu.Connection):
         logger.debug("[GraphMemory] KNOWS 关系表已创建")
     except Exception as e:
         logger.debug(f"[GraphMemory] KNOWS 关系表已存在或创建失败: {e}")
+
+
+def _migrate_tables(conn: kuzu.Connection):
+    """为已存在的表补充新增列"""
+
+    now = datetime.now(timezone.utc)
+
+    # Entity.updated_at: 实体创建或描述变化的时间，用于增量消歧。
+    # 旧数据以创建时间回填（没有创建时间的以迁移时刻回填），
+    # 否则这些实体会在之后的每一轮增量消歧中都被当作变化实体
+    try:
+        conn.execute("ALTER TABLE Entity ADD IF NOT EXISTS updated_at TIMESTAMP")
+        conn.execute(
+            "MATCH (e:Entity) WHERE e.updated_at IS NULL "
+            "SET e.updated_at = coalesce(e.created_at, $now)",
+            {"now": now},
+        )
+    except Exception as e:
+        logger.debug(f"[GraphMemory] Entity.updated_at 列补充失败: {e}")
+
+    # last_decay_reference: 重要性/关系强度存储值对应的时间，读取时据此计算衰减。
+    # 旧数据以迁移时刻作为基准
+    for table, pattern in [
+        ("Entity", "(x:Entity)"),
+        ("RELATED_TO", "()-[x:RELATED_TO]->()"),
+    ]:
+        try:
+            conn.execute(f"ALTER TABLE {table} ADD IF NOT EXISTS last_decay_reference TIMESTAMP")
+            conn.execute(
+                f"MATCH {pattern} WHERE x.last_decay_reference IS NULL "
+                "SET x.last_decay_reference = $now",
+                {"now": now},
+            )
+        except Exception as e:
+            logger.debug(f"[GraphMemory] {table}.last_decay_reference 列补充失败: {e}")
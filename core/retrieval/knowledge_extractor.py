@@ -1,14 +1,13 @@
 """知识提取模块"""
 
 import json
-import re
 from typing import Any
 
 from astrbot.api import logger
 from astrbot.api.star import Context
 
 from ..models import EntityNode, ExtractedKnowledge, RelatedToRel
-from ..utils import EXTRACTION_PROMPT, QUERY_REWRITING_PROMPT
+from ..utils import EXTRACTION_PROMPT, QUERY_REWRITING_PROMPT, find_json_blob
 
 
 class KnowledgeExtractor:
@@ -178,28 +177,4 @@ class KnowledgeExtractor:
         Returns:
             JSON 字符串，如果未找到返回 None
         """
-        # 尝试直接解析
-        text = text.strip()
-        if text.startswith("{") and text.endswith("}"):
-            return text
-
-        # 尝试查找 JSON 代码块
-        json_block_pattern = r"```(?:json)?\s*(\{.*?\})\s*```"
-        match = re.search(json_block_pattern, text, re.DOTALL)
-        if match:
-            return match.group(1)
-
-        # 尝试查找第一个完整的 JSON 对象
-        brace_count = 0
-        start_idx = -1
-        for i, char in enumerate(text):
-            if char == "{":
-                if brace_count == 0:
-                    start_idx = i
-                brace_count += 1
-            elif char == "}":
-                brace_count -= 1
-                if brace_count == 0 and start_idx != -1:
-                    return text[start_idx : i + 1]
-
-        return None
+        return find_json_blob(text)
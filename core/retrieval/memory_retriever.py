@@ -3,10 +3,13 @@
 import math
 from typing import Any
 
+import numpy as np
+
 from astrbot.api import logger
 
 from ..models import EntityNode
 from ..storage import GraphStore
+from ..utils import personalized_pagerank
 
 # 检查 jieba 是否可用
 try:
@@ -38,9 +41,15 @@ class MemoryRetriever:
     - 向量检索
     - 关键词检索
     - 混合检索
+    - 图扩展（沿关系扩展种子实体的邻域）
     - 结果格式化
     """
 
+    # 个性化 PageRank 的重启概率
+    EXPANSION_ALPHA = 0.15
+    # 每跳从每个前沿实体最多读取的边数（按有效强度），避免高度数实体占满扩展范围
+    EXPANSION_EDGES_PER_NODE = 20
+
     def __init__(
         self,
         graph_store: GraphStore,
@@ -48,11 +57,16 @@ class MemoryRetriever:
         stopwords_path: str | None = None,
         vector_weight: float = 0.7,
         keyword_weight: float = 0.3,
+        expansion_hops: int = 0,
+        expansion_budget: int = 10,
     ):
         self.graph_store = graph_store
         self.embedding_provider = embedding_provider
         self.vector_weight = vector_weight
         self.keyword_weight = keyword_weight
+        # 图扩展的跳数（0 表示不扩展，最多 2 跳）和扩展实体数量上限
+        self.expansion_hops = max(0, min(expansion_hops, 2))
+        self.expansion_budget = expansion_budget
 
         # 加载停用词
         self.stopwords = set()
@@ -102,7 +116,12 @@ class MemoryRetriever:
         # 6. 取 top_k
         top_entities = reranked_entities[:top_k]
 
-        # 7. 格式化输出
+        # 7. 图扩展: 从种子实体沿关系扩展邻域
+        if self.expansion_hops and top_entities:
+            expanded, relations = await self.expand_graph(top_entities)
+            return self._format_memory_context(top_entities, expanded, relations)
+
+        # 8. 格式化输出
         return self._format_memory_context(top_entities)
 
     async def _vector_search(
@@ -119,41 +138,32 @@ class MemoryRetriever:
         Returns:
             (实体, 相似度分数) 列表
         """
+        # 在向量存储上计算相似度，只为命中的实体查询数据库
+        hits = await self.graph_store.vector_search(query_embedding, top_k, min_similarity=0.5)
+        if not hits:
+            return []
+
         def _search():
             try:
-                # 使用余弦相似度搜索
                 result = self.graph_store.conn.execute(
-                    """
+                    f"""
                     MATCH (e:Entity)
-                    WHERE e.embedding IS NOT NULL
-                    WITH e,
-                        array_cosine_similarity(e.embedding, $query_embedding) as similarity
-                    WHERE similarity > 0.5
-                    RETURN e, similarity
-                    ORDER BY similarity DESC
-                    LIMIT $top_k
+                    WHERE e.name IN $names
+                    RETURN {self.graph_store.entity_projection()}
                     """,
-                    {
-                        "query_embedding": query_embedding,
-                        "top_k": top_k,
-                    },
+                    {"names": [name for name, _ in hits]},
                 )
 
-                results = []
+                entities = {}
                 while result.has_next():
-                    row = result.get_next()
-                    e = row[0]
-                    similarity = row[1]
-
-                    entity = EntityNode(
-                        name=e["name"],
-                        type=e["type"],
-                        description=e["description"],
-                        importance=e.get("importance", 1.0),
-                    )
-                    results.append((entity, similarity))
-
-                return results
+                    entity = self.graph_store.entity_from_row(result.get_next())
+                    entities[entity.name] = entity
+
+                return [
+                    (entities[name], similarity)
+                    for name, similarity in hits
+                    if name in entities
+                ]
             except Exception as e:
                 logger.error(f"[GraphMemory] 向量检索失败: {e}", exc_info=True)
                 return []
@@ -184,10 +194,10 @@ class MemoryRetriever:
                 results = []
                 for keyword in keywords:
                     result = self.graph_store.conn.execute(
-                        """
+                        f"""
                         MATCH (e:Entity)
                         WHERE e.name CONTAINS $keyword OR e.description CONTAINS $keyword
-                        RETURN e
+                        RETURN {self.graph_store.entity_projection()}
                         LIMIT $top_k
                         """,
                         {
@@ -197,17 +207,9 @@ class MemoryRetriever:
                     )
 
                     while result.has_next():
-                        row = result.get_next()
-                        e = row[0]
-
-                        entity = EntityNode(
-                            name=e["name"],
-                            type=e["type"],
-                            description=e["description"],
-                            importance=e.get("importance", 1.0),
-                        )
+                        entity = self.graph_store.entity_from_row(result.get_next())
                         # 简单的匹配分数
-                        score = 0.8 if keyword in e["name"] else 0.6
+                        score = 0.8 if keyword in entity.name else 0.6
                         results.append((entity, score))
 
                 return results
@@ -316,7 +318,7 @@ class MemoryRetriever:
         1. 检索分数
         2. 实体重要性
         3. 访问频率
-        4. 时间衰减（通过 importance 已体现）
+        4. 时间衰减（importance 为读取时按衰减计算的有效值）
 
         Args:
             entities: 实体列表
@@ -392,14 +394,119 @@ class MemoryRetriever:
 
         return await self.graph_store._execute_in_thread(_filter)
 
+    async def expand_graph(
+        self,
+        seeds: list[tuple[EntityNode, float]],
+        hops: int | None = None,
+        budget: int | None = None,
+    ) -> tuple[list[tuple[EntityNode, float]], list[dict]]:
+        """沿 RELATED_TO 关系扩展种子实体的邻域
+
+        - 每一跳在邻接表上读取前沿每个实体有效强度最高的若干条关系（不扫描关系表），
+          第二跳只从第一跳中与种子连接最强的 budget 个实体继续
+        - 在读取到的子图上以关系强度为权重、种子检索分数为重启分布计算个性化 PageRank
+        - 返回分数最高的 budget 个非种子实体，以及种子和这些实体之间的关系
+
+        Args:
+            seeds: 种子实体及其检索分数
+            hops: 扩展跳数（默认使用 expansion_hops）
+            budget: 扩展实体数量上限（默认使用 expansion_budget）
+
+        Returns:
+            (扩展实体及其分数列表, 关系列表)
+        """
+        hops = self.expansion_hops if hops is None else max(0, min(hops, 2))
+        budget = self.expansion_budget if budget is None else budget
+        if not seeds or hops == 0 or budget <= 0:
+            return [], []
+
+        seed_scores = {entity.name: max(score, 1e-6) for entity, score in seeds}
+
+        def _expand():
+            try:
+                edges: dict[tuple[str, str], tuple[str, float]] = {}
+                frontier = list(seed_scores)
+                visited = set(frontier)
+
+                for _ in range(hops):
+                    reached: dict[str, float] = {}
+                    for a, b, relation, weight in self.graph_store.strongest_edges(
+                        frontier, self.EXPANSION_EDGES_PER_NODE
+                    ):
+                        edges[(a, b)] = (relation, weight)
+                        for node in (a, b):
+                            if node not in visited:
+                                reached[node] = reached.get(node, 0.0) + weight
+
+                    # 下一跳只从连接最强的 budget 个新实体出发
+                    frontier = sorted(reached, key=reached.get, reverse=True)[:budget]
+                    visited.update(reached)
+                    if not frontier:
+                        break
+
+                if not edges:
+                    return [], []
+
+                nodes = list(seed_scores) + [name for name in visited if name not in seed_scores]
+                position = {name: i for i, name in enumerate(nodes)}
+                keys = list(edges)
+                scores = personalized_pagerank(
+                    len(nodes),
+                    np.array([position[a] for a, _ in keys]),
+                    np.array([position[b] for _, b in keys]),
+                    np.array([edges[key][1] for key in keys]),
+                    np.array([seed_scores.get(name, 0.0) for name in nodes]),
+                    alpha=self.EXPANSION_ALPHA,
+                )
+
+                candidates = np.argsort(-scores[len(seed_scores):])[:budget] + len(seed_scores)
+                selected = {nodes[i]: float(scores[i]) for i in candidates.tolist() if scores[i] > 0}
+                if not selected:
+                    return [], []
+
+                result = self.graph_store.conn.execute(
+                    f"""
+                    MATCH (e:Entity) WHERE e.name IN $names
+                    RETURN {self.graph_store.entity_projection()}
+                    """,
+                    {"names": list(selected)},
+                )
+                entities = {}
+                while result.has_next():
+                    entity = self.graph_store.entity_from_row(result.get_next())
+                    entities[entity.name] = entity
+                expanded = [
+                    (entities[name], score)
+                    for name, score in selected.items()
+                    if name in entities
+                ]
+
+                kept = set(seed_scores) | set(entities)
+                relations = [
+                    {"from": a, "to": b, "relation": relation, "strength": weight}
+                    for (a, b), (relation, weight) in edges.items()
+                    if a in kept and b in kept
+                ]
+                relations.sort(key=lambda rel: rel["strength"], reverse=True)
+                return expanded, relations[:max(10, budget * 2)]
+            except Exception as e:
+                logger.error(f"[GraphMemory] 图扩展失败: {e}", exc_info=True)
+                return [], []
+
+        return await self.graph_store._execute_in_thread(_expand)
+
     def _format_memory_context(
         self,
         entities: list[tuple[EntityNode, float]],
+        expanded: list[tuple[EntityNode, float]] | None = None,
+        relations: list[dict] | None = None,
     ) -> str:
         """格式化记忆上下文
 
         Args:
             entities: 实体列表
+            expanded: 图扩展得到的相关实体（可选）
+            relations: 关系列表（可选，默认查询实体之间的关系）
 
         Returns:
             格式化的文本
@@ -412,8 +519,15 @@ class MemoryRetriever:
         for entity, score in entities:
             lines.append(f"- {entity.name} ({entity.type}): {entity.description}")
 
+        if expanded:
+            lines.append("")
+            lines.append("相关实体:")
+            for entity, score in expanded:
+                lines.append(f"- {entity.name} ({entity.type}): {entity.description}")
+
         # 添加关系信息
-        relations = self._get_relations_between_entities(entities)
+        if relations is None:
+            relations = self._get_relations_between_entities(entities)
         if relations:
             lines.append("")
             lines.append("关系:")
@@ -440,15 +554,16 @@ class MemoryRetriever:
         entity_names = [e[0].name for e in entities]
 
         try:
+            strength = self.graph_store.decay_expr("r.strength", "r.last_decay_reference")
             result = self.graph_store.conn.execute(
-                """
+                f"""
                 MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
                 WHERE e1.name IN $names AND e2.name IN $names
-                RETURN e1.name as from, e2.name as to, r.relation as relation, r.strength as strength
-                ORDER BY r.strength DESC
+                RETURN e1.name as from, e2.name as to, r.relation as relation, {strength} as strength
+                ORDER BY strength DESC
                 LIMIT 10
                 """,
-                {"names": entity_names},
+                {"names": entity_names, **self.graph_store.decay_params()},
             )
 
             relations = []
@@ -1,14 +1,20 @@
 """服务层
 
 包含:
+- candidate_generation: 重复实体候选生成
 - entity_disambiguation: 实体消歧服务
 - function_calling: Function Calling 服务
+- import_jobs: 分块上传导入任务
 """
 
+from .candidate_generation import CandidateGenerator
 from .entity_disambiguation import EntityDisambiguation
 from .function_calling import FunctionCallingHandler
+from .import_jobs import ImportJobManager
 
 __all__ = [
+    "CandidateGenerator",
     "EntityDisambiguation",
     "FunctionCallingHandler",
+    "ImportJobManager",
 ]
@@ -0,0 +1,209 @@
+"""重复实体候选生成模块"""
+
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+# 检查 pypinyin 是否可用
+try:
+    from pypinyin import lazy_pinyin
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+
+_NAME_STRIP_PATTERN = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def normalize_name(name: str) -> str:
+    """规范化实体名称（全半角统一、小写、去除空白和标点）"""
+    name = unicodedata.normalize("NFKC", name or "").lower()
+    return _NAME_STRIP_PATTERN.sub("", name)
+
+
+def edit_distance(a: str, b: str, max_distance: int | None = None) -> int:
+    """计算 Levenshtein 编辑距离
+
+    Args:
+        a: 字符串1
+        b: 字符串2
+        max_distance: 超过该距离时提前返回 max_distance + 1
+
+    Returns:
+        编辑距离
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class CandidateGenerator:
+    """重复实体候选生成器
+
+    在相似度打分和 LLM 验证之前，只挑选"可能重复"的实体对:
+    - 随机超平面 LSH: 多张哈希表，向量夹角越小越容易落入同一个桶
+    - 名称分块: 规范化名称、拼音、单字符删除邻域（编辑距离）
+    """
+
+    def __init__(
+        self,
+        num_bits: int = 12,
+        num_tables: int = 24,
+        max_bucket_size: int = 256,
+        max_edit_distance: int = 1,
+        seed: int = 42,
+    ):
+        self.num_bits = num_bits
+        self.num_tables = num_tables
+        self.max_bucket_size = max_bucket_size
+        self.max_edit_distance = max_edit_distance
+        self.seed = seed
+        self._planes: np.ndarray | None = None
+
+    def _get_planes(self, dim: int) -> np.ndarray:
+        """获取随机超平面（按维度缓存，保证多次运行结果一致）"""
+        if self._planes is None or self._planes.shape[0] != dim:
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal(
+                (dim, self.num_tables * self.num_bits)
+            ).astype(np.float32)
+        return self._planes
+
+    def embedding_candidates(self, matrix: np.ndarray) -> np.ndarray:
+        """基于随机超平面 LSH 生成候选对
+
+        Args:
+            matrix: 向量矩阵 (n, dim)
+
+        Returns:
+            候选对数组 (m, 2)，每行 i < j
+        """
+        n = matrix.shape[0]
+        if n < 2:
+            return np.zeros((0, 2), dtype=np.int64)
+
+        planes = self._get_planes(matrix.shape[1])
+        bits = (matrix @ planes) > 0
+        weights = np.left_shift(1, np.arange(self.num_bits, dtype=np.int64))
+
+        chunks = []
+        for t in range(self.num_tables):
+            table_bits = bits[:, t * self.num_bits:(t + 1) * self.num_bits]
+            codes = table_bits.astype(np.int64) @ weights
+            chunks.extend(self._bucket_pairs(codes))
+
+        return self._unique_pairs(chunks, n)
+
+    def name_candidates(self, names: list[str]) -> np.ndarray:
+        """基于名称分块生成候选对
+
+        Args:
+            names: 实体名称列表
+
+        Returns:
+            候选对数组 (m, 2)，每行 i < j
+        """
+        n = len(names)
+        if n < 2:
+            return np.zeros((0, 2), dtype=np.int64)
+
+        normalized = [normalize_name(name) for name in names]
+        exact_keys: dict[str, list[int]] = defaultdict(list)
+        fuzzy_keys: dict[str, list[int]] = defaultdict(list)
+
+        for idx, norm in enumerate(normalized):
+            if not norm:
+                continue
+            exact_keys["n:" + norm].append(idx)
+            if PYPINYIN_AVAILABLE:
+                exact_keys["p:" + "".join(lazy_pinyin(norm))].append(idx)
+            # 单字符删除邻域: 编辑距离 <= 1 的名称必然共享某个删除变体。
+            # 两个字的名称只作为被插入的一方参与（如 "北京" / "北京市"），
+            # 避免 "北京" / "南京" 这类短名称的替换被视为候选
+            if self.max_edit_distance > 0 and len(norm) >= 2:
+                fuzzy_keys[norm].append(idx)
+                if len(norm) >= 3:
+                    for pos in range(len(norm)):
+                        fuzzy_keys[norm[:pos] + norm[pos + 1:]].append(idx)
+
+        chunks = []
+        for members in exact_keys.values():
+            chunks.extend(self._block_pairs(np.unique(members)))
+
+        fuzzy_pairs = set()
+        for members in fuzzy_keys.values():
+            if len(members) < 2 or len(members) > self.max_bucket_size:
+                continue
+            members = sorted(set(members))
+            for a_pos, i in enumerate(members):
+                for j in members[a_pos + 1:]:
+                    if (i, j) in fuzzy_pairs:
+                        continue
+                    if edit_distance(normalized[i], normalized[j], self.max_edit_distance) <= self.max_edit_distance:
+                        fuzzy_pairs.add((i, j))
+        if fuzzy_pairs:
+            chunks.append(np.array(sorted(fuzzy_pairs), dtype=np.int64))
+
+        return self._unique_pairs(chunks, n)
+
+    def _bucket_pairs(self, codes: np.ndarray) -> list[np.ndarray]:
+        """将桶编码相同的行两两配对"""
+        order = np.argsort(codes, kind="stable")
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        pairs = []
+        for bucket in np.split(order, boundaries):
+            pairs.extend(self._block_pairs(bucket))
+        return pairs
+
+    def _block_pairs(self, bucket: np.ndarray) -> list[np.ndarray]:
+        """桶内两两配对
+
+        超过 max_bucket_size 的桶按顺序切块，避免退化为全量配对。
+        """
+        pairs = []
+        for start in range(0, len(bucket), self.max_bucket_size):
+            block = bucket[start:start + self.max_bucket_size]
+            if len(block) < 2:
+                continue
+            rows, cols = np.triu_indices(len(block), k=1)
+            pairs.append(np.stack([block[rows], block[cols]], axis=1))
+        return pairs
+
+    @staticmethod
+    def _unique_pairs(chunks: list[np.ndarray], n: int) -> np.ndarray:
+        """合并去重候选对，并保证 i < j"""
+        if not chunks:
+            return np.zeros((0, 2), dtype=np.int64)
+        pairs = np.concatenate(chunks)
+        pairs = np.sort(pairs, axis=1)
+        keys = np.unique(pairs[:, 0] * n + pairs[:, 1])
+        return np.stack([keys // n, keys % n], axis=1)
+
+
+def score_pairs(matrix: np.ndarray, pairs: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """计算候选对的余弦相似度（矩阵需已归一化）"""
+    scores = np.empty(len(pairs), dtype=np.float32)
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start:start + chunk_size]
+        scores[start:start + chunk_size] = np.einsum(
+            "ij,ij->i", matrix[chunk[:, 0]], matrix[chunk[:, 1]]
+        )
+    return scores
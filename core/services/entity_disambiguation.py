@@ -1,12 +1,30 @@
 """实体消歧模块"""
 
+import asyncio
+import json
+import time
 from typing import Any
 
+import numpy as np
+
 from astrbot.api import logger
 from astrbot.api.star import Context
 
 from ..models import EntityNode
-from ..storage import GraphStore
+from ..storage import GraphStore, MergeVerdictCache
+from ..storage.embedding_store import RowView
+from ..storage.verdict_cache import make_pair_key
+from ..utils import (
+    MERGE_VERIFICATION_PROMPT,
+    QuantizedMatrix,
+    UnionFind,
+    blocked_query_pairs,
+    blocked_similar_pairs,
+    find_json_blob,
+    rescore_pairs,
+    to_normalized_matrix,
+)
+from .candidate_generation import CandidateGenerator, score_pairs
 
 
 class EntityDisambiguation:
@@ -18,153 +36,409 @@ class EntityDisambiguation:
     - 合并重复实体
     """
 
+    # 同类型实体数不超过该值时使用精确的分块全量比较，否则使用 LSH 候选
+    EXHAUSTIVE_LIMIT = 5000
+    # 名称分块命中的候选对，相似度阈值放宽的幅度
+    NAME_MATCH_RELAXATION = 0.1
+    # 增量消歧时，变化实体占比超过该值则退化为全量比较
+    INCREMENTAL_MAX_RATIO = 0.5
+    # 增量消歧时，每个变化实体从向量存储中取出的近邻数（不区分类型）
+    INCREMENTAL_NEIGHBORS = 50
+    # 量化矩阵上筛选候选时，相似度阈值放宽的幅度（之后用原始向量重新打分）
+    QUANTIZATION_MARGIN = 0.02
+    # 每次 LLM 请求验证的实体对数量
+    VERIFY_BATCH_SIZE = 20
+    # 同时进行的 LLM 验证请求数
+    VERIFY_CONCURRENCY = 4
+
     def __init__(
         self,
         context: Context,
         graph_store: GraphStore,
         embedding_provider: Any | None = None,
         llm_provider_id: str | None = None,
+        candidate_generator: CandidateGenerator | None = None,
+        verdict_cache: MergeVerdictCache | None = None,
+        quantization: str | None = None,
     ):
         self.context = context
         self.graph_store = graph_store
         self.embedding_provider = embedding_provider
         self.llm_provider_id = llm_provider_id
+        self.candidate_generator = candidate_generator or CandidateGenerator()
+        self.verdict_cache = verdict_cache
+        # 相似度矩阵的量化类型（int8 / float16），None 表示使用 float32
+        self.quantization = quantization if quantization in QuantizedMatrix.DTYPES else None
+        # 未配置判定缓存时，水位线只保存在内存中
+        self._watermark: float | None = None
 
     async def find_similar_entities(
         self,
         similarity_threshold: float = 0.85,
-        limit: int = 100,
+        limit: int | None = None,
+        top_k: int = 10,
+        block_size: int = 1024,
+        since: float | None = None,
     ) -> list[tuple[EntityNode, EntityNode, float]]:
         """查找相似的实体对
 
+        按实体类型分组，从向量存储的内存映射矩阵中取出各组的向量:
+        - 小分组: 分块矩阵乘法为每个实体求 top_k 个最相似的同类型实体
+        - 大分组: 先用 LSH 生成候选对，只对候选打分
+        另外，名称分块（规范化名称、拼音、编辑距离）命中的实体对以放宽的阈值参与打分。
+
+        启用量化时矩阵以 int8 / float16 保存，候选按略低的阈值筛选，
+        命中的实体对再用原始向量重新计算相似度。
+
+        指定 since 时只读取该时间之后创建或描述变化的实体，以及它们在向量存储中的近邻，
+        只比较包含变化实体的实体对，读取量和计算量与变化量成正比，而不是与图谱规模成正比。
+        变化实体超过一定比例时退化为全量比较。
+
         Args:
             similarity_threshold: 相似度阈值
-            limit: 检查的实体数量限制
+            limit: 检查的实体数量限制（按重要性排序，None 表示全表）
+            top_k: 每个实体最多保留的候选数量
+            block_size: 分块矩阵乘法的行数
+            since: 增量水位线（Unix 时间戳），None 表示全量比较
 
         Returns:
             相似实体对列表 [(实体1, 实体2, 相似度)]
         """
-        if not self.embedding_provider:
-            logger.warning("[GraphMemory] 未配置 Embedding Provider，无法进行实体消歧")
+        try:
+            similar_pairs, _ = await self._find_similar(
+                similarity_threshold, limit, top_k, block_size, since
+            )
+            return similar_pairs
+        except Exception as e:
+            logger.error(f"[GraphMemory] 查找相似实体失败: {e}", exc_info=True)
             return []
 
-        def _find():
-            try:
-                # 获取所有实体
-                result = self.graph_store.conn.execute(
-                    """
-                    MATCH (e:Entity)
-                    WHERE e.embedding IS NOT NULL
-                    RETURN e
-                    ORDER BY e.importance DESC
-                    LIMIT $limit
-                    """,
-                    {"limit": limit},
-                )
+    async def _find_similar(
+        self,
+        similarity_threshold: float,
+        limit: int | None,
+        top_k: int,
+        block_size: int,
+        since: float | None,
+    ) -> tuple[list[tuple[EntityNode, EntityNode, float]], int]:
+        """查找相似的实体对（异常向上抛出）
 
-                entities = []
-                while result.has_next():
-                    row = result.get_next()
-                    e = row[0]
-                    entity = EntityNode(
-                        name=e["name"],
-                        type=e["type"],
-                        description=e["description"],
-                        embedding=e.get("embedding"),
-                        importance=e.get("importance", 1.0),
-                    )
-                    entities.append(entity)
+        Returns:
+            (相似实体对列表, 参与比较的变化实体数)
+        """
+        if not self.embedding_provider:
+            logger.warning("[GraphMemory] 未配置 Embedding Provider，无法进行实体消歧")
+            return [], 0
+
+        since_ms = since * 1000 if since is not None else None
+        store = self.graph_store.embeddings
+        importance = self.graph_store.decay_expr("e.importance", "e.last_decay_reference")
+
+        def _fetch(where: str, params: dict) -> list:
+            result = self.graph_store.conn.execute(
+                f"""
+                MATCH (e:Entity)
+                WHERE {where}
+                RETURN e.name, e.type, e.description, {importance}, to_epoch_ms(e.updated_at)
+                """,
+                {**params, **self.graph_store.decay_params()},
+            )
+            rows = []
+            while result.has_next():
+                rows.append(result.get_next())
+            return rows
+
+        def _load_chunk(start: int, end: int) -> list:
+            return _fetch(
+                "offset(ID(e)) >= $chunk_start AND offset(ID(e)) < $chunk_end",
+                {"chunk_start": start, "chunk_end": end},
+            )
 
-                # 计算相似度
-                similar_pairs = []
-                for i in range(len(entities)):
-                    for j in range(i + 1, len(entities)):
-                        e1, e2 = entities[i], entities[j]
+        def _load_changed() -> tuple[list, int, np.ndarray, np.ndarray]:
+            rows = _fetch(
+                "e.updated_at IS NULL OR to_epoch_ms(e.updated_at) > $since_ms",
+                {"since_ms": int(since_ms)},
+            )
+            return rows, len(store), store.matrix, store.rows_for([row[0] for row in rows])
 
-                        # 跳过类型不同的实体
-                        if e1.type != e2.type:
-                            continue
+        def _neighbors(changed: list, matrix: np.ndarray, vector_rows: np.ndarray) -> list[str]:
+            # 名称分块候选同样要达到放宽后的阈值，所以按放宽后的阈值取近邻即可覆盖
+            min_similarity = (
+                similarity_threshold - self.NAME_MATCH_RELAXATION - self.QUANTIZATION_MARGIN
+            )
+            names: set[str] = set()
+            for row in vector_rows.tolist():
+                if row >= 0:
+                    names.update(
+                        name
+                        for name, _ in store.search(
+                            matrix[row], self.INCREMENTAL_NEIGHBORS, min_similarity
+                        )
+                    )
+            return list(names - {row[0] for row in changed})
 
-                        # 计算余弦相似度
-                        if e1.embedding and e2.embedding:
-                            similarity = self._cosine_similarity(e1.embedding, e2.embedding)
-                            if similarity >= similarity_threshold:
-                                similar_pairs.append((e1, e2, similarity))
+        async def _load_incremental() -> list | None:
+            """只读取变化实体和它们在向量存储中的近邻，变化实体过多时返回 None"""
+            changed, total, matrix, vector_rows = await self.graph_store._execute_in_thread(
+                _load_changed
+            )
+            if len(changed) > total * self.INCREMENTAL_MAX_RATIO:
+                return None
+            if not changed:
+                return []
+            neighbors = await asyncio.to_thread(_neighbors, changed, matrix, vector_rows)
+            if not neighbors:
+                return changed
+            return changed + await self.graph_store._execute_in_thread(
+                _fetch, "e.name IN $names", {"names": neighbors}
+            )
 
-                # 按相似度排序
-                similar_pairs.sort(key=lambda x: x[2], reverse=True)
+        def _group(rows: list, matrix: np.ndarray, vector_rows: np.ndarray):
+            groups: dict[str, tuple[list[EntityNode], list[int], list[bool]]] = {}
+            for (name, entity_type, description, importance, updated_ms), vector_row in zip(
+                rows, vector_rows.tolist()
+            ):
+                entities, embeddings, dirty = groups.setdefault(entity_type, ([], [], []))
+                # 没有 updated_at 的旧数据视为变化实体
+                dirty.append(since_ms is None or updated_ms is None or updated_ms > since_ms)
+                entities.append(EntityNode(
+                    name=name,
+                    type=entity_type,
+                    description=description,
+                    importance=importance if importance is not None else 1.0,
+                ))
+                embeddings.append(vector_row)
+            # 没有向量的实体行号为 -1，取出的是零向量，会被当作无效行跳过
+            return {
+                entity_type: (entities, RowView(matrix, vector_rows), dirty)
+                for entity_type, (entities, vector_rows, dirty) in groups.items()
+            }
+
+        def _score(rows: list, matrix: np.ndarray, vector_rows: np.ndarray):
+            groups = _group(rows, matrix, vector_rows)
+            similar_pairs = []
+            candidate_count = 0
+            dirty_count = 0
+            for entities, embeddings, dirty in groups.values():
+                dirty = np.asarray(dirty, dtype=bool)
+                dirty_count += int(dirty.sum())
+                if len(entities) < 2 or not dirty.any():
+                    continue
+
+                if self.quantization:
+                    matrix, valid = QuantizedMatrix.from_embeddings(
+                        embeddings, self.quantization, block_size
+                    )
+                    margin = self.QUANTIZATION_MARGIN
+                else:
+                    matrix, valid = to_normalized_matrix(embeddings)
+                    margin = 0.0
+                # 跳过零向量（embedding 生成失败的实体）
+                index = np.flatnonzero(valid)
+                found: dict[tuple[int, int], float] = {}
+                # 只读取了变化实体及其近邻时，未变化实体之间不再比较
+                incremental = not dirty.all() and (
+                    partial or dirty.sum() <= len(entities) * self.INCREMENTAL_MAX_RATIO
+                )
 
-                return similar_pairs
+                if incremental:
+                    # 只让变化实体与分组内全部实体做矩阵乘法
+                    query_rows = np.flatnonzero(dirty[index])
+                    for i, j, similarity in blocked_query_pairs(
+                        matrix[index], query_rows, similarity_threshold - margin, top_k, block_size
+                    ):
+                        found[(int(index[i]), int(index[j]))] = similarity
+                elif len(index) <= self.EXHAUSTIVE_LIMIT:
+                    for i, j, similarity in blocked_similar_pairs(
+                        matrix[index], similarity_threshold - margin, top_k, block_size
+                    ):
+                        found[(int(index[i]), int(index[j]))] = similarity
+                else:
+                    candidates = index[
+                        self.candidate_generator.embedding_candidates(matrix[index])
+                    ]
+                    candidate_count += len(candidates)
+                    self._collect_scored(matrix, candidates, similarity_threshold - margin, found)
+
+                # 名称分块候选
+                name_pairs = self.candidate_generator.name_candidates(
+                    [entity.name for entity in entities]
+                )
+                name_pairs = name_pairs[valid[name_pairs].all(axis=1)]
+                if incremental:
+                    name_pairs = name_pairs[dirty[name_pairs].any(axis=1)]
+                candidate_count += len(name_pairs)
+                self._collect_scored(
+                    matrix,
+                    name_pairs,
+                    similarity_threshold - self.NAME_MATCH_RELAXATION - margin,
+                    found,
+                )
 
-            except Exception as e:
-                logger.error(f"[GraphMemory] 查找相似实体失败: {e}", exc_info=True)
-                return []
+                if self.quantization and found:
+                    # 用原始向量重新打分，按各自的阈值过滤
+                    keys = np.array(list(found), dtype=np.int64)
+                    exact = rescore_pairs(lambda rows: embeddings[rows], keys)
+                    relaxed = set(map(tuple, name_pairs.tolist()))
+                    found = {
+                        (i, j): similarity
+                        for (i, j), similarity in zip(keys.tolist(), exact.tolist())
+                        if similarity >= similarity_threshold - (
+                            self.NAME_MATCH_RELAXATION if (i, j) in relaxed else 0.0
+                        )
+                    }
+
+                for (i, j), similarity in found.items():
+                    similar_pairs.append((entities[i], entities[j], similarity))
+
+            logger.debug(
+                f"[GraphMemory] 消歧变化实体: {dirty_count}，候选对: {candidate_count}，"
+                f"命中: {len(similar_pairs)}"
+            )
 
-        return await self.graph_store._execute_in_thread(_find)
+            # 按相似度排序
+            similar_pairs.sort(key=lambda x: x[2], reverse=True)
+            return similar_pairs, dirty_count
+
+        # 限制数量时由重要性索引给出最重要的实体
+        top_names = None
+        if limit:
+            names, _ = await self.graph_store.top_entity_names(limit)
+            top_names = set(names)
+
+        rows = await _load_incremental() if since_ms is not None else None
+        partial = rows is not None
+        if rows is None:
+            # 全量比较: 分块读取，块之间让出数据库线程
+            chunks = await self.graph_store.run_chunked("disambiguation_load", _load_chunk)
+            if self.graph_store.maintenance_progress["disambiguation_load"]["failed_chunks"]:
+                # 数据不完整时不能推进水位线
+                raise RuntimeError("部分实体分块读取失败")
+            rows = [row for chunk in chunks for row in chunk]
+        if top_names is not None:
+            rows = [row for row in rows if row[0] in top_names]
+
+        # 在执行器线程中取向量存储的快照（之后的追加写入不影响快照）
+        matrix, vector_rows = await self.graph_store._execute_in_thread(
+            lambda: (store.matrix, store.rows_for([row[0] for row in rows]))
+        )
+        # 矩阵运算不占用数据库线程
+        return await asyncio.to_thread(_score, rows, matrix, vector_rows)
+
+    @staticmethod
+    def _collect_scored(
+        matrix: np.ndarray,
+        pairs: np.ndarray,
+        threshold: float,
+        found: dict[tuple[int, int], float],
+    ):
+        """对候选对打分，并将超过阈值的结果写入 found"""
+        if len(pairs) == 0:
+            return
+        scores = score_pairs(matrix, pairs)
+        hits = scores >= threshold
+        for (i, j), similarity in zip(pairs[hits].tolist(), scores[hits].tolist()):
+            found.setdefault((i, j), similarity)
+
+    async def verify_pairs(
+        self,
+        pairs: list[tuple[EntityNode, EntityNode]],
+    ) -> list[bool]:
+        """批量使用 LLM 判断实体对是否应该合并
 
-    def _cosine_similarity(self, vec1: list[float], vec2: list[float]) -> float:
-        """计算余弦相似度"""
-        import math
+        - 先查询判定缓存，命中的实体对（包括否定结果）不再询问
+        - 未命中的实体对按 VERIFY_BATCH_SIZE 分批，每批一次 LLM 请求
+        - 最多 VERIFY_CONCURRENCY 个批次并发执行
 
-        if len(vec1) != len(vec2):
-            return 0.0
+        Args:
+            pairs: 实体对列表
 
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = math.sqrt(sum(a * a for a in vec1))
-        norm2 = math.sqrt(sum(b * b for b in vec2))
+        Returns:
+            与 pairs 一一对应的判定结果
+        """
+        return [bool(verdict) for verdict in await self._verify_pairs(pairs)]
 
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
+    async def _verify_pairs(
+        self,
+        pairs: list[tuple[EntityNode, EntityNode]],
+    ) -> list[bool | None]:
+        """批量判定实体对，LLM 未给出判定的实体对为 None"""
+        keys = [make_pair_key(e1, e2) for e1, e2 in pairs]
+        cached = self.verdict_cache.get_many(keys) if self.verdict_cache else {}
+
+        pending = [i for i, key in enumerate(keys) if key not in cached]
+        batches = [
+            pending[start:start + self.VERIFY_BATCH_SIZE]
+            for start in range(0, len(pending), self.VERIFY_BATCH_SIZE)
+        ]
+        if batches:
+            logger.info(
+                f"[GraphMemory] 合并验证: 缓存命中 {len(pairs) - len(pending)} 对，"
+                f"需询问 {len(pending)} 对 ({len(batches)} 批)"
+            )
 
-        return dot_product / (norm1 * norm2)
+        semaphore = asyncio.Semaphore(self.VERIFY_CONCURRENCY)
 
-    async def should_merge(self, entity1: EntityNode, entity2: EntityNode) -> bool:
-        """使用 LLM 判断两个实体是否应该合并
+        async def _run(batch: list[int]) -> dict[int, bool]:
+            async with semaphore:
+                return await self._verify_batch([pairs[i] for i in batch])
 
-        Args:
-            entity1: 实体1
-            entity2: 实体2
+        results = await asyncio.gather(*(_run(batch) for batch in batches))
 
-        Returns:
-            是否应该合并
-        """
-        # 确定使用的 LLM Provider
-        provider_id = self.llm_provider_id
-        if not provider_id:
-            # 使用默认 Provider
-            provider_id = None
+        fresh = {}
+        for batch, verdicts in zip(batches, results):
+            for pos, verdict in verdicts.items():
+                fresh[keys[batch[pos]]] = verdict
 
-        prompt = f"""判断以下两个实体是否指向同一个事物：
+        # 只缓存 LLM 明确给出的判定，解析失败的实体对下次重试
+        if self.verdict_cache and fresh:
+            self.verdict_cache.put_many(fresh)
 
-实体1:
-- 名称: {entity1.name}
-- 类型: {entity1.type}
-- 描述: {entity1.description}
+        verdicts = {**cached, **fresh}
+        return [verdicts.get(key) for key in keys]
 
-实体2:
-- 名称: {entity2.name}
-- 类型: {entity2.type}
-- 描述: {entity2.description}
+    async def _verify_batch(
+        self,
+        pairs: list[tuple[EntityNode, EntityNode]],
+    ) -> dict[int, bool]:
+        """一次 LLM 请求验证一批实体对
 
-请仔细分析两个实体的名称和描述，判断它们是否指向同一个事物。
-只回答 "是" 或 "否"，不要解释。
-"""
+        Returns:
+            {批内序号: 判定结果}，LLM 未给出判定的实体对不包含在内
+        """
+        lines = []
+        for pair_id, (e1, e2) in enumerate(pairs, 1):
+            lines.append(
+                f"{pair_id}. 实体A: {e1.name} ({e1.type}) - {e1.description}\n"
+                f"   实体B: {e2.name} ({e2.type}) - {e2.description}"
+            )
+        prompt = MERGE_VERIFICATION_PROMPT.format(pairs="\n".join(lines))
 
         try:
             resp = await self.context.llm_generate(
-                chat_provider_id=provider_id,
+                chat_provider_id=self.llm_provider_id or None,
                 prompt=prompt,
             )
 
             if not resp or not resp.completion_text:
-                return False
+                logger.warning("[GraphMemory] 合并验证 LLM 返回空响应")
+                return {}
 
-            answer = resp.completion_text.strip().lower()
-            return "是" in answer or "yes" in answer
+            json_str = find_json_blob(resp.completion_text)
+            if not json_str:
+                logger.warning(f"[GraphMemory] 合并验证未找到有效的 JSON: {resp.completion_text}")
+                return {}
+
+            verdicts = {}
+            for item in json.loads(json_str).get("verdicts", []):
+                pair_id = item.get("id")
+                if isinstance(pair_id, int) and 1 <= pair_id <= len(pairs):
+                    verdicts[pair_id - 1] = item.get("same") is True
+            return verdicts
 
         except Exception as e:
-            logger.error(f"[GraphMemory] LLM 判断失败: {e}", exc_info=True)
-            return False
+            logger.error(f"[GraphMemory] 批量合并验证失败: {e}", exc_info=True)
+            return {}
 
     async def merge_entities(self, entity1_name: str, entity2_name: str) -> bool:
         """合并两个实体
@@ -179,153 +453,127 @@ class EntityDisambiguation:
         Returns:
             是否成功
         """
-        def _merge():
-            try:
-                # 1. 获取两个实体
-                e1 = self.graph_store.conn.execute(
-                    "MATCH (e:Entity {name: $name}) RETURN e",
-                    {"name": entity1_name},
-                )
-                e2 = self.graph_store.conn.execute(
-                    "MATCH (e:Entity {name: $name}) RETURN e",
-                    {"name": entity2_name},
-                )
-
-                if not e1.has_next() or not e2.has_next():
-                    logger.warning(f"[GraphMemory] 实体不存在: {entity1_name} 或 {entity2_name}")
-                    return False
-
-                # 2. 合并重要性和访问次数
-                self.graph_store.conn.execute(
-                    """
-                    MATCH (e1:Entity {name: $name1}), (e2:Entity {name: $name2})
-                    SET e1.importance = e1.importance + e2.importance,
-                        e1.access_count = e1.access_count + e2.access_count
-                    """,
-                    {"name1": entity1_name, "name2": entity2_name},
-                )
-
-                # 3. 将 entity2 的所有出边关系转移到 entity1
-                self.graph_store.conn.execute(
-                    """
-                    MATCH (e2:Entity {name: $name2})-[r:RELATED_TO]->(target:Entity)
-                    WHERE target.name <> $name1
-                    MATCH (e1:Entity {name: $name1})
-                    MERGE (e1)-[new_r:RELATED_TO]->(target)
-                    ON CREATE SET
-                        new_r.relation = r.relation,
-                        new_r.strength = r.strength,
-                        new_r.evidence = r.evidence,
-                        new_r.created_at = r.created_at,
-                        new_r.last_updated = r.last_updated
-                    ON MATCH SET
-                        new_r.strength = new_r.strength + r.strength,
-                        new_r.evidence = new_r.evidence + '; ' + r.evidence
-                    """,
-                    {"name1": entity1_name, "name2": entity2_name},
-                )
+        return await self.graph_store.merge_entity_cluster(entity1_name, [entity2_name])
 
-                # 4. 将 entity2 的所有入边关系转移到 entity1
-                self.graph_store.conn.execute(
-                    """
-                    MATCH (source:Entity)-[r:RELATED_TO]->(e2:Entity {name: $name2})
-                    WHERE source.name <> $name1
-                    MATCH (e1:Entity {name: $name1})
-                    MERGE (source)-[new_r:RELATED_TO]->(e1)
-                    ON CREATE SET
-                        new_r.relation = r.relation,
-                        new_r.strength = r.strength,
-                        new_r.evidence = r.evidence,
-                        new_r.created_at = r.created_at,
-                        new_r.last_updated = r.last_updated
-                    ON MATCH SET
-                        new_r.strength = new_r.strength + r.strength,
-                        new_r.evidence = new_r.evidence + '; ' + r.evidence
-                    """,
-                    {"name1": entity1_name, "name2": entity2_name},
-                )
+    @staticmethod
+    def build_merge_clusters(
+        pairs: list[tuple[EntityNode, EntityNode]],
+    ) -> list[tuple[EntityNode, list[EntityNode]]]:
+        """使用并查集将确认合并的实体对聚合为簇
 
-                # 5. 转移 MENTIONED_IN 关系
-                self.graph_store.conn.execute(
-                    """
-                    MATCH (e2:Entity {name: $name2})-[r:MENTIONED_IN]->(s:Session)
-                    MATCH (e1:Entity {name: $name1})
-                    MERGE (e1)-[new_r:MENTIONED_IN]->(s)
-                    ON CREATE SET
-                        new_r.first_mentioned = r.first_mentioned,
-                        new_r.last_mentioned = r.last_mentioned,
-                        new_r.mention_count = r.mention_count,
-                        new_r.sentiment = r.sentiment
-                    ON MATCH SET
-                        new_r.mention_count = new_r.mention_count + r.mention_count,
-                        new_r.last_mentioned = CASE
-                            WHEN r.last_mentioned > new_r.last_mentioned THEN r.last_mentioned
-                            ELSE new_r.last_mentioned
-                        END
-                    """,
-                    {"name1": entity1_name, "name2": entity2_name},
-                )
+        A~B、B~C 会被聚合为同一个簇 {A, B, C}，每个簇只合并一次。
+        重要性最高的实体作为保留实体（相同时按名称排序）。
 
-                # 6. 删除 entity2
-                self.graph_store.conn.execute(
-                    """
-                    MATCH (e:Entity {name: $name})
-                    DETACH DELETE e
-                    """,
-                    {"name": entity2_name},
-                )
+        Args:
+            pairs: 确认合并的实体对
 
-                logger.info(f"[GraphMemory] 成功合并实体: {entity2_name} -> {entity1_name}")
-                return True
+        Returns:
+            [(保留实体, 其余成员)]
+        """
+        entities: dict[str, EntityNode] = {}
+        union_find = UnionFind()
+        for e1, e2 in pairs:
+            entities.setdefault(e1.name, e1)
+            entities.setdefault(e2.name, e2)
+            union_find.union(e1.name, e2.name)
+
+        clusters = []
+        for names in union_find.groups():
+            members = sorted(
+                (entities[name] for name in names),
+                key=lambda e: (-e.importance, e.name),
+            )
+            clusters.append((members[0], members[1:]))
+        return clusters
 
-            except Exception as e:
-                logger.error(f"[GraphMemory] 合并实体失败: {e}", exc_info=True)
-                return False
+    def _get_watermark(self) -> float | None:
+        """获取增量消歧水位线"""
+        if self.verdict_cache:
+            return self.verdict_cache.get_watermark()
+        return self._watermark
 
-        return await self.graph_store._execute_in_thread(_merge)
+    def _set_watermark(self, timestamp: float):
+        """更新增量消歧水位线"""
+        if self.verdict_cache:
+            self.verdict_cache.set_watermark(timestamp)
+        self._watermark = timestamp
 
     async def run_disambiguation(
         self,
         similarity_threshold: float = 0.85,
         auto_merge: bool = False,
+        full_scan: bool = False,
     ) -> dict:
         """运行实体消歧
 
+        默认只比较上次消歧之后创建或描述变化的实体。
+        本轮所有实体对都得到判定且合并成功后才推进水位线，
+        否则下一轮会重新检查这些实体。
+
         Args:
             similarity_threshold: 相似度阈值
             auto_merge: 是否自动合并（不使用 LLM 判断）
+            full_scan: 是否忽略水位线进行全量比较
 
         Returns:
             消歧结果统计
         """
         logger.info("[GraphMemory] 开始实体消歧...")
 
+        started_at = time.time()
+        since = None if full_scan else self._get_watermark()
+
         # 查找相似实体
-        similar_pairs = await self.find_similar_entities(similarity_threshold)
+        try:
+            similar_pairs, checked = await self._find_similar(
+                similarity_threshold, None, 10, 1024, since
+            )
+        except Exception as e:
+            logger.error(f"[GraphMemory] 查找相似实体失败: {e}", exc_info=True)
+            return {"found": 0, "merged": 0, "checked": 0}
 
         if not similar_pairs:
-            logger.info("[GraphMemory] 未找到相似实体")
-            return {"found": 0, "merged": 0}
-
-        logger.info(f"[GraphMemory] 找到 {len(similar_pairs)} 对相似实体")
-
-        # 合并实体
+            logger.info(f"[GraphMemory] 检查了 {checked} 个变化实体，未找到相似实体")
+            self._set_watermark(started_at)
+            return {"found": 0, "merged": 0, "checked": checked}
+
+        logger.info(
+            f"[GraphMemory] 检查了 {checked} 个变化实体，找到 {len(similar_pairs)} 对相似实体"
+        )
+
+        # 判断是否应该合并
+        if auto_merge:
+            verdicts = [True] * len(similar_pairs)
+        else:
+            verdicts = await self._verify_pairs([(e1, e2) for e1, e2, _ in similar_pairs])
+        complete = all(verdict is not None for verdict in verdicts)
+
+        # 按簇合并实体
+        accepted = [
+            (e1, e2)
+            for (e1, e2, _), should_merge in zip(similar_pairs, verdicts)
+            if should_merge
+        ]
         merged_count = 0
-        for e1, e2, similarity in similar_pairs:
-            # 判断是否应该合并
-            should_merge = auto_merge or await self.should_merge(e1, e2)
-
-            if should_merge:
-                success = await self.merge_entities(e1.name, e2.name)
-                if success:
-                    merged_count += 1
-                    logger.info(
-                        f"[GraphMemory] 合并实体: {e2.name} -> {e1.name} (相似度: {similarity:.2f})"
-                    )
-
-        logger.info(f"[GraphMemory] 实体消歧完成，合并了 {merged_count} 对实体")
+        for canonical, members in self.build_merge_clusters(accepted):
+            member_names = [member.name for member in members]
+            if await self.graph_store.merge_entity_cluster(canonical.name, member_names):
+                merged_count += len(members)
+                logger.info(f"[GraphMemory] 合并实体: {member_names} -> {canonical.name}")
+            else:
+                complete = False
+            # 每个簇一个事务，簇之间让出数据库线程
+            await asyncio.sleep(self.graph_store.chunk_pause)
+
+        if complete:
+            self._set_watermark(started_at)
+        else:
+            logger.warning("[GraphMemory] 部分实体对未完成判定或合并，下次消歧将重新检查")
+
+        logger.info(f"[GraphMemory] 实体消歧完成，合并了 {merged_count} 个实体")
 
         return {
             "found": len(similar_pairs),
             "merged": merged_count,
+            "checked": checked,
         }
@@ -45,6 +45,11 @@ class FunctionCallingHandler:
                             "description": "返回结果数量，默认 5",
                             "default": 5,
                         },
+                        "include_archived": {
+                            "type": "boolean",
+                            "description": "是否同时检索已归档的久远记忆，默认 false",
+                            "default": False,
+                        },
                     },
                     "required": ["query"],
                 },
@@ -77,6 +82,7 @@ class FunctionCallingHandler:
             query = tool_args.get("query", "")
             entity_type = tool_args.get("entity_type")
             limit = tool_args.get("limit", 5)
+            include_archived = tool_args.get("include_archived", False)
 
             if not query:
                 return '{"error": "缺少 query 参数"}'
@@ -85,16 +91,19 @@ class FunctionCallingHandler:
 
             # 搜索实体
             entities = await self.manager.search_entities(query, entity_type, limit)
+            archived = await self.manager.search_archived(query, limit) if include_archived else []
 
-            if not entities:
+            if not entities and not archived:
                 return f'{{"result": "未找到与 \\"{query}\\" 相关的记忆"}}'
 
+            # 一次查询取出全部结果实体的前 3 条关系
+            relations = await self.manager.get_relations_for_entities(
+                [entity.name for entity in entities], per_entity_limit=3
+            )
+
             # 格式化结果
             results = []
             for entity in entities:
-                # 获取关系
-                relations = await self.manager.get_entity_relations(entity.name)
-
                 entity_info = {
                     "name": entity.name,
                     "type": entity.type,
@@ -104,7 +113,8 @@ class FunctionCallingHandler:
                 }
 
                 # 添加关系信息
-                for rel in relations[:3]:  # 只返回前3条关系
+                top_relations, _ = relations.get(entity.name, ([], 0))
+                for rel in top_relations:
                     entity_info["relations"].append({
                         "target": rel["to"] if rel["direction"] == "outgoing" else rel["from"],
                         "relation": rel["relation"],
@@ -113,6 +123,18 @@ class FunctionCallingHandler:
 
                 results.append(entity_info)
 
+            # 归档实体只返回基本信息，再次被提及时会自动恢复
+            for entity in archived:
+                if entity_type and entity["type"] != entity_type:
+                    continue
+                results.append({
+                    "name": entity["name"],
+                    "type": entity["type"],
+                    "description": entity["description"],
+                    "importance": round(entity["importance"], 2),
+                    "archived": True,
+                })
+
             # 返回 JSON 格式结果
             import json
             return json.dumps({"result": results}, ensure_ascii=False)
@@ -0,0 +1,230 @@
+"""分块上传导入任务服务
+
+WebUI 导入的文件先分块写入磁盘，再在后台以批量导入的方式逐批写入图谱:
+- 上传可续传: 每块带字节偏移，偏移必须等于已接收的字节数
+- 导入可续跑: 每批提交后记录已提交的记录数，中断后从最后提交的批次之后继续
+- 任务状态保存为 JSON 文件，进程重启后仍可查询和续跑
+"""
+
+import asyncio
+import itertools
+import json
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from astrbot.api import logger
+
+from ..utils import read_ndjson
+
+if TYPE_CHECKING:
+    from ..storage import GraphStore
+
+
+class ImportJobManager:
+    """导入任务管理器
+
+    任务状态:
+    - uploading: 正在接收文件
+    - running: 正在导入
+    - completed / failed: 导入结束
+    - interrupted: 导入过程中进程退出，可续跑
+    """
+
+    # 支持的文件格式（ndjson 逐行解析；json 为旧版导出格式，需整体读入）
+    SUPPORTED_SUFFIXES = (".ndjson", ".ndjson.gz", ".json")
+
+    # 任务状态字段中保存的导入统计项
+    STAT_KEYS = ("entities", "relations", "copied", "merged", "skipped", "embeddings_reused", "embeddings_computed")
+
+    def __init__(self, graph_store: "GraphStore", directory: Path):
+        self.graph_store = graph_store
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # 任务 ID -> 任务状态 / 后台任务
+        self._jobs: dict[str, dict] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        # 任务 ID -> 上传锁，同一任务的数据块按顺序写入
+        self._upload_locks: dict[str, asyncio.Lock] = {}
+        self._load()
+
+    def _load(self):
+        """加载已保存的任务，上次未跑完的任务标记为中断"""
+        for path in self.directory.glob("*.job.json"):
+            try:
+                job = json.loads(path.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.warning(f"[GraphMemory] 读取导入任务 {path.name} 失败: {e}")
+                continue
+            if job.get("status") == "running":
+                job["status"] = "interrupted"
+                self._save(job)
+            self._jobs[job["id"]] = job
+
+    def _job_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.job.json"
+
+    def _upload_path(self, job: dict) -> Path:
+        return self.directory / f"{job['id']}.upload"
+
+    def _save(self, job: dict):
+        """保存任务状态（先写临时文件再替换，避免中断时留下半个文件）"""
+        job["updated_at"] = time.time()
+        path = self._job_path(job["id"])
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(job, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+
+    def create(self, filename: str, merge: bool = True) -> dict:
+        """创建导入任务
+
+        Args:
+            filename: 原始文件名，用于识别格式
+            merge: 是否合并（True）或覆盖（False）
+
+        Returns:
+            任务状态
+
+        Raises:
+            ValueError: 文件格式不支持
+        """
+        if not filename.endswith(self.SUPPORTED_SUFFIXES):
+            raise ValueError(f"不支持的导入文件格式: {filename}")
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "filename": Path(filename).name,
+            "merge": merge,
+            "status": "uploading",
+            "uploaded_bytes": 0,
+            "committed_records": 0,
+            "stats": dict.fromkeys(self.STAT_KEYS, 0),
+            "failed_batches": 0,
+            "error": None,
+            "created_at": time.time(),
+            "updated_at": time.time(),
+        }
+        self._upload_path(job).touch()
+        self._jobs[job["id"]] = job
+        self._save(job)
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        """获取任务状态"""
+        job = self._jobs.get(job_id)
+        return {**job} if job else None
+
+    def list_jobs(self) -> list[dict]:
+        """全部任务状态（按创建时间倒序）"""
+        return sorted((dict(job) for job in self._jobs.values()), key=lambda job: -job["created_at"])
+
+    async def append_chunk(self, job_id: str, offset: int, data: bytes) -> int:
+        """追加一块上传数据（文件写入在线程中进行，不阻塞事件循环）
+
+        Args:
+            job_id: 任务 ID
+            offset: 该块在文件中的起始字节偏移
+            data: 块内容
+
+        Returns:
+            已接收的总字节数
+
+        Raises:
+            KeyError: 任务不存在
+            ValueError: 任务不在上传状态，或偏移与已接收字节数不一致（客户端应按返回值续传）
+        """
+        job = self._jobs[job_id]
+        async with self._upload_locks.setdefault(job_id, asyncio.Lock()):
+            if job["status"] != "uploading":
+                raise ValueError(f"任务已停止接收数据: {job['status']}")
+            if offset != job["uploaded_bytes"]:
+                raise ValueError(f"偏移不一致: 已接收 {job['uploaded_bytes']} 字节")
+
+            await asyncio.to_thread(self._write_chunk, job, offset, data)
+            return job["uploaded_bytes"]
+
+    def _write_chunk(self, job: dict, offset: int, data: bytes):
+        """写入数据块并保存任务状态"""
+        with open(self._upload_path(job), "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+        job["uploaded_bytes"] = offset + len(data)
+        self._save(job)
+
+    def _read_records(self, job: dict) -> Iterator[dict]:
+        """按格式逐条读取上传文件中的记录"""
+        path = self._upload_path(job)
+        if job["filename"].endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return itertools.chain(
+                ({**entity, "kind": "entity"} for entity in data.get("entities", [])),
+                ({**relation, "kind": "relation"} for relation in data.get("relations", [])),
+            )
+        return read_ndjson(path)
+
+    def start(self, job_id: str) -> dict:
+        """开始或续跑导入（从最后提交的批次之后继续）
+
+        Raises:
+            KeyError: 任务不存在
+            ValueError: 任务正在运行或已完成
+        """
+        job = self._jobs[job_id]
+        if job["status"] in ("running", "completed"):
+            raise ValueError(f"任务状态不允许启动: {job['status']}")
+
+        job["status"] = "running"
+        job["error"] = None
+        self._upload_locks.pop(job_id, None)
+        self._save(job)
+        self._tasks[job_id] = asyncio.create_task(self._run(job))
+        return {**job}
+
+    async def _run(self, job: dict):
+        """在后台执行导入，每批提交后保存进度"""
+        start = job["committed_records"]
+        base_stats = dict(job["stats"])
+        base_failed = job["failed_batches"]
+
+        def on_batch(progress: dict):
+            job["committed_records"] = start + progress["committed_records"]
+            # 只累加已提交记录的统计，续跑时重新写入的批次不会重复计数
+            job["stats"] = {
+                key: base_stats[key] + progress["committed_stats"][key] for key in self.STAT_KEYS
+            }
+            job["failed_batches"] = base_failed + progress["failed_chunks"]
+            self._save(job)
+
+        try:
+            records = itertools.islice(self._read_records(job), start, None)
+            await self.graph_store.bulk_import(records, job["merge"], progress={}, on_batch=on_batch)
+            job["status"] = "failed" if job["failed_batches"] > base_failed else "completed"
+            if job["status"] == "completed":
+                self._upload_path(job).unlink(missing_ok=True)
+        except asyncio.CancelledError:
+            job["status"] = "interrupted"
+            raise
+        except Exception as e:
+            logger.error(f"[GraphMemory] 导入任务 {job['id']} 失败: {e}", exc_info=True)
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            self._save(job)
+            self._tasks.pop(job["id"], None)
+
+    async def wait(self, job_id: str):
+        """等待任务的后台导入结束"""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def shutdown(self):
+        """取消正在运行的导入（状态保存为 interrupted，下次可续跑）"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
@@ -1,14 +1,23 @@
 """存储层
 
 包含:
+- cold_store: 归档实体冷存储
+- embedding_store: 实体向量旁路存储
 - graph_store: 图数据库存储
 - memory_buffer: 消息缓冲存储
+- verdict_cache: 实体合并判定缓存
 """
 
+from .cold_store import ColdStore
+from .embedding_store import EmbeddingStore
 from .graph_store import GraphStore
 from .memory_buffer import MemoryBuffer
+from .verdict_cache import MergeVerdictCache
 
 __all__ = [
+    "ColdStore",
+    "EmbeddingStore",
     "GraphStore",
     "MemoryBuffer",
+    "MergeVerdictCache",
 ]
@@ -0,0 +1,264 @@
+"""关系邻接表内存缓存模块"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+class AdjacencyCache:
+    """RELATED_TO 关系的内存邻接表
+
+    基础部分为压缩稀疏行（CSR）结构，节点、关系类型都编码为整数:
+    - 边数组: 起点、终点、关系类型编号、存储强度、衰减基准时间（秒）
+    - 无向关联表: indptr / 邻居 / 边编号，每条边在两个端点下各出现一次
+
+    写入不重建 CSR，而是记录在增量层（新增或更新的边、被删除的基础边）；
+    增量超过基础边数的 MERGE_RATIO 时再合并为新的 CSR。
+
+    注意: 所有方法都应在 GraphStore 的执行器线程中调用。
+    """
+
+    # 增量边数超过基础边数的该比例时合并
+    MERGE_RATIO = 0.1
+    # 增量边数低于该值时不合并
+    MIN_MERGE = 1024
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._names: list[str] = []
+        self._label_ids: dict[str, int] = {}
+        self._labels: list[str] = []
+        self._set_base(
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.int32),
+            np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.float64),
+        )
+
+    # ==================== 编码 ====================
+
+    def _node_id(self, name: str) -> int:
+        node = self._ids.get(name)
+        if node is None:
+            node = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return node
+
+    def _label_id(self, label: str) -> int:
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self._labels)
+            self._labels.append(label)
+        return label_id
+
+    @staticmethod
+    def _seconds(reference: datetime | None) -> float:
+        if reference is None:
+            return datetime.now(timezone.utc).timestamp()
+        if reference.tzinfo is None:
+            reference = reference.replace(tzinfo=timezone.utc)
+        return reference.timestamp()
+
+    # ==================== 构建 ====================
+
+    def _set_base(self, src, dst, label, strength, reference):
+        """设置基础边数组并构建 CSR，同时清空增量层"""
+        self._src, self._dst, self._label = src, dst, label
+        self._strength, self._reference = strength, reference
+        self._alive = np.ones(len(src), dtype=bool)
+
+        n = len(self._names)
+        heads = np.concatenate([src, dst])
+        order = np.argsort(heads, kind="stable")
+        self._indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=n), out=self._indptr[1:])
+        self._neighbors = np.concatenate([dst, src])[order]
+        self._edges = np.concatenate([np.arange(len(src)), np.arange(len(src))])[order]
+
+        # 增量层: (起点, 终点) -> (关系类型, 强度, 基准时间)
+        self._added: dict[tuple[int, int], tuple[int, float, float]] = {}
+        self._added_adjacency: dict[int, set[tuple[int, int]]] = {}
+
+    def rebuild(self, rows: list[tuple[str, str, str, float | None, datetime | None]]):
+        """从 (起点, 终点, 关系, 存储强度, 衰减基准时间) 列表重建"""
+        self._ids, self._names = {}, []
+        self._label_ids, self._labels = {}, []
+        src = np.array([self._node_id(row[0]) for row in rows], dtype=np.int64)
+        dst = np.array([self._node_id(row[1]) for row in rows], dtype=np.int64)
+        label = np.array([self._label_id(row[2] or "") for row in rows], dtype=np.int32)
+        strength = np.array([row[3] or 0.0 for row in rows], dtype=np.float32)
+        reference = np.array([self._seconds(row[4]) for row in rows], dtype=np.float64)
+        self._set_base(src, dst, label, strength, reference)
+
+    def _merge(self):
+        """把增量层合并进 CSR"""
+        keys = list(self._added)
+        values = [self._added[key] for key in keys]
+        alive = self._alive
+        self._set_base(
+            np.concatenate([self._src[alive], np.array([k[0] for k in keys], dtype=np.int64)]),
+            np.concatenate([self._dst[alive], np.array([k[1] for k in keys], dtype=np.int64)]),
+            np.concatenate([self._label[alive], np.array([v[0] for v in values], dtype=np.int32)]),
+            np.concatenate([self._strength[alive], np.array([v[1] for v in values], dtype=np.float32)]),
+            np.concatenate([self._reference[alive], np.array([v[2] for v in values], dtype=np.float64)]),
+        )
+
+    def _maybe_merge(self):
+        pending = len(self._added) + int((~self._alive).sum())
+        if pending >= max(self.MIN_MERGE, len(self._src) * self.MERGE_RATIO):
+            self._merge()
+
+    # ==================== 增量写入 ====================
+
+    def _base_edge(self, a: int, b: int) -> int | None:
+        """基础 CSR 中 a -> b 的边编号"""
+        if a >= len(self._indptr) - 1:
+            return None
+        row = slice(self._indptr[a], self._indptr[a + 1])
+        edges = self._edges[row][self._neighbors[row] == b]
+        for edge in edges.tolist():
+            if self._src[edge] == a and self._alive[edge]:
+                return edge
+        return None
+
+    def upsert_edge(
+        self,
+        from_name: str,
+        to_name: str,
+        relation: str,
+        strength: float | None,
+        reference: datetime | None,
+    ):
+        """新增或更新一条边"""
+        a, b = self._node_id(from_name), self._node_id(to_name)
+        edge = self._base_edge(a, b)
+        if edge is not None:
+            self._alive[edge] = False
+        self._added[(a, b)] = (self._label_id(relation or ""), strength or 0.0, self._seconds(reference))
+        self._added_adjacency.setdefault(a, set()).add((a, b))
+        self._added_adjacency.setdefault(b, set()).add((a, b))
+        self._maybe_merge()
+
+    def remove_edge(self, from_name: str, to_name: str):
+        """删除一条边"""
+        a, b = self._ids.get(from_name), self._ids.get(to_name)
+        if a is None or b is None:
+            return
+        edge = self._base_edge(a, b)
+        if edge is not None:
+            self._alive[edge] = False
+        if self._added.pop((a, b), None) is not None:
+            self._added_adjacency[a].discard((a, b))
+            self._added_adjacency[b].discard((a, b))
+        self._maybe_merge()
+
+    def remove_nodes(self, names: list[str]):
+        """删除节点的全部关联边"""
+        for name in names:
+            node = self._ids.get(name)
+            if node is None:
+                continue
+            if node < len(self._indptr) - 1:
+                self._alive[self._edges[self._indptr[node]:self._indptr[node + 1]]] = False
+            for key in self._added_adjacency.pop(node, set()):
+                self._added.pop(key, None)
+                other = key[1] if key[0] == node else key[0]
+                self._added_adjacency.get(other, set()).discard(key)
+        self._maybe_merge()
+
+    # ==================== 查询 ====================
+
+    def _incident(self, node: int) -> list[tuple[int, int, int, float, float]]:
+        """节点的全部关联边 [(起点, 终点, 关系类型, 强度, 基准时间)]"""
+        edges = []
+        if node < len(self._indptr) - 1:
+            # 自环边在同一行中出现两次
+            row = np.unique(self._edges[self._indptr[node]:self._indptr[node + 1]])
+            for edge in row[self._alive[row]].tolist():
+                edges.append((
+                    int(self._src[edge]),
+                    int(self._dst[edge]),
+                    int(self._label[edge]),
+                    float(self._strength[edge]),
+                    float(self._reference[edge]),
+                ))
+        for key in self._added_adjacency.get(node, ()):
+            label, strength, reference = self._added[key]
+            edges.append((key[0], key[1], label, strength, reference))
+        return edges
+
+    def _neighbor_ids(self, node: int) -> set[int]:
+        neighbors = set()
+        if node < len(self._indptr) - 1:
+            row = slice(self._indptr[node], self._indptr[node + 1])
+            neighbors.update(self._neighbors[row][self._alive[self._edges[row]]].tolist())
+        for a, b in self._added_adjacency.get(node, ()):
+            neighbors.add(b if a == node else a)
+        return neighbors
+
+    def bfs(self, sources: list[str], max_depth: int) -> dict[str, int]:
+        """广度优先遍历（无向）
+
+        Args:
+            sources: 起点名称
+            max_depth: 最大深度
+
+        Returns:
+            {节点名称: 距离}，包含距离为 0 的起点
+        """
+        distance = {self._ids[name]: 0 for name in sources if name in self._ids}
+        frontier = list(distance)
+        for depth in range(1, max_depth + 1):
+            next_frontier = []
+            for node in frontier:
+                for neighbor in self._neighbor_ids(node):
+                    if neighbor not in distance:
+                        distance[neighbor] = depth
+                        next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return {self._names[node]: d for node, d in distance.items()}
+
+    def edges_among(self, names: list[str]) -> list[tuple[str, str, str, float, float]]:
+        """两端都在 names 中的边 [(起点, 终点, 关系, 存储强度, 基准时间秒)]"""
+        nodes = {self._ids[name] for name in names if name in self._ids}
+        edges = []
+        for node in nodes:
+            for a, b, label, strength, reference in self._incident(node):
+                # 每条边只在起点处记录一次
+                if a == node and b in nodes:
+                    edges.append((self._names[a], self._names[b], self._labels[label], strength, reference))
+        return edges
+
+    def incident_edges(self, name: str) -> list[tuple[str, str, str, float, float]]:
+        """节点的全部关联边 [(起点, 终点, 关系, 存储强度, 基准时间秒)]"""
+        node = self._ids.get(name)
+        if node is None:
+            return []
+        return [
+            (self._names[a], self._names[b], self._labels[label], strength, reference)
+            for a, b, label, strength, reference in self._incident(node)
+        ]
+
+    def edge_arrays(self) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """全部当前边的数组形式
+
+        Returns:
+            (节点名称表, 起点编号, 终点编号, 存储强度, 基准时间秒)，编号为名称表中的下标
+        """
+        keys = list(self._added)
+        values = [self._added[key] for key in keys]
+        alive = self._alive
+        return (
+            list(self._names),
+            np.concatenate([self._src[alive], np.array([k[0] for k in keys], dtype=np.int64)]),
+            np.concatenate([self._dst[alive], np.array([k[1] for k in keys], dtype=np.int64)]),
+            np.concatenate([self._strength[alive], np.array([v[1] for v in values], dtype=np.float32)]),
+            np.concatenate([self._reference[alive], np.array([v[2] for v in values], dtype=np.float64)]),
+        )
+
+    def __len__(self) -> int:
+        """当前边数"""
+        return int(self._alive.sum()) + len(self._added)
@@ -0,0 +1,234 @@
+"""冷存储模块"""
+
+import json
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from astrbot.api import logger
+
+from ..utils import dequantize_int8, quantize_int8, to_normalized_matrix
+
+
+class ColdStore:
+    """冷存储
+
+    低重要性实体从热图谱中移出后归档到这里，而不是直接删除:
+    - SQLite 单文件存储，不参与热图谱的全表查询
+    - 向量按行量化为 int8（附缩放系数），约为 float32 的 1/4
+    - 关系和提及记录压缩为 zlib JSON
+
+    只在显式请求时检索；实体再次被提及时由 GraphStore 恢复到热图谱。
+    """
+
+    def __init__(self, data_path: Path):
+        self._db_path = data_path / "cold_archive.db"
+        self._init_db()
+        # 已归档的实体名称，用于写入路径上的快速判断
+        self._names: set[str] = self._load_names()
+
+    def _init_db(self):
+        """初始化 SQLite 数据库"""
+        with sqlite3.connect(self._db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archived_entities (
+                    name TEXT PRIMARY KEY,
+                    type TEXT,
+                    description TEXT,
+                    importance REAL NOT NULL,
+                    access_count INTEGER NOT NULL DEFAULT 0,
+                    embedding BLOB,
+                    embedding_scale REAL,
+                    payload BLOB NOT NULL,
+                    archived_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            logger.debug("[GraphMemory] 冷存储初始化完成")
+
+    def _load_names(self) -> set[str]:
+        with sqlite3.connect(self._db_path) as conn:
+            return {row[0] for row in conn.execute("SELECT name FROM archived_entities")}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def archive_many(self, records: list[dict]):
+        """归档实体
+
+        Args:
+            records: 实体记录列表，包含 name, type, description, importance,
+                     access_count, created_at, embedding, relations, mentions
+        """
+        if not records:
+            return
+
+        rows = []
+        now = time.time()
+        for record in records:
+            embedding_blob, scale = None, None
+            embedding = record.get("embedding")
+            if embedding is not None and any(embedding):
+                codes, scales = quantize_int8(np.asarray([embedding], dtype=np.float32))
+                embedding_blob, scale = codes[0].tobytes(), float(scales[0])
+
+            payload = zlib.compress(json.dumps({
+                "created_at": record.get("created_at"),
+                "relations": record.get("relations", []),
+                "mentions": record.get("mentions", []),
+            }, ensure_ascii=False, default=str).encode("utf-8"))
+
+            rows.append((
+                record["name"],
+                record.get("type", ""),
+                record.get("description", ""),
+                record.get("importance", 0.0),
+                record.get("access_count", 0),
+                embedding_blob,
+                scale,
+                payload,
+                now,
+            ))
+
+        with sqlite3.connect(self._db_path) as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO archived_entities
+                (name, type, description, importance, access_count,
+                 embedding, embedding_scale, payload, archived_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            conn.commit()
+        self._names.update(record["name"] for record in records)
+
+    def get(self, name: str) -> dict | None:
+        """读取完整的归档记录（含还原后的向量、关系和提及记录）"""
+        if name not in self._names:
+            return None
+
+        with sqlite3.connect(self._db_path) as conn:
+            row = conn.execute(
+                """
+                SELECT name, type, description, importance, access_count,
+                       embedding, embedding_scale, payload, archived_at
+                FROM archived_entities WHERE name = ?
+                """,
+                (name,),
+            ).fetchone()
+        if not row:
+            return None
+
+        name, entity_type, description, importance, access_count, blob, scale, payload, archived_at = row
+        embedding = None
+        if blob is not None:
+            codes = np.frombuffer(blob, dtype=np.int8)[None, :]
+            embedding = dequantize_int8(codes, np.array([scale]))[0].tolist()
+
+        return {
+            "name": name,
+            "type": entity_type,
+            "description": description,
+            "importance": importance,
+            "access_count": access_count,
+            "embedding": embedding,
+            "archived_at": archived_at,
+            **json.loads(zlib.decompress(payload).decode("utf-8")),
+        }
+
+    def remove(self, name: str):
+        """删除归档记录"""
+        with sqlite3.connect(self._db_path) as conn:
+            conn.execute("DELETE FROM archived_entities WHERE name = ?", (name,))
+            conn.commit()
+        self._names.discard(name)
+
+    def remove_many(self, names: list[str]):
+        """批量删除归档记录（如撤销一次失败的清理）"""
+        if not names:
+            return
+        with sqlite3.connect(self._db_path) as conn:
+            conn.executemany("DELETE FROM archived_entities WHERE name = ?", [(name,) for name in names])
+            conn.commit()
+        self._names.difference_update(names)
+
+    def search(
+        self,
+        query: str,
+        query_embedding: list[float] | None = None,
+        limit: int = 5,
+    ) -> list[dict]:
+        """检索归档实体
+
+        名称/描述包含关键词的实体得到固定分数（名称 0.8，描述 0.6），
+        提供查询向量时再与量化向量的余弦相似度取较大值。
+
+        Args:
+            query: 查询关键词
+            query_embedding: 查询向量（可选）
+            limit: 返回数量
+
+        Returns:
+            [{name, type, description, importance, archived_at, score}]
+        """
+        if not self._names:
+            return []
+
+        scores: dict[str, float] = {}
+        entities: dict[str, dict] = {}
+
+        with sqlite3.connect(self._db_path) as conn:
+            pattern = f"%{query}%"
+            for name, entity_type, description, importance, archived_at in conn.execute(
+                """
+                SELECT name, type, description, importance, archived_at
+                FROM archived_entities
+                WHERE name LIKE ? OR description LIKE ?
+                """,
+                (pattern, pattern),
+            ):
+                entities[name] = {
+                    "name": name,
+                    "type": entity_type,
+                    "description": description,
+                    "importance": importance,
+                    "archived_at": archived_at,
+                }
+                scores[name] = 0.8 if query in name else 0.6
+
+            if query_embedding is not None:
+                rows = conn.execute(
+                    """
+                    SELECT name, type, description, importance, archived_at,
+                           embedding, embedding_scale
+                    FROM archived_entities WHERE embedding IS NOT NULL
+                    """
+                ).fetchall()
+                if rows:
+                    codes = np.stack([np.frombuffer(row[5], dtype=np.int8) for row in rows])
+                    matrix, _ = to_normalized_matrix(
+                        dequantize_int8(codes, np.array([row[6] for row in rows]))
+                    )
+                    query_matrix, valid = to_normalized_matrix([query_embedding])
+                    if valid[0] and query_matrix.shape[1] == matrix.shape[1]:
+                        similarities = matrix @ query_matrix[0]
+                        for pos in np.argsort(-similarities)[:limit].tolist():
+                            name, entity_type, description, importance, archived_at = rows[pos][:5]
+                            entities.setdefault(name, {
+                                "name": name,
+                                "type": entity_type,
+                                "description": description,
+                                "importance": importance,
+                                "archived_at": archived_at,
+                            })
+                            scores[name] = max(scores.get(name, 0.0), float(similarities[pos]))
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{**entities[name], "score": score} for name, score in ranked]
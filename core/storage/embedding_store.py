@@ -0,0 +1,357 @@
+"""实体向量旁路存储模块"""
+
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+from astrbot.api import logger
+
+from ..utils import search_top_k, to_normalized_matrix
+
+
+class RowView:
+    """向量矩阵中一组行的只读视图
+
+    按需从内存映射矩阵中取出行（行号为 -1 时返回零向量），
+    可以像向量列表一样切片，也可以用 np.asarray() 转换为矩阵。
+    """
+
+    def __init__(self, matrix: np.ndarray, rows: np.ndarray):
+        self.matrix = matrix
+        self.rows = np.asarray(rows, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index) -> np.ndarray:
+        rows = self.rows[index]
+        if np.isscalar(rows):
+            return self.matrix[rows] if rows >= 0 else np.zeros(self.matrix.shape[1], dtype=np.float32)
+        block = self.matrix[np.maximum(rows, 0)]
+        block[rows < 0] = 0.0
+        return block
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        block = self[:]
+        return block if dtype is None else block.astype(dtype, copy=False)
+
+
+class EmbeddingStore:
+    """实体向量旁路存储
+
+    向量以归一化的 float32 矩阵保存在内存映射文件中，名称与行号的对应关系保存在 SQLite:
+    - 写入只追加新行；旧行置零并标记为墓碑，正在读取旧快照的线程不受影响
+    - 删除只标记墓碑，墓碑过多时由 compact() 重写文件
+    - 相似度计算直接在内存映射矩阵上分块进行，无需经过 Kuzu 结果迭代器
+
+    扩容、压缩和重建都写入新一代文件（vectors.N.f32）后再切换，从不截断或替换仍被映射的文件
+    （Windows 不允许修改已映射的文件）；旧文件在没有读取方后删除，删除失败的在下次启动时清理。
+
+    注意: 写入方法应在 GraphStore 的执行器线程中调用。
+    """
+
+    # 文件扩容的最小行数
+    MIN_GROWTH = 1024
+
+    # 初始的向量文件名（之后各代为 vectors.N.f32）
+    BASE_FILE = "vectors.f32"
+
+    def __init__(self, path: Path, dim: int):
+        self.dim = dim
+        path.mkdir(parents=True, exist_ok=True)
+        self._dir = path
+        self._matrix_path = path / self.BASE_FILE
+        self._db_path = path / "rows.db"
+        self._generation = 0
+
+        # 行号 -> 名称（墓碑为 None），名称 -> 行号，行号 -> 是否有效
+        self._names: list[str | None] = []
+        self._row_of: dict[str, int] = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._matrix: np.ndarray | None = None
+        # 供执行器线程之外的检索使用的 (矩阵, 行名称, 行掩码) 快照，整体替换
+        self._snapshot: tuple[np.ndarray, list[str | None], np.ndarray] | None = None
+
+        self._init_db()
+        self._load()
+
+    def _init_db(self):
+        """初始化 SQLite 数据库，向量维度变化时清空旧数据"""
+        with sqlite3.connect(self._db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_rows (
+                    row INTEGER PRIMARY KEY,
+                    name TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+            row = conn.execute("SELECT value FROM embedding_meta WHERE key = 'dim'").fetchone()
+            if row is None or int(row[0]) != self.dim:
+                if row is not None:
+                    logger.warning(
+                        f"[GraphMemory] 向量维度变化 ({row[0]} -> {self.dim})，重建向量存储"
+                    )
+                conn.execute("DELETE FROM embedding_rows")
+                conn.execute("DELETE FROM embedding_meta WHERE key = 'file'")
+                conn.execute(
+                    "INSERT OR REPLACE INTO embedding_meta (key, value) VALUES ('dim', ?)",
+                    (str(self.dim),),
+                )
+                # 启动时还没有映射，可以直接删除
+                for stale in self._dir.glob("vectors*.f32"):
+                    stale.unlink(missing_ok=True)
+            conn.commit()
+
+    def _load(self):
+        """加载行号表并映射当前一代的向量文件，清理遗留的旧文件"""
+        with sqlite3.connect(self._db_path) as conn:
+            rows = conn.execute("SELECT row, name FROM embedding_rows ORDER BY row").fetchall()
+            file = conn.execute("SELECT value FROM embedding_meta WHERE key = 'file'").fetchone()
+
+        count = rows[-1][0] + 1 if rows else 0
+        self._names = [None] * count
+        for row, name in rows:
+            self._names[row] = name
+            if name is not None:
+                self._row_of[name] = row
+
+        self._matrix_path = self._dir / (file[0] if file else self.BASE_FILE)
+        suffix = self._matrix_path.suffixes[0][1:] if len(self._matrix_path.suffixes) > 1 else "0"
+        self._generation = int(suffix) if suffix.isdigit() else 0
+
+        # 文件缺失或不足时补零（启动时还没有映射，可以直接扩展）
+        row_bytes = self.dim * 4
+        size = self._matrix_path.stat().st_size if self._matrix_path.exists() else 0
+        capacity = max(size // row_bytes, count, self.MIN_GROWTH)
+        if size < capacity * row_bytes:
+            with open(self._matrix_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._live = self._live_mask(capacity)
+        self._publish()
+
+        for stale in [*self._dir.glob("vectors*.f32"), *self._dir.glob("vectors*.tmp")]:
+            if stale != self._matrix_path:
+                self._discard(stale)
+
+    def _live_mask(self, capacity: int) -> np.ndarray:
+        """按当前行名称生成有效行掩码"""
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._names)] = [name is not None for name in self._names]
+        return live
+
+    def _publish(self):
+        """发布新的检索快照"""
+        self._snapshot = (self._matrix, self._names, self._live)
+
+    def _new_file(self, capacity: int) -> tuple[Path, np.ndarray]:
+        """创建下一代向量文件并映射"""
+        self._generation += 1
+        path = self._dir / f"vectors.{self._generation}.f32"
+        with open(path, "wb") as f:
+            f.truncate(capacity * self.dim * 4)
+        return path, np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _switch(self, path: Path, matrix: np.ndarray):
+        """切换到新一代文件，释放旧映射并删除旧文件"""
+        old_path = self._matrix_path
+        self._matrix_path = path
+        self._matrix = matrix
+        self._publish()
+        if old_path != path:
+            self._discard(old_path)
+
+    def _discard(self, path: Path):
+        """删除不再使用的向量文件；仍被读取方映射时（Windows）留待下次启动清理"""
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.debug(f"[GraphMemory] 暂时无法删除旧向量文件 {path.name}: {e}")
+
+    def _grow(self, min_rows: int):
+        """扩容: 把现有行复制到容量更大的新一代文件"""
+        capacity = max(min_rows, len(self._matrix) * 2, self.MIN_GROWTH)
+        path, matrix = self._new_file(capacity)
+        count = len(self._names)
+        for start in range(0, count, self.MIN_GROWTH):
+            end = min(start + self.MIN_GROWTH, count)
+            matrix[start:end] = self._matrix[start:end]
+        matrix.flush()
+
+        with sqlite3.connect(self._db_path) as conn:
+            conn.execute("INSERT OR REPLACE INTO embedding_meta (key, value) VALUES ('file', ?)", (path.name,))
+            conn.commit()
+
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._live)] = self._live
+        self._live = live
+        self._switch(path, matrix)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """当前全部行（含墓碑行，值为 0）的只读快照视图"""
+        return self._matrix[:len(self._names)]
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._row_of
+
+    @property
+    def tombstones(self) -> int:
+        return len(self._names) - len(self._row_of)
+
+    def rows_for(self, names: list[str]) -> np.ndarray:
+        """名称对应的行号（不存在为 -1）"""
+        return np.array([self._row_of.get(name, -1) for name in names], dtype=np.int64)
+
+    def name_of(self, row: int) -> str | None:
+        """行号对应的名称（墓碑为 None）"""
+        return self._names[row] if 0 <= row < len(self._names) else None
+
+    def upsert_many(self, items: list[tuple[str, list[float]]]):
+        """写入向量
+
+        向量未变化时跳过；否则追加新行，并把旧行标记为墓碑。
+
+        Args:
+            items: [(名称, 向量)]
+        """
+        items = [(name, vector) for name, vector in dict(items).items() if vector is not None]
+        if not items:
+            return
+
+        vectors, _ = to_normalized_matrix([vector for _, vector in items])
+        if vectors.shape[1] != self.dim:
+            logger.warning(f"[GraphMemory] 向量维度不匹配，跳过写入: {vectors.shape[1]} != {self.dim}")
+            return
+
+        appended, dead = [], []
+        for (name, _), vector in zip(items, vectors):
+            old = self._row_of.get(name)
+            if old is not None and np.array_equal(self._matrix[old], vector):
+                continue
+            if old is not None:
+                dead.append(old)
+            appended.append((name, vector))
+
+        if not appended:
+            return
+
+        start = len(self._names)
+        end = start + len(appended)
+        if end > len(self._matrix):
+            self._grow(end)
+        self._matrix[start:end] = np.stack([vector for _, vector in appended])
+        for row in dead:
+            self._matrix[row] = 0.0
+        self._matrix.flush()
+
+        with sqlite3.connect(self._db_path) as conn:
+            conn.executemany("UPDATE embedding_rows SET name = NULL WHERE row = ?", [(row,) for row in dead])
+            conn.executemany(
+                "INSERT INTO embedding_rows (row, name) VALUES (?, ?)",
+                [(start + i, name) for i, (name, _) in enumerate(appended)],
+            )
+            conn.commit()
+
+        for row in dead:
+            self._names[row] = None
+            self._live[row] = False
+        for i, (name, _) in enumerate(appended):
+            self._names.append(name)
+            self._row_of[name] = start + i
+        self._live[start:end] = True
+
+    def remove(self, names: list[str]):
+        """删除向量（标记墓碑）"""
+        dead = [self._row_of.pop(name) for name in names if name in self._row_of]
+        if not dead:
+            return
+
+        for row in dead:
+            self._matrix[row] = 0.0
+            self._names[row] = None
+            self._live[row] = False
+        self._matrix.flush()
+
+        with sqlite3.connect(self._db_path) as conn:
+            conn.executemany("UPDATE embedding_rows SET name = NULL WHERE row = ?", [(row,) for row in dead])
+            conn.commit()
+
+    def rebuild(self, items: list[tuple[str, list[float]]]):
+        """清空后重新写入全部向量"""
+        path, matrix = self._new_file(max(len(items), self.MIN_GROWTH))
+        with sqlite3.connect(self._db_path) as conn:
+            conn.execute("DELETE FROM embedding_rows")
+            conn.execute("INSERT OR REPLACE INTO embedding_meta (key, value) VALUES ('file', ?)", (path.name,))
+            conn.commit()
+        self._names = []
+        self._row_of = {}
+        self._live = np.zeros(len(matrix), dtype=bool)
+        self._switch(path, matrix)
+        self.upsert_many(items)
+
+    def compact(self):
+        """去掉墓碑行，写入新一代向量文件
+
+        已持有旧快照的读取方继续读取旧文件。
+        """
+        live = sorted(self._row_of.items(), key=lambda item: item[1])
+        path, compacted = self._new_file(max(len(live), self.MIN_GROWTH))
+        for start in range(0, len(live), self.MIN_GROWTH):
+            rows = [row for _, row in live[start:start + self.MIN_GROWTH]]
+            compacted[start:start + len(rows)] = self._matrix[rows]
+        compacted.flush()
+
+        # 行号表和当前文件名在同一事务中切换
+        with sqlite3.connect(self._db_path) as conn:
+            conn.execute("DELETE FROM embedding_rows")
+            conn.executemany(
+                "INSERT INTO embedding_rows (row, name) VALUES (?, ?)",
+                [(row, name) for row, (name, _) in enumerate(live)],
+            )
+            conn.execute("INSERT OR REPLACE INTO embedding_meta (key, value) VALUES ('file', ?)", (path.name,))
+            conn.commit()
+
+        self._names = [name for name, _ in live]
+        self._row_of = {name: row for row, name in enumerate(self._names)}
+        self._live = self._live_mask(len(compacted))
+        self._switch(path, compacted)
+        logger.info(f"[GraphMemory] 向量存储压缩完成，保留 {len(live)} 行")
+
+    def search(
+        self,
+        query_embedding: list[float],
+        top_k: int,
+        min_similarity: float = -1.0,
+    ) -> list[tuple[str, float]]:
+        """在内存映射矩阵上检索最相似的实体
+
+        只读取调用时发布的 (矩阵, 行名称, 行掩码) 快照，可以在执行器线程之外调用，
+        与同时进行的压缩互不影响。
+
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回数量
+            min_similarity: 最小相似度
+
+        Returns:
+            [(实体名称, 相似度)]，按相似度降序
+        """
+        matrix, names, live = self._snapshot
+        # 扩容前的旧快照中，行名称可能已追加到矩阵容量之外
+        count = min(len(names), len(matrix))
+        results = []
+        for row, similarity in search_top_k(matrix[:count], query_embedding, top_k, mask=live[:count]):
+            name = names[row]
+            if name is not None and similarity >= min_similarity:
+                results.append((name, similarity))
+        return results
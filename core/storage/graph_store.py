@@ -1,13 +1,22 @@
 """图数据库存储模块"""
 
 import asyncio
+import csv
 import functools
+import itertools
+import tempfile
+import time
+import uuid
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from collections.abc import AsyncIterator, Callable, Iterable
 from pathlib import Path
 from typing import Any
 
 import kuzu
+import numpy as np
 
 from astrbot.api import logger
 
@@ -19,6 +28,11 @@ from ..models import (
     get_embedding_dim_from_provider,
     initialize_schema,
 )
+from ..utils import force_layout, iter_ndjson, label_propagation
+from .adjacency_cache import AdjacencyCache
+from .cold_store import ColdStore
+from .embedding_store import EmbeddingStore
+from .importance_index import ImportanceIndex
 
 
 class GraphStore:
@@ -30,7 +44,38 @@ class GraphStore:
     - 执行图查询
     """
 
-    def __init__(self, db_path: Path, embedding_provider: Any | None = None):
+    # 实体节点的标量列（不含 embedding），列表、详情和图谱查询只读取这些列
+    ENTITY_COLUMNS = (
+        "name",
+        "type",
+        "description",
+        "importance",
+        "last_decay_reference",
+        "created_at",
+        "last_accessed",
+        "access_count",
+    )
+    # RELATED_TO 关系的列
+    RELATION_COLUMNS = (
+        "relation",
+        "strength",
+        "last_decay_reference",
+        "evidence",
+        "created_at",
+        "last_updated",
+    )
+
+    def __init__(
+        self,
+        db_path: Path,
+        embedding_provider: Any | None = None,
+        decay_rate: float = 0.95,
+        decay_interval: float = 3600,
+        chunk_size: int = 1000,
+        chunk_pause: float = 0.05,
+        cold_store: ColdStore | None = None,
+        layout_max_nodes: int = 1000,
+    ):
         # 如果路径已经以 kuzu_db_v3 结尾，直接使用；否则添加
         if db_path.name == "kuzu_db_v3":
             self.db_path = db_path
@@ -43,6 +88,20 @@ class GraphStore:
         self.embedding_provider = embedding_provider
         self.embedding_dim = get_embedding_dim_from_provider(embedding_provider)
 
+        # 时间衰减参数: 每经过 decay_interval 秒，重要性和关系强度乘以 decay_rate。
+        # 存储值对应 last_decay_reference 时刻，读取时再按经过的时间计算有效值
+        self._decay_rate = decay_rate
+        self._decay_interval = decay_interval
+
+        # 维护任务分块参数: 每块处理的实体数（按内部节点偏移划分），以及块之间的让出时间
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_pause = chunk_pause
+        # 维护任务进度 {任务名: 进度信息}
+        self.maintenance_progress: dict[str, dict] = {}
+
+        # 冷存储: 清理时归档实体而不是直接删除，再次被提及时恢复
+        self.cold_store = cold_store
+
         # 初始化数据库
         self.db = kuzu.Database(str(self.db_path))
         self.conn = kuzu.Connection(self.db)
@@ -50,6 +109,37 @@ class GraphStore:
         # 初始化 Schema
         initialize_schema(self.db, self.conn, self.embedding_dim)
 
+        # 实体别名表（合并后的旧名称 -> 保留的实体名称）
+        self._aliases: dict[str, str] = self._load_aliases()
+
+        # 实体向量旁路存储（内存映射矩阵），供相似度计算直接使用
+        self.embeddings = EmbeddingStore(self.db_path.parent / "embeddings", self.embedding_dim)
+        self._sync_embedding_store()
+
+        # 按有效重要性排序的实体索引，用于清理和 top-N 查询
+        self._importance_index = ImportanceIndex(decay_rate, decay_interval)
+        self._importance_index_stale = True
+        self._get_importance_index()
+
+        # RELATED_TO 邻接表缓存，用于邻居遍历和关系查询
+        self._adjacency = AdjacencyCache()
+        self._adjacency_stale = True
+
+        # 社区划分缓存（全局图谱分层显示），只在维护周期之间失效，见 invalidate_communities
+        self._communities: dict | None = None
+        self._communities_version = 0
+        self._communities_lock = asyncio.Lock()
+
+        # 全局图谱布局坐标缓存: 只为有效重要性最高的 layout_max_nodes 个实体计算
+        self.layout_max_nodes = layout_max_nodes
+        self._layout: dict[str, tuple[float, float]] = {}
+        self._layout_lock = asyncio.Lock()
+        self._layout_task: asyncio.Task | None = None
+
+        # 统计缓存: 影响统计结果的写入（增删节点或关系）使写入代数加一，缓存随之失效
+        self._write_generation = 0
+        self._stats_cache: dict[str, tuple[int, float, Any]] = {}
+
         # 单线程执行器，确保线程安全
         self._executor = ThreadPoolExecutor(max_workers=1)
 
@@ -67,6 +157,649 @@ class GraphStore:
         partial_func = functools.partial(func, *args, **kwargs)
         return await loop.run_in_executor(self._executor, partial_func)
 
+    @contextmanager
+    def _transaction(self):
+        """在显式事务中执行多条语句（需在执行器线程中调用）"""
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            yield
+        except Exception:
+            try:
+                self.conn.execute("ROLLBACK")
+            except Exception:
+                # 语句出错时 KuzuDB 已自动回滚
+                pass
+            raise
+        else:
+            self.conn.execute("COMMIT")
+
+    def _load_aliases(self) -> dict[str, str]:
+        """加载实体别名表"""
+        aliases = {}
+        try:
+            result = self.conn.execute("MATCH (a:EntityAlias) RETURN a.alias, a.canonical")
+            while result.has_next():
+                alias, canonical = result.get_next()
+                aliases[alias] = canonical
+        except Exception as e:
+            logger.warning(f"[GraphMemory] 加载实体别名失败: {e}")
+        return aliases
+
+    def resolve_name(self, name: str) -> str:
+        """将合并前的旧名称解析为当前的实体名称"""
+        return self._aliases.get(name, name)
+
+    # ==================== 时间衰减 ====================
+
+    @property
+    def decay_rate(self) -> float:
+        return self._decay_rate
+
+    @decay_rate.setter
+    def decay_rate(self, value: float):
+        # 衰减参数变化后重要性索引的排序键失效
+        self._decay_rate = value
+        self._importance_index_stale = True
+
+    @property
+    def decay_interval(self) -> float:
+        return self._decay_interval
+
+    @decay_interval.setter
+    def decay_interval(self, value: float):
+        self._decay_interval = value
+        self._importance_index_stale = True
+
+    def decay_expr(self, value: str, reference: str) -> str:
+        """生成计算衰减后有效值的 Cypher 表达式
+
+        有效值 = value * decay_rate ^ (经过时间 / decay_interval)，
+        查询时需要同时传入 decay_params() 返回的参数。
+
+        Args:
+            value: 存储值表达式，如 "e.importance"
+            reference: 衰减基准时间表达式，如 "e.last_decay_reference"
+
+        Returns:
+            Cypher 表达式
+        """
+        return (
+            f"({value} * pow($decay_rate, "
+            f"($decay_now_ms - coalesce(to_epoch_ms({reference}), $decay_now_ms)) "
+            f"/ $decay_interval_ms))"
+        )
+
+    def decay_key_expr(self, value: str, reference: str) -> str:
+        """生成与有效值同序、但不随时间变化的排序键 Cypher 表达式
+
+        排序键 = ln(value) - 基准时间 / decay_interval * ln(decay_rate)，
+        与 ImportanceIndex 的排序键相同，可用作游标分页的键。
+        查询时需要同时传入 decay_params() 返回的参数。
+
+        Args:
+            value: 存储值表达式，如 "e.importance"
+            reference: 衰减基准时间表达式，如 "e.last_decay_reference"
+
+        Returns:
+            Cypher 表达式
+        """
+        return (
+            f"(CASE WHEN {value} > 0 THEN ln({value}) - "
+            f"coalesce(to_epoch_ms({reference}), $decay_now_ms) / $decay_interval_ms * ln($decay_rate) "
+            f"ELSE -1.0e308 END)"
+        )
+
+    def decay_params(self) -> dict:
+        """decay_expr() 所需的查询参数"""
+        return {
+            "decay_rate": self.decay_rate,
+            "decay_now_ms": int(datetime.now(timezone.utc).timestamp() * 1000),
+            "decay_interval_ms": float(self.decay_interval * 1000),
+        }
+
+    def effective_value(self, value: float | None, reference: datetime | None) -> float:
+        """在 Python 侧计算衰减后的有效值
+
+        Args:
+            value: 存储值
+            reference: 衰减基准时间（KuzuDB 返回的无时区时间按 UTC 处理）
+
+        Returns:
+            有效值
+        """
+        if value is None:
+            return 0.0
+        if reference is None:
+            return value
+        if reference.tzinfo is None:
+            reference = reference.replace(tzinfo=timezone.utc)
+        elapsed = (datetime.now(timezone.utc) - reference).total_seconds()
+        return value * self.decay_rate ** (max(elapsed, 0.0) / self.decay_interval)
+
+    def effective_importance(self, entity: dict) -> float:
+        """计算实体节点的有效重要性"""
+        return self.effective_value(
+            entity.get("importance", 1.0), entity.get("last_decay_reference")
+        )
+
+    # ==================== 重要性索引 ====================
+
+    def _get_importance_index(self) -> ImportanceIndex:
+        """获取重要性索引，失效时从数据库重建（需在执行器线程中调用）"""
+        if self._importance_index_stale:
+            result = self.conn.execute(
+                "MATCH (e:Entity) RETURN e.name, e.importance, e.last_decay_reference"
+            )
+            rows = []
+            while result.has_next():
+                rows.append(result.get_next())
+            self._importance_index = ImportanceIndex(self.decay_rate, self.decay_interval)
+            self._importance_index.rebuild(rows)
+            self._importance_index_stale = False
+        return self._importance_index
+
+    def _index_entities(self, names: list[str]):
+        """从数据库读取实体的当前重要性并更新索引（需在执行器线程中调用）"""
+        if self._importance_index_stale or not names:
+            return
+        result = self.conn.execute(
+            """
+            MATCH (e:Entity) WHERE e.name IN $names
+            RETURN e.name, e.importance, e.last_decay_reference
+            """,
+            {"names": names},
+        )
+        while result.has_next():
+            self._importance_index.update(*result.get_next())
+
+    def _unindex_entities(self, names: list[str]):
+        """从索引中移除实体（需在执行器线程中调用）"""
+        for name in names:
+            self._importance_index.remove(name)
+
+    # ==================== 邻接表缓存 ====================
+
+    def _get_adjacency(self) -> AdjacencyCache:
+        """获取关系邻接表，失效时从数据库重建（需在执行器线程中调用）"""
+        if self._adjacency_stale:
+            result = self.conn.execute(
+                """
+                MATCH (a:Entity)-[r:RELATED_TO]->(b:Entity)
+                RETURN a.name, b.name, r.relation, r.strength, r.last_decay_reference
+                """
+            )
+            rows = []
+            while result.has_next():
+                rows.append(result.get_next())
+            self._adjacency.rebuild(rows)
+            self._adjacency_stale = False
+        return self._adjacency
+
+    def _effective_strength_at(self, strength: float, reference: float, now: float) -> float:
+        """按基准时间（秒）计算关系的有效强度"""
+        return strength * self.decay_rate ** (max(now - reference, 0.0) / self.decay_interval)
+
+    async def bfs(self, sources: list[str], max_depth: int) -> dict[str, int]:
+        """在邻接表上做无向广度优先遍历
+
+        Args:
+            sources: 起点实体名称
+            max_depth: 最大深度
+
+        Returns:
+            {实体名称: 距离}，包含距离为 0 的起点
+        """
+        sources = [self.resolve_name(name) for name in sources]
+
+        def _bfs():
+            try:
+                return self._get_adjacency().bfs(sources, max_depth)
+            except Exception as e:
+                logger.error(f"[GraphMemory] 邻居遍历失败: {e}", exc_info=True)
+                return {}
+
+        return await self._execute_in_thread(_bfs)
+
+    async def k_hop_neighbors(self, name: str, k: int = 1, limit: int = 20) -> list[tuple[str, int]]:
+        """获取 k 跳以内的邻居
+
+        Args:
+            name: 中心实体名称
+            k: 最大跳数
+            limit: 返回数量
+
+        Returns:
+            [(实体名称, 距离)]，按距离升序、有效重要性降序
+        """
+        name = self.resolve_name(name)
+
+        def _neighbors():
+            try:
+                distance = self._get_adjacency().bfs([name], k)
+                distance.pop(name, None)
+                index = self._get_importance_index()
+                ranked = sorted(distance.items(), key=lambda item: (item[1], -index.key_of(item[0])))
+                return ranked[:limit]
+            except Exception as e:
+                logger.error(f"[GraphMemory] 获取邻居失败: {e}", exc_info=True)
+                return []
+
+        return await self._execute_in_thread(_neighbors)
+
+    async def ego_network(
+        self,
+        centers: list[str],
+        depth: int = 1,
+        max_nodes: int | None = 50,
+    ) -> tuple[dict[str, int], list[dict]]:
+        """获取中心实体周围的子图
+
+        Args:
+            centers: 中心实体名称
+            depth: 遍历深度
+            max_nodes: 最多返回的节点数（按距离截断，None 表示不限制）
+
+        Returns:
+            ({实体名称: 距离}, 子图内的关系列表)
+        """
+        centers = [self.resolve_name(name) for name in centers]
+
+        def _ego():
+            try:
+                adjacency = self._get_adjacency()
+                distance = adjacency.bfs(centers, depth)
+                nodes = dict(sorted(distance.items(), key=lambda item: item[1])[:max_nodes])
+                now = datetime.now(timezone.utc).timestamp()
+                edges = [
+                    {
+                        "from": a,
+                        "to": b,
+                        "relation": relation,
+                        "strength": self._effective_strength_at(strength, reference, now),
+                    }
+                    for a, b, relation, strength, reference in adjacency.edges_among(list(nodes))
+                ]
+                return nodes, edges
+            except Exception as e:
+                logger.error(f"[GraphMemory] 获取子图失败: {e}", exc_info=True)
+                return {}, []
+
+        return await self._execute_in_thread(_ego)
+
+    def strongest_edges(self, names: list[str], per_node: int) -> list[tuple[str, str, str, float]]:
+        """每个实体有效强度最高的若干条关联边（需在执行器线程中调用）
+
+        在邻接表上按度数读取，不扫描关系表；两端都在 names 中的边只返回一次。
+
+        Args:
+            names: 实体名称
+            per_node: 每个实体最多返回的边数
+
+        Returns:
+            [(起点, 终点, 关系, 有效强度)]
+        """
+        adjacency = self._get_adjacency()
+        now = datetime.now(timezone.utc).timestamp()
+        edges: dict[tuple[str, str], tuple[str, float]] = {}
+        for name in names:
+            incident = [
+                (a, b, relation, self._effective_strength_at(strength, reference, now))
+                for a, b, relation, strength, reference in adjacency.incident_edges(name)
+            ]
+            incident.sort(key=lambda edge: edge[3], reverse=True)
+            for a, b, relation, weight in incident[:per_node]:
+                edges[(a, b)] = (relation, weight)
+        return [(a, b, relation, weight) for (a, b), (relation, weight) in edges.items()]
+
+    # ==================== 社区划分 ====================
+
+    def invalidate_communities(self):
+        """使社区划分缓存失效，下次查询时重新计算"""
+        self._communities = None
+        self._communities_version += 1
+
+    async def _get_communities(self) -> dict:
+        """获取社区划分，未缓存时重新计算
+
+        执行器线程中只读取邻接表的边数组、实体类型和重要性排序键，
+        标签传播和社区汇总在线程池中进行，不占用数据库执行器。
+        """
+        async with self._communities_lock:
+            if self._communities is not None:
+                return self._communities
+            version = self._communities_version
+
+            def _snapshot():
+                edges = self._get_adjacency().edge_arrays()
+                result = self.conn.execute("MATCH (e:Entity) RETURN e.name, e.type")
+                types = {}
+                while result.has_next():
+                    name, entity_type = result.get_next()
+                    types[name] = entity_type or ""
+                index = self._get_importance_index()
+                return edges, types, {name: index.key_of(name) for name in types}
+
+            edges, types, keys = await self._execute_in_thread(_snapshot)
+            communities = await asyncio.to_thread(self._compute_communities, edges, types, keys)
+            # 计算期间缓存被置为失效时，结果只用于本次请求
+            if version == self._communities_version:
+                self._communities = communities
+            return communities
+
+    def _compute_communities(self, edges: tuple, types: dict[str, str], keys: dict[str, float]) -> dict:
+        """在邻接表的边数组上做标签传播，划分社区
+
+        有关系的实体按标签传播划分社区；没有关系的实体按类型归为一组。
+        社区按规模降序编号（0 为最大的社区），成员按有效重要性降序排列。
+
+        Args:
+            edges: AdjacencyCache.edge_arrays() 的返回值
+            types: {实体名称: 类型}
+            keys: {实体名称: 重要性排序键}
+
+        Returns:
+            {"computed_at", "clusters", "assignment", "links"}
+        """
+        names, src, dst, strength, reference = edges
+        now = datetime.now(timezone.utc).timestamp()
+        weight = strength * self.decay_rate ** (np.maximum(now - reference, 0.0) / self.decay_interval)
+        labels = label_propagation(len(names), src, dst, weight)
+        degree = np.bincount(np.concatenate([src, dst]), minlength=len(names))
+
+        groups: dict[tuple, list[str]] = {}
+        node_ids = {name: node for node, name in enumerate(names)}
+        for name, entity_type in types.items():
+            node = node_ids.get(name)
+            key = ("community", int(labels[node])) if node is not None and degree[node] else ("type", entity_type)
+            groups.setdefault(key, []).append(name)
+
+        ordered = sorted(groups.items(), key=lambda item: (-len(item[1]), item[0][0], str(item[0][1])))
+        clusters = []
+        assignment = {}
+        for cluster_id, (key, members) in enumerate(ordered):
+            members.sort(key=lambda name: -keys[name])
+            type_counts = Counter(types[name] for name in members)
+            clusters.append({
+                "id": cluster_id,
+                "label": members[0],
+                "size": len(members),
+                "type": type_counts.most_common(1)[0][0],
+                "isolated": key[0] == "type",
+                "members": members,
+            })
+            assignment.update(dict.fromkeys(members, cluster_id))
+
+        # 社区之间的关系: (较小编号, 较大编号) -> (关系数, 有效强度之和)
+        cluster_of = np.array([assignment.get(name, -1) for name in names], dtype=np.int64)
+        links: dict[tuple[int, int], tuple[int, float]] = {}
+        if len(src):
+            a, b = cluster_of[src], cluster_of[dst]
+            between = (a >= 0) & (b >= 0) & (a != b)
+            low, high = np.minimum(a, b)[between], np.maximum(a, b)[between]
+            pairs, inverse = np.unique(np.stack([low, high], axis=1), axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            counts = np.bincount(inverse, minlength=len(pairs))
+            totals = np.bincount(inverse, weights=weight[between], minlength=len(pairs))
+            links = {
+                (int(pair[0]), int(pair[1])): (int(count), float(total))
+                for pair, count, total in zip(pairs, counts, totals)
+            }
+
+        return {
+            "computed_at": time.time(),
+            "clusters": clusters,
+            "assignment": assignment,
+            "links": links,
+        }
+
+    async def get_community_overview(self, max_clusters: int = 100, top_members: int = 5) -> dict:
+        """获取社区级别的全局图谱（每个社区作为一个超级节点）
+
+        Args:
+            max_clusters: 最多返回的社区数（按规模降序）
+            top_members: 每个社区附带的代表实体数
+
+        Returns:
+            {"computed_at", "total_clusters", "clusters": [...], "links": [...]}，
+            links 只包含返回的社区之间的关系
+        """
+        try:
+            communities = await self._get_communities()
+            clusters = [
+                {**{k: v for k, v in cluster.items() if k != "members"}, "top_members": cluster["members"][:top_members]}
+                for cluster in communities["clusters"][:max_clusters]
+            ]
+            shown = {cluster["id"] for cluster in clusters}
+            links = [
+                {"source": a, "target": b, "count": count, "strength": total}
+                for (a, b), (count, total) in communities["links"].items()
+                if a in shown and b in shown
+            ]
+            return {
+                "computed_at": communities["computed_at"],
+                "total_clusters": len(communities["clusters"]),
+                "clusters": clusters,
+                "links": links,
+            }
+        except Exception as e:
+            logger.error(f"[GraphMemory] 获取社区划分失败: {e}", exc_info=True)
+            return {"computed_at": None, "total_clusters": 0, "clusters": [], "links": []}
+
+    async def expand_community(self, cluster_id: int, limit: int = 200) -> dict | None:
+        """展开一个社区
+
+        Args:
+            cluster_id: 社区编号（来自 get_community_overview）
+            limit: 最多返回的成员数（按有效重要性降序）
+
+        Returns:
+            {"cluster", "members": [名称], "edges": 成员之间的关系, "links": 到其他社区的关系}，
+            社区不存在时为 None
+        """
+        try:
+            communities = await self._get_communities()
+            if not 0 <= cluster_id < len(communities["clusters"]):
+                return None
+            cluster = communities["clusters"][cluster_id]
+            members = cluster["members"][:limit]
+
+            def _edges():
+                now = datetime.now(timezone.utc).timestamp()
+                return [
+                    {
+                        "from": a,
+                        "to": b,
+                        "relation": relation,
+                        "strength": self._effective_strength_at(strength, ref, now),
+                    }
+                    for a, b, relation, strength, ref in self._get_adjacency().edges_among(members)
+                ]
+
+            edges = await self._execute_in_thread(_edges)
+            links = [
+                {"cluster": b if a == cluster_id else a, "count": count, "strength": total}
+                for (a, b), (count, total) in communities["links"].items()
+                if cluster_id in (a, b)
+            ]
+            links.sort(key=lambda link: -link["strength"])
+            return {
+                "cluster": {k: v for k, v in cluster.items() if k != "members"},
+                "members": members,
+                "edges": edges,
+                "links": links,
+            }
+        except Exception as e:
+            logger.error(f"[GraphMemory] 展开社区失败: {e}", exc_info=True)
+            return None
+
+    # ==================== 布局坐标 ====================
+
+    async def update_layout(self, full: bool = False) -> int:
+        """计算并缓存全局图谱的布局坐标
+
+        只为有效重要性最高的 layout_max_nodes 个实体计算。
+        增量模式只为还没有坐标的实体计算（已有实体保持原位）；
+        full=True 时以已有坐标为起点重新调整全部实体。
+        坐标计算在线程池中进行，不占用数据库执行器。
+
+        Args:
+            full: 是否调整全部实体
+
+        Returns:
+            本次移动的实体数
+        """
+        async with self._layout_lock:
+            def _snapshot():
+                names = self._get_importance_index().top(self.layout_max_nodes)
+                now = datetime.now(timezone.utc).timestamp()
+                edges = [
+                    (a, b, self._effective_strength_at(strength, ref, now))
+                    for a, b, _, strength, ref in self._get_adjacency().edges_among(names)
+                ]
+                return names, edges
+
+            try:
+                names, edges = await self._execute_in_thread(_snapshot)
+                initial = np.array(
+                    [self._layout.get(name, (np.nan, np.nan)) for name in names], dtype=np.float64
+                ).reshape(-1, 2)
+                movable = np.ones(len(names), dtype=bool) if full else np.isnan(initial).any(axis=1)
+                if not movable.any():
+                    self._layout = {name: self._layout[name] for name in names}
+                    return 0
+
+                node_ids = {name: node for node, name in enumerate(names)}
+                src = np.array([node_ids[a] for a, _, _ in edges], dtype=np.int64)
+                dst = np.array([node_ids[b] for _, b, _ in edges], dtype=np.int64)
+                weight = np.array([w for _, _, w in edges], dtype=np.float64)
+
+                # 已有布局上的微调只需要较少的迭代
+                iterations = 30 if full and not np.isnan(initial).all() else 50
+                pos = await asyncio.to_thread(
+                    force_layout, len(names), src, dst, weight, initial, movable, iterations
+                )
+                self._layout = {name: (float(x), float(y)) for name, (x, y) in zip(names, pos)}
+                return int(movable.sum())
+            except Exception as e:
+                logger.error(f"[GraphMemory] 计算图谱布局失败: {e}", exc_info=True)
+                return 0
+
+    def schedule_layout_update(self):
+        """在后台增量更新布局（已有更新在进行时不重复启动）"""
+        if self._layout_task is None or self._layout_task.done():
+            self._layout_task = asyncio.create_task(self.update_layout())
+
+    def layout_positions(self, names: list[str]) -> dict[str, tuple[float, float]]:
+        """已缓存的布局坐标 {实体名称: (x, y)}，没有坐标的实体不包含在内"""
+        layout = self._layout
+        return {name: layout[name] for name in names if name in layout}
+
+    async def missing_layout(self, names: list[str]) -> list[str]:
+        """布局计算会覆盖（有效重要性在前 layout_max_nodes 名之内）但还没有坐标的实体
+
+        不在覆盖范围内的实体永远不会有坐标，不计入其中。
+        """
+        missing = [name for name in names if name not in self._layout]
+        if not missing:
+            return []
+
+        def _covered():
+            index = self._get_importance_index()
+            ranks = [(name, index.rank(name)) for name in missing]
+            return [name for name, rank in ranks if rank is not None and rank < self.layout_max_nodes]
+
+        return await self._execute_in_thread(_covered)
+
+    async def top_entity_names(
+        self,
+        limit: int,
+        offset: int = 0,
+        min_importance: float = 0.0,
+        after: tuple[float, str] | None = None,
+    ) -> tuple[list[str], int]:
+        """按有效重要性从高到低获取实体名称，不需要全表排序
+
+        Args:
+            limit: 返回数量
+            offset: 跳过的数量
+            min_importance: 最小有效重要性
+            after: 游标 (decay_key_expr 排序键, 名称)，只返回排在其后的实体
+
+        Returns:
+            (实体名称列表, 满足条件的实体总数)
+        """
+        def _top():
+            index = self._get_importance_index()
+            cursor = after
+            if cursor is not None and cursor[1] in index:
+                # 游标实体仍在索引中时使用索引自身的键，避免浮点误差
+                cursor = (index.key_of(cursor[1]), cursor[1])
+            return index.top(limit, offset, min_importance, cursor), index.count(min_importance)
+
+        return await self._execute_in_thread(_top)
+
+    def effective_strength(self, relation: dict) -> float:
+        """计算关系的有效强度"""
+        return self.effective_value(
+            relation.get("strength", 1.0), relation.get("last_decay_reference")
+        )
+
+    # ==================== 列投影 ====================
+
+    @staticmethod
+    def projection(var: str, columns: tuple[str, ...]) -> str:
+        """生成 RETURN 子句的列投影
+
+        Args:
+            var: Cypher 变量名
+            columns: 列名
+
+        Returns:
+            例如 "e.name, e.type, e.description"
+        """
+        return ", ".join(f"{var}.{column}" for column in columns)
+
+    def entity_projection(self, var: str = "e") -> str:
+        """实体标量列投影，配合 decode_entity 使用"""
+        return self.projection(var, self.ENTITY_COLUMNS)
+
+    def relation_projection(self, var: str = "r") -> str:
+        """关系列投影，配合 decode_relation 使用"""
+        return self.projection(var, self.RELATION_COLUMNS)
+
+    def decode_entity(self, row: list, offset: int = 0) -> dict:
+        """把 entity_projection 的投影行解码为实体属性字典
+
+        Args:
+            row: 查询结果行
+            offset: 实体列在行中的起始位置
+
+        Returns:
+            实体属性字典，importance 为衰减后的有效值
+        """
+        entity = dict(zip(self.ENTITY_COLUMNS, row[offset:offset + len(self.ENTITY_COLUMNS)]))
+        entity["importance"] = self.effective_value(entity["importance"], entity.pop("last_decay_reference"))
+        entity["access_count"] = entity["access_count"] or 0
+        return entity
+
+    def decode_relation(self, row: list, offset: int = 0) -> dict:
+        """把 relation_projection 的投影行解码为关系属性字典
+
+        Args:
+            row: 查询结果行
+            offset: 关系列在行中的起始位置
+
+        Returns:
+            关系属性字典，strength 为衰减后的有效值
+        """
+        relation = dict(zip(self.RELATION_COLUMNS, row[offset:offset + len(self.RELATION_COLUMNS)]))
+        relation["strength"] = self.effective_value(relation["strength"], relation.pop("last_decay_reference"))
+        return relation
+
+    def entity_from_row(self, row: list, offset: int = 0) -> EntityNode:
+        """把 entity_projection 的投影行解码为 EntityNode（不含向量）"""
+        return EntityNode(**self.decode_entity(row, offset))
+
     # ==================== User 节点操作 ====================
 
     async def add_user(self, user: UserNode) -> bool:
@@ -74,7 +807,7 @@ class GraphStore:
         def _add():
             try:
                 now = datetime.now(timezone.utc)
-                self.conn.execute(
+                result = self.conn.execute(
                     """
                     MERGE (u:User {id: $id})
                     ON CREATE SET
@@ -85,6 +818,7 @@ class GraphStore:
                     ON MATCH SET
                         u.name = $name,
                         u.last_active = $last_active
+                    RETURN u.created_at = $created_at
                     """,
                     {
                         "id": user.id,
@@ -94,6 +828,8 @@ class GraphStore:
                         "last_active": user.last_active or now,
                     },
                 )
+                if result.has_next() and result.get_next()[0]:
+                    self._mark_written()
                 return True
             except Exception as e:
                 logger.error(f"[GraphMemory] 添加用户失败: {e}", exc_info=True)
@@ -108,7 +844,7 @@ class GraphStore:
         def _add():
             try:
                 now = datetime.now(timezone.utc)
-                self.conn.execute(
+                result = self.conn.execute(
                     """
                     MERGE (s:Session {id: $id})
                     ON CREATE SET
@@ -121,6 +857,7 @@ class GraphStore:
                         s.name = $name,
                         s.persona_id = $persona_id,
                         s.last_active = $last_active
+                    RETURN s.created_at = $created_at
                     """,
                     {
                         "id": session.id,
@@ -131,6 +868,8 @@ class GraphStore:
                         "last_active": session.last_active or now,
                     },
                 )
+                if result.has_next() and result.get_next()[0]:
+                    self._mark_written()
                 return True
             except Exception as e:
                 logger.error(f"[GraphMemory] 添加会话失败: {e}", exc_info=True)
@@ -160,10 +899,16 @@ class GraphStore:
             try:
                 now = datetime.now(timezone.utc)
                 embedding = entity.embedding
+                name = self.resolve_name(entity.name)
+                created = False
+                if self.cold_store is not None and name in self.cold_store:
+                    self._rehydrate(name, now)
+                    created = True
 
-                self.conn.execute(
-                    """
-                    MERGE (e:Entity {name: $name})
+                importance = self.decay_expr("e.importance", "e.last_decay_reference")
+                result = self.conn.execute(
+                    f"""
+                    MERGE (e:Entity {{name: $name}})
                     ON CREATE SET
                         e.type = $type,
                         e.description = $description,
@@ -171,19 +916,27 @@ class GraphStore:
                         e.importance = $importance,
                         e.created_at = $created_at,
                         e.last_accessed = $last_accessed,
-                        e.access_count = $access_count
+                        e.access_count = $access_count,
+                        e.updated_at = $updated_at,
+                        e.last_decay_reference = $updated_at
                     ON MATCH SET
+                        e.updated_at = CASE
+                            WHEN e.description <> $description THEN $updated_at
+                            ELSE e.updated_at
+                        END,
                         e.description = $description,
                         e.embedding = $embedding,
                         e.last_accessed = $last_accessed,
                         e.access_count = e.access_count + 1,
                         e.importance = CASE
-                            WHEN e.importance < 1.0 THEN e.importance + 0.1
+                            WHEN {importance} < 1.0 THEN {importance} + 0.1
                             ELSE 1.0
-                        END
+                        END,
+                        e.last_decay_reference = $updated_at
+                    RETURN e.name, e.importance, e.last_decay_reference, e.created_at = $created_at
                     """,
                     {
-                        "name": entity.name,
+                        "name": name,
                         "type": entity.type,
                         "description": entity.description,
                         "embedding": embedding,
@@ -191,8 +944,18 @@ class GraphStore:
                         "created_at": entity.created_at or now,
                         "last_accessed": entity.last_accessed or now,
                         "access_count": entity.access_count,
+                        "updated_at": now,
+                        **self.decay_params(),
                     },
                 )
+                if result.has_next():
+                    row = result.get_next()
+                    if not self._importance_index_stale:
+                        self._importance_index.update(*row[:3])
+                    created = created or row[3]
+                if created:
+                    self._mark_written()
+                self.embeddings.upsert_many([(name, embedding)])
                 return True
             except Exception as e:
                 logger.error(f"[GraphMemory] 添加实体失败: {e}", exc_info=True)
@@ -200,27 +963,29 @@ class GraphStore:
 
         return await self._execute_in_thread(_add)
 
-    async def get_entity(self, name: str) -> EntityNode | None:
-        """获取实体节点"""
+    async def get_entity(self, name: str, include_embedding: bool = False) -> EntityNode | None:
+        """获取实体节点
+
+        Args:
+            name: 实体名称（支持别名）
+            include_embedding: 是否同时读取向量
+
+        Returns:
+            实体节点，不存在时返回 None
+        """
         def _get():
             try:
+                embedding = ", e.embedding" if include_embedding else ""
                 result = self.conn.execute(
-                    "MATCH (e:Entity {name: $name}) RETURN e",
-                    {"name": name},
+                    f"MATCH (e:Entity {{name: $name}}) RETURN {self.entity_projection()}{embedding}",
+                    {"name": self.resolve_name(name)},
                 )
                 if result.has_next():
                     row = result.get_next()
-                    e = row[0]
-                    return EntityNode(
-                        name=e["name"],
-                        type=e["type"],
-                        description=e["description"],
-                        embedding=e.get("embedding"),
-                        importance=e.get("importance", 1.0),
-                        created_at=e.get("created_at"),
-                        last_accessed=e.get("last_accessed"),
-                        access_count=e.get("access_count", 0),
-                    )
+                    entity = self.entity_from_row(row)
+                    if include_embedding:
+                        entity.embedding = row[len(self.ENTITY_COLUMNS)]
+                    return entity
                 return None
             except Exception as e:
                 logger.error(f"[GraphMemory] 获取实体失败: {e}", exc_info=True)
@@ -235,35 +1000,48 @@ class GraphStore:
         def _add():
             try:
                 now = datetime.now(timezone.utc)
-                self.conn.execute(
-                    """
-                    MATCH (e1:Entity {name: $from}), (e2:Entity {name: $to})
+                strength = self.decay_expr("r.strength", "r.last_decay_reference")
+                result = self.conn.execute(
+                    f"""
+                    MATCH (e1:Entity {{name: $from}}), (e2:Entity {{name: $to}})
                     MERGE (e1)-[r:RELATED_TO]->(e2)
                     ON CREATE SET
                         r.relation = $relation,
                         r.strength = $strength,
                         r.evidence = $evidence,
                         r.created_at = $created_at,
-                        r.last_updated = $last_updated
+                        r.last_updated = $last_updated,
+                        r.last_decay_reference = $now
                     ON MATCH SET
                         r.relation = $relation,
                         r.evidence = $evidence,
                         r.last_updated = $last_updated,
                         r.strength = CASE
-                            WHEN r.strength < 1.0 THEN r.strength + 0.1
+                            WHEN {strength} < 1.0 THEN {strength} + 0.1
                             ELSE 1.0
-                        END
+                        END,
+                        r.last_decay_reference = $now
+                    RETURN e1.name, e2.name, r.relation, r.strength, r.last_decay_reference,
+                           r.created_at = $created_at
                     """,
                     {
-                        "from": relation.from_entity,
-                        "to": relation.to_entity,
+                        "from": self.resolve_name(relation.from_entity),
+                        "to": self.resolve_name(relation.to_entity),
                         "relation": relation.relation,
                         "strength": relation.strength,
                         "evidence": relation.evidence,
                         "created_at": relation.created_at or now,
                         "last_updated": relation.last_updated or now,
+                        "now": now,
+                        **self.decay_params(),
                     },
                 )
+                if result.has_next():
+                    row = result.get_next()
+                    if not self._adjacency_stale:
+                        self._adjacency.upsert_edge(*row[:5])
+                    if row[5]:
+                        self._mark_written()
                 return True
             except Exception as e:
                 logger.error(f"[GraphMemory] 添加关系失败: {e}", exc_info=True)
@@ -271,6 +1049,37 @@ class GraphStore:
 
         return await self._execute_in_thread(_add)
 
+    async def delete_relation(self, from_entity: str, to_entity: str) -> bool:
+        """删除实体关系
+
+        Args:
+            from_entity: 起点实体
+            to_entity: 终点实体
+
+        Returns:
+            是否成功
+        """
+        from_entity = self.resolve_name(from_entity)
+        to_entity = self.resolve_name(to_entity)
+
+        def _delete():
+            try:
+                self.conn.execute(
+                    """
+                    MATCH (e1:Entity {name: $from})-[r:RELATED_TO]->(e2:Entity {name: $to})
+                    DELETE r
+                    """,
+                    {"from": from_entity, "to": to_entity},
+                )
+                self._adjacency.remove_edge(from_entity, to_entity)
+                self._mark_written()
+                return True
+            except Exception as e:
+                logger.error(f"[GraphMemory] 删除关系失败: {e}", exc_info=True)
+                return False
+
+        return await self._execute_in_thread(_delete)
+
     async def link_entity_to_session(
         self,
         entity_name: str,
@@ -295,7 +1104,7 @@ class GraphStore:
                         r.mention_count = r.mention_count + 1
                     """,
                     {
-                        "entity_name": entity_name,
+                        "entity_name": self.resolve_name(entity_name),
                         "session_id": session_id,
                         "now": now,
                         "sentiment": sentiment,
@@ -342,26 +1151,62 @@ class GraphStore:
 
     # ==================== 统计查询 ====================
 
+    # 统计缓存的最长有效期（秒），超时后即使没有写入也重新计数，纠正绕过写入路径的修改
+    STATS_MAX_AGE = 600.0
+
+    def _mark_written(self):
+        """记录一次影响统计结果的写入（增删节点或关系），使统计缓存失效"""
+        self._write_generation += 1
+
+    def _cached_stats(self, key: str, compute) -> Any:
+        """按写入代数缓存统计结果（需在执行器线程中调用）
+
+        写入与统计都在单线程执行器中执行，写入代数未变时数据库中的计数不会变化，
+        直接返回缓存；compute 抛出的异常不会被缓存。
+
+        Args:
+            key: 统计项名称
+            compute: 计算统计结果的函数
+
+        Returns:
+            统计结果
+        """
+        now = time.monotonic()
+        entry = self._stats_cache.get(key)
+        if entry is not None and entry[0] == self._write_generation and now - entry[1] < self.STATS_MAX_AGE:
+            return entry[2]
+
+        generation = self._write_generation
+        value = compute()
+        self._stats_cache[key] = (generation, now, value)
+        return value
+
     async def get_stats(self) -> dict:
-        """获取图谱统计信息"""
-        def _get_stats():
-            try:
-                stats = {}
+        """获取图谱统计信息（按写入代数缓存，没有新的写入时不再全表计数）"""
+        def _count() -> dict:
+            stats = {}
+
+            # 统计节点数
+            result = self.conn.execute("MATCH (u:User) RETURN COUNT(u) as count")
+            stats["users"] = result.get_next()[0] if result.has_next() else 0
 
-                # 统计节点数
-                result = self.conn.execute("MATCH (u:User) RETURN COUNT(u) as count")
-                stats["users"] = result.get_next()[0] if result.has_next() else 0
+            result = self.conn.execute("MATCH (s:Session) RETURN COUNT(s) as count")
+            stats["sessions"] = result.get_next()[0] if result.has_next() else 0
 
-                result = self.conn.execute("MATCH (s:Session) RETURN COUNT(s) as count")
-                stats["sessions"] = result.get_next()[0] if result.has_next() else 0
+            result = self.conn.execute("MATCH (e:Entity) RETURN COUNT(e) as count")
+            stats["entities"] = result.get_next()[0] if result.has_next() else 0
 
-                result = self.conn.execute("MATCH (e:Entity) RETURN COUNT(e) as count")
-                stats["entities"] = result.get_next()[0] if result.has_next() else 0
+            # 统计关系数
+            result = self.conn.execute("MATCH ()-[r:RELATED_TO]->() RETURN COUNT(r) as count")
+            stats["relations"] = result.get_next()[0] if result.has_next() else 0
 
-                # 统计关系数
-                result = self.conn.execute("MATCH ()-[r:RELATED_TO]->() RETURN COUNT(r) as count")
-                stats["relations"] = result.get_next()[0] if result.has_next() else 0
+            return stats
 
+        def _get_stats():
+            try:
+                stats = dict(self._cached_stats("counts", _count))
+                if self.cold_store is not None:
+                    stats["archived_entities"] = len(self.cold_store)
                 return stats
             except Exception as e:
                 logger.error(f"[GraphMemory] 获取统计信息失败: {e}", exc_info=True)
@@ -370,24 +1215,27 @@ class GraphStore:
         return await self._execute_in_thread(_get_stats)
 
     async def get_entity_type_distribution(self) -> list[dict]:
-        """获取实体类型分布"""
+        """获取实体类型分布（按写入代数缓存）"""
+        def _group() -> list[dict]:
+            result = self.conn.execute(
+                """
+                MATCH (e:Entity)
+                RETURN e.type as type, COUNT(e) as count
+                ORDER BY count DESC
+                """
+            )
+            distribution = []
+            while result.has_next():
+                row = result.get_next()
+                distribution.append({
+                    "type": row[0] or "未分类",
+                    "count": row[1],
+                })
+            return distribution
+
         def _get_distribution():
             try:
-                result = self.conn.execute(
-                    """
-                    MATCH (e:Entity)
-                    RETURN e.type as type, COUNT(e) as count
-                    ORDER BY count DESC
-                    """
-                )
-                distribution = []
-                while result.has_next():
-                    row = result.get_next()
-                    distribution.append({
-                        "type": row[0] or "未分类",
-                        "count": row[1],
-                    })
-                return distribution
+                return [dict(row) for row in self._cached_stats("entity_types", _group)]
             except Exception as e:
                 logger.error(f"[GraphMemory] 获取实体类型分布失败: {e}", exc_info=True)
                 return []
@@ -395,85 +1243,741 @@ class GraphStore:
         return await self._execute_in_thread(_get_distribution)
 
     async def get_timeline_stats(self) -> list[dict]:
-        """获取时间线统计（按日期统计实体创建数量）"""
+        """获取时间线统计（按日期统计实体创建数量，按写入代数缓存）"""
+        def _group() -> list[dict]:
+            result = self.conn.execute(
+                """
+                MATCH (e:Entity)
+                WHERE e.created_at IS NOT NULL
+                RETURN substring(e.created_at, 0, 10) as date, COUNT(e) as count
+                ORDER BY date ASC
+                """
+            )
+            timeline = []
+            while result.has_next():
+                row = result.get_next()
+                timeline.append({
+                    "date": row[0],
+                    "count": row[1],
+                })
+            return timeline
+
         def _get_timeline():
             try:
-                result = self.conn.execute(
-                    """
-                    MATCH (e:Entity)
-                    WHERE e.created_at IS NOT NULL
-                    RETURN substring(e.created_at, 0, 10) as date, COUNT(e) as count
-                    ORDER BY date ASC
-                    """
-                )
-                timeline = []
-                while result.has_next():
-                    row = result.get_next()
-                    timeline.append({
-                        "date": row[0],
-                        "count": row[1],
-                    })
-                return timeline
+                return [dict(row) for row in self._cached_stats("timeline", _group)]
             except Exception as e:
                 logger.error(f"[GraphMemory] 获取时间线统计失败: {e}", exc_info=True)
                 return []
 
         return await self._execute_in_thread(_get_timeline)
 
-    # ==================== 维护操作 ====================
+    # ==================== 分块维护 ====================
 
-    async def apply_time_decay(self, decay_rate: float = 0.95):
-        """应用时间衰减"""
-        def _decay():
+    def _offset_bound(self, label: str) -> int:
+        """获取节点表内部偏移的上界（需在执行器线程中调用）"""
+        result = self.conn.execute(f"MATCH (n:{label}) RETURN max(offset(ID(n)))")
+        max_offset = result.get_next()[0] if result.has_next() else None
+        return 0 if max_offset is None else max_offset + 1
+
+    def _entity_offset_bound(self) -> int:
+        """获取实体内部节点偏移的上界（需在执行器线程中调用）"""
+        return self._offset_bound("Entity")
+
+    async def run_chunked(self, task: str, func, chunks: list[tuple] | None = None) -> list:
+        """分块执行维护任务
+
+        每块单独提交到执行器，块之间暂停 chunk_pause 秒，
+        让交互请求有机会插入到单线程执行器的队列中。
+        单个块失败只记录错误，不影响其余块。
+
+        Args:
+            task: 任务名，用于记录进度
+            func: 在执行器线程中调用的 func(*chunk)，返回处理数量或结果列表
+            chunks: 每块的参数元组；默认按实体偏移范围划分为 (start, end)，
+                    func 处理偏移在 [start, end) 内的实体
+
+        Returns:
+            各块的返回值（失败的块不包含在内）
+        """
+        if chunks is None:
+            bound = await self._execute_in_thread(self._entity_offset_bound)
+            chunks = [
+                (start, start + self.chunk_size)
+                for start in range(0, bound, self.chunk_size)
+            ]
+
+        progress = {
+            "task": task,
+            "status": "running",
+            "total_chunks": len(chunks),
+            "completed_chunks": 0,
+            "failed_chunks": 0,
+            "processed": 0,
+            "chunk_timings_ms": [],
+            "started_at": time.time(),
+            "finished_at": None,
+        }
+        self.maintenance_progress[task] = progress
+
+        results = []
+        for chunk_id, chunk in enumerate(chunks):
+            chunk_start = time.perf_counter()
             try:
-                # 衰减实体重要性
-                self.conn.execute(
-                    """
-                    MATCH (e:Entity)
-                    SET e.importance = e.importance * $decay_rate
-                    """,
-                    {"decay_rate": decay_rate},
+                result = await self._execute_in_thread(func, *chunk)
+                results.append(result)
+                progress["processed"] += result if isinstance(result, int) else len(result)
+            except Exception as e:
+                progress["failed_chunks"] += 1
+                logger.error(
+                    f"[GraphMemory] 维护任务 {task} 第 {chunk_id + 1} 块失败: {e}",
+                    exc_info=True,
                 )
 
-                # 衰减关系强度
-                self.conn.execute(
-                    """
-                    MATCH ()-[r:RELATED_TO]->()
-                    SET r.strength = r.strength * $decay_rate
-                    """,
-                    {"decay_rate": decay_rate},
-                )
+            progress["completed_chunks"] += 1
+            # 只保留最近 100 个分块的耗时
+            timings = progress["chunk_timings_ms"]
+            timings.append(round((time.perf_counter() - chunk_start) * 1000, 2))
+            del timings[:-100]
 
-                logger.info(f"[GraphMemory] 时间衰减完成 (衰减率: {decay_rate})")
-                return True
-            except Exception as e:
-                logger.error(f"[GraphMemory] 时间衰减失败: {e}", exc_info=True)
-                return False
+            await asyncio.sleep(self.chunk_pause)
+
+        progress["status"] = "failed" if progress["failed_chunks"] else "completed"
+        progress["finished_at"] = time.time()
+        return results
+
+    def get_maintenance_progress(self) -> dict[str, dict]:
+        """获取维护任务进度"""
+        return {task: {**progress} for task, progress in self.maintenance_progress.items()}
+
+    # ==================== 维护操作 ====================
+
+    async def apply_time_decay(self, decay_rate: float = 0.95):
+        """手动对全部实体和关系额外应用一次衰减
+
+        常规的时间衰减在读取时按 last_decay_reference 计算，无需定期调用本方法。
+        """
+        def _decay(start: int, end: int) -> int:
+            params = {"decay_rate": decay_rate, "chunk_start": start, "chunk_end": end}
+
+            # 衰减实体重要性
+            result = self.conn.execute(
+                """
+                MATCH (e:Entity)
+                WHERE offset(ID(e)) >= $chunk_start AND offset(ID(e)) < $chunk_end
+                SET e.importance = e.importance * $decay_rate
+                RETURN COUNT(e)
+                """,
+                params,
+            )
+            count = result.get_next()[0] if result.has_next() else 0
+
+            # 衰减关系强度（按起点实体分块）
+            self.conn.execute(
+                """
+                MATCH (e:Entity)-[r:RELATED_TO]->()
+                WHERE offset(ID(e)) >= $chunk_start AND offset(ID(e)) < $chunk_end
+                SET r.strength = r.strength * $decay_rate
+                """,
+                params,
+            )
+            return count
+
+        try:
+            await self.run_chunked("apply_time_decay", _decay)
+            # 存储值整体缩放，重建重要性索引和邻接表
+            self._importance_index_stale = True
+            self._adjacency_stale = True
+            logger.info(f"[GraphMemory] 时间衰减完成 (衰减率: {decay_rate})")
+            return True
+        except Exception as e:
+            logger.error(f"[GraphMemory] 时间衰减失败: {e}", exc_info=True)
+            return False
+
+    async def compact_time_decay(self, max_drift: float = 0.5) -> int:
+        """将衰减后的有效值写回存储
+
+        只处理有效值已低于存储值 max_drift 倍的行，
+        避免每个维护周期重写整张表。
 
-        return await self._execute_in_thread(_decay)
+        Args:
+            max_drift: 衰减系数低于该值时写回
+
+        Returns:
+            写回的实体和关系数量
+        """
+        def _compact(start: int, end: int) -> int:
+            params = {
+                **self.decay_params(),
+                "now": datetime.now(timezone.utc),
+                "max_drift": max_drift,
+                "chunk_start": start,
+                "chunk_end": end,
+            }
+
+            result = self.conn.execute(
+                f"""
+                MATCH (e:Entity)
+                WHERE offset(ID(e)) >= $chunk_start AND offset(ID(e)) < $chunk_end
+                  AND {self.decay_expr("1.0", "e.last_decay_reference")} < $max_drift
+                SET e.importance = {self.decay_expr("e.importance", "e.last_decay_reference")},
+                    e.last_decay_reference = $now
+                RETURN COUNT(e)
+                """,
+                params,
+            )
+            entity_count = result.get_next()[0] if result.has_next() else 0
+
+            result = self.conn.execute(
+                f"""
+                MATCH (e:Entity)-[r:RELATED_TO]->()
+                WHERE offset(ID(e)) >= $chunk_start AND offset(ID(e)) < $chunk_end
+                  AND {self.decay_expr("1.0", "r.last_decay_reference")} < $max_drift
+                SET r.strength = {self.decay_expr("r.strength", "r.last_decay_reference")},
+                    r.last_decay_reference = $now
+                RETURN COUNT(r)
+                """,
+                params,
+            )
+            relation_count = result.get_next()[0] if result.has_next() else 0
+            return entity_count + relation_count
+
+        try:
+            count = sum(await self.run_chunked("compact_time_decay", _compact))
+            logger.info(f"[GraphMemory] 衰减压缩完成: 写回 {count} 个实体和关系")
+            return count
+        except Exception as e:
+            logger.error(f"[GraphMemory] 衰减压缩失败: {e}", exc_info=True)
+            return 0
 
     async def prune_low_importance_entities(self, threshold: float = 0.1) -> int:
-        """清理低重要性实体"""
-        def _prune():
+        """清理有效重要性（衰减后）低于阈值的实体
+
+        由重要性索引直接给出低于阈值的候选，只处理这部分实体。
+        """
+        def _candidates() -> list[str]:
+            return self._get_importance_index().below(threshold)
+
+        def _prune(names: list[str]) -> int:
+            # 按数据库中的当前值再次确认
+            params = {"names": names, "threshold": threshold, **self.decay_params()}
+            result = self.conn.execute(
+                f"""
+                MATCH (e:Entity)
+                WHERE e.name IN $names
+                  AND {self.decay_expr("e.importance", "e.last_decay_reference")} < $threshold
+                RETURN e.name
+                """,
+                params,
+            )
+            pruned = []
+            while result.has_next():
+                pruned.append(result.get_next()[0])
+
+            if pruned:
+                if self.cold_store is not None:
+                    self.cold_store.archive_many(self._collect_archive_records(pruned))
+                try:
+                    with self._transaction():
+                        self.conn.execute(
+                            "MATCH (e:Entity) WHERE e.name IN $names DETACH DELETE e",
+                            {"names": pruned},
+                        )
+                except Exception:
+                    # 删除失败时撤销归档，实体仍只保留在热图谱中
+                    if self.cold_store is not None:
+                        self.cold_store.remove_many(pruned)
+                    raise
+                self.embeddings.remove(pruned)
+                self._adjacency.remove_nodes(pruned)
+                self._mark_written()
+            # 索引中的候选无论是否被删除都重新同步
+            self._unindex_entities(names)
+            pruned_set = set(pruned)
+            self._index_entities([name for name in names if name not in pruned_set])
+            return len(pruned)
+
+        try:
+            candidates = await self._execute_in_thread(_candidates)
+            chunks = [
+                (candidates[start:start + self.chunk_size],)
+                for start in range(0, len(candidates), self.chunk_size)
+            ]
+            count = sum(await self.run_chunked("prune_low_importance", _prune, chunks))
+            logger.info(f"[GraphMemory] 清理了 {count} 个低重要性实体")
+            return count
+        except Exception as e:
+            logger.error(f"[GraphMemory] 清理实体失败: {e}", exc_info=True)
+            return 0
+
+    # ==================== 向量存储 ====================
+
+    def _sync_embedding_store(self):
+        """向量存储与数据库中的实体不一致时（首次启用、异常退出）从数据库重建"""
+        result = self.conn.execute("MATCH (e:Entity) RETURN e.name")
+        names = []
+        while result.has_next():
+            names.append(result.get_next()[0])
+        if len(names) == len(self.embeddings) and all(name in self.embeddings for name in names):
+            return
+
+        logger.info(f"[GraphMemory] 重建向量存储 ({len(names)} 个实体)")
+        self.embeddings.rebuild([])
+        bound = self._entity_offset_bound()
+        for start in range(0, bound, self.chunk_size):
+            result = self.conn.execute(
+                """
+                MATCH (e:Entity)
+                WHERE offset(ID(e)) >= $chunk_start AND offset(ID(e)) < $chunk_end
+                RETURN e.name, e.embedding
+                """,
+                {"chunk_start": start, "chunk_end": start + self.chunk_size},
+            )
+            items = []
+            while result.has_next():
+                items.append(tuple(result.get_next()))
+            self.embeddings.upsert_many(items)
+
+    async def vector_search(
+        self,
+        query_embedding: list[float],
+        top_k: int,
+        min_similarity: float = -1.0,
+    ) -> list[tuple[str, float]]:
+        """在向量存储上检索最相似的实体名称
+
+        读取内存映射矩阵的快照，不占用数据库线程。
+
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回数量
+            min_similarity: 最小相似度
+
+        Returns:
+            [(实体名称, 相似度)]，按相似度降序
+        """
+        try:
+            return await asyncio.to_thread(
+                self.embeddings.search, query_embedding, top_k, min_similarity
+            )
+        except Exception as e:
+            logger.error(f"[GraphMemory] 向量检索失败: {e}", exc_info=True)
+            return []
+
+    async def compact_embedding_store(self, max_tombstone_ratio: float = 0.5) -> bool:
+        """墓碑行占比超过阈值时压缩向量存储
+
+        Returns:
+            是否执行了压缩
+        """
+        def _compact():
+            total = len(self.embeddings) + self.embeddings.tombstones
+            if not total or self.embeddings.tombstones / total <= max_tombstone_ratio:
+                return False
+            self.embeddings.compact()
+            return True
+
+        try:
+            return await self._execute_in_thread(_compact)
+        except Exception as e:
+            logger.error(f"[GraphMemory] 压缩向量存储失败: {e}", exc_info=True)
+            return False
+
+    # ==================== 冷存储 ====================
+
+    def _collect_archive_records(self, names: list[str]) -> list[dict]:
+        """读取待归档实体的属性、关系和提及记录（在执行器线程中调用）"""
+        params = {"names": names, **self.decay_params()}
+        records: dict[str, dict] = {}
+
+        result = self.conn.execute(
+            f"""
+            MATCH (e:Entity)
+            WHERE e.name IN $names
+            RETURN e.name, e.type, e.description, e.embedding,
+                   {self.decay_expr("e.importance", "e.last_decay_reference")},
+                   e.access_count, e.created_at
+            """,
+            params,
+        )
+        while result.has_next():
+            name, entity_type, description, embedding, importance, access_count, created_at = result.get_next()
+            records[name] = {
+                "name": name,
+                "type": entity_type,
+                "description": description,
+                "embedding": embedding,
+                "importance": importance,
+                "access_count": access_count or 0,
+                "created_at": created_at.isoformat() if created_at else None,
+                "relations": [],
+                "mentions": [],
+            }
+
+        # 出边和入边都记录；两端同时归档时两边各记一份，先恢复的一端只能等另一端
+        result = self.conn.execute(
+            f"""
+            MATCH (a:Entity)-[r:RELATED_TO]->(b:Entity)
+            WHERE a.name IN $names OR b.name IN $names
+            RETURN a.name, b.name, r.relation,
+                   {self.decay_expr("r.strength", "r.last_decay_reference")},
+                   r.evidence, r.created_at
+            """,
+            params,
+        )
+        while result.has_next():
+            from_name, to_name, relation, strength, evidence, created_at = result.get_next()
+            archived_relation = {
+                "from": from_name,
+                "to": to_name,
+                "relation": relation,
+                "strength": strength,
+                "evidence": evidence,
+                "created_at": created_at.isoformat() if created_at else None,
+            }
+            for owner in {from_name, to_name} & records.keys():
+                records[owner]["relations"].append(archived_relation)
+
+        result = self.conn.execute(
+            """
+            MATCH (e:Entity)-[m:MENTIONED_IN]->(s:Session)
+            WHERE e.name IN $names
+            RETURN e.name, s.id, m.first_mentioned, m.last_mentioned, m.mention_count, m.sentiment
+            """,
+            {"names": names},
+        )
+        while result.has_next():
+            name, session_id, first_mentioned, last_mentioned, mention_count, sentiment = result.get_next()
+            records[name]["mentions"].append({
+                "session_id": session_id,
+                "first_mentioned": first_mentioned.isoformat() if first_mentioned else None,
+                "last_mentioned": last_mentioned.isoformat() if last_mentioned else None,
+                "mention_count": mention_count,
+                "sentiment": sentiment,
+            })
+
+        return list(records.values())
+
+    def _rehydrate(self, name: str, now: datetime):
+        """把归档实体恢复到热图谱（在执行器线程中调用）
+
+        实体按归档时的有效重要性重建；关系只恢复另一端已在热图谱中的部分，
+        与同批归档实体之间的关系在另一端恢复时建立。
+        """
+        record = self.cold_store.get(name)
+        if record is None:
+            return
+
+        def parse(value: str | None) -> datetime:
+            return datetime.fromisoformat(value) if value else now
+
+        self.conn.execute(
+            """
+            MERGE (e:Entity {name: $name})
+            ON CREATE SET
+                e.type = $type,
+                e.description = $description,
+                e.embedding = $embedding,
+                e.importance = $importance,
+                e.created_at = $created_at,
+                e.last_accessed = $now,
+                e.access_count = $access_count,
+                e.updated_at = $now,
+                e.last_decay_reference = $now
+            """,
+            {
+                "name": name,
+                "type": record["type"],
+                "description": record["description"],
+                "embedding": record["embedding"] or [0.0] * self.embedding_dim,
+                "importance": record["importance"],
+                "created_at": parse(record.get("created_at")),
+                "access_count": record["access_count"],
+                "now": now,
+            },
+        )
+
+        for relation in record.get("relations", []):
+            self.conn.execute(
+                """
+                MATCH (e1:Entity {name: $from}), (e2:Entity {name: $to})
+                MERGE (e1)-[r:RELATED_TO]->(e2)
+                ON CREATE SET
+                    r.relation = $relation,
+                    r.strength = $strength,
+                    r.evidence = $evidence,
+                    r.created_at = $created_at,
+                    r.last_updated = $now,
+                    r.last_decay_reference = $now
+                """,
+                {
+                    "from": self.resolve_name(relation["from"]),
+                    "to": self.resolve_name(relation["to"]),
+                    "relation": relation["relation"],
+                    "strength": relation["strength"],
+                    "evidence": relation["evidence"],
+                    "created_at": parse(relation.get("created_at")),
+                    "now": now,
+                },
+            )
+
+        for mention in record.get("mentions", []):
+            self.conn.execute(
+                """
+                MATCH (e:Entity {name: $name}), (s:Session {id: $session_id})
+                MERGE (e)-[m:MENTIONED_IN]->(s)
+                ON CREATE SET
+                    m.first_mentioned = $first_mentioned,
+                    m.last_mentioned = $last_mentioned,
+                    m.mention_count = $mention_count,
+                    m.sentiment = $sentiment
+                """,
+                {
+                    "name": name,
+                    "session_id": mention["session_id"],
+                    "first_mentioned": parse(mention.get("first_mentioned")),
+                    "last_mentioned": parse(mention.get("last_mentioned")),
+                    "mention_count": mention["mention_count"],
+                    "sentiment": mention["sentiment"],
+                },
+            )
+
+        self.cold_store.remove(name)
+        self._adjacency_stale = True
+        logger.debug(f"[GraphMemory] 已从冷存储恢复实体: {name}")
+
+    async def search_archived(self, query: str, limit: int = 5) -> list[dict]:
+        """检索冷存储中的归档实体
+
+        Args:
+            query: 查询文本
+            limit: 返回数量
+
+        Returns:
+            归档实体列表（含 score）
+        """
+        if self.cold_store is None:
+            return []
+
+        query_embedding = None
+        if self.embedding_provider:
             try:
-                # 删除低重要性实体
-                result = self.conn.execute(
-                    """
-                    MATCH (e:Entity)
-                    WHERE e.importance < $threshold
-                    DETACH DELETE e
-                    RETURN COUNT(e) as count
-                    """,
-                    {"threshold": threshold},
-                )
-                count = result.get_next()[0] if result.has_next() else 0
-                logger.info(f"[GraphMemory] 清理了 {count} 个低重要性实体")
-                return count
+                query_embedding = await self.embedding_provider.get_embedding(query)
             except Exception as e:
-                logger.error(f"[GraphMemory] 清理实体失败: {e}", exc_info=True)
-                return 0
+                logger.warning(f"[GraphMemory] 生成查询 embedding 失败: {e}")
+
+        try:
+            return await self._execute_in_thread(self.cold_store.search, query, query_embedding, limit)
+        except Exception as e:
+            logger.error(f"[GraphMemory] 检索归档实体失败: {e}", exc_info=True)
+            return []
+
+    # ==================== 实体合并 ====================
+
+    async def merge_entity_cluster(self, canonical: str, members: list[str]) -> bool:
+        """将一组重复实体合并到保留实体
+
+        在单个事务中以集合操作完成:
+        - 累加重要性和访问次数
+        - 将成员的 RELATED_TO 出边/入边按对端聚合后转移到保留实体
+        - 将成员的 MENTIONED_IN 关系按会话聚合后转移到保留实体
+        - 删除成员实体，并在别名表中记录成员名称
+
+        Args:
+            canonical: 保留的实体名称
+            members: 要合并的实体名称列表
+
+        Returns:
+            是否成功
+        """
+        members = [name for name in dict.fromkeys(members) if name != canonical]
+        if not members:
+            return False
+
+        def _merge():
+            try:
+                params = {"canonical": canonical, "members": members}
+                now = datetime.now(timezone.utc)
+
+                with self._transaction():
+                    result = self.conn.execute(
+                        "MATCH (e:Entity) WHERE e.name = $canonical OR e.name IN $members "
+                        "RETURN COUNT(e)",
+                        params,
+                    )
+                    if result.get_next()[0] != len(members) + 1:
+                        logger.warning(
+                            f"[GraphMemory] 实体不存在，跳过合并: {canonical} <- {members}"
+                        )
+                        return False
+
+                    # 以衰减后的有效值合并，并重置衰减基准时间
+                    decay_params = {**params, **self.decay_params(), "now": now}
+
+                    def importance(var: str) -> str:
+                        return self.decay_expr(f"{var}.importance", f"{var}.last_decay_reference")
+
+                    def strength(var: str) -> str:
+                        return self.decay_expr(f"{var}.strength", f"{var}.last_decay_reference")
+
+                    def evidence(items: str) -> str:
+                        # 去掉 NULL、空串和重复的依据后拼接，没有依据时为 NULL
+                        items = f"list_distinct(list_filter({items}, x -> x <> ''))"
+                        return (
+                            f"CASE WHEN coalesce(size({items}), 0) = 0 THEN NULL "
+                            f"ELSE list_to_string('; ', {items}) END"
+                        )
+
+                    # 已有关系的依据按分隔符拆开，与转移过来的依据一起去重
+                    merged_evidence = evidence(
+                        "list_concat(coalesce(string_split(n.evidence, '; '), "
+                        "CAST([] AS STRING[])), evidence)"
+                    )
+
+                    # 1. 合并重要性和访问次数
+                    self.conn.execute(
+                        f"""
+                        MATCH (m:Entity)
+                        WHERE m.name IN $members
+                        WITH sum({importance("m")}) AS importance,
+                             sum(m.access_count) AS access_count
+                        MATCH (c:Entity {{name: $canonical}})
+                        SET c.importance = {importance("c")} + importance,
+                            c.access_count = c.access_count + access_count,
+                            c.last_decay_reference = $now
+                        """,
+                        decay_params,
+                    )
+
+                    # 2. 转移出边（按目标聚合，簇内部的边丢弃）
+                    self.conn.execute(
+                        f"""
+                        MATCH (m:Entity)-[r:RELATED_TO]->(t:Entity)
+                        WHERE m.name IN $members
+                          AND t.name <> $canonical AND NOT t.name IN $members
+                        WITH t,
+                             list_extract(collect(r.relation), 1) AS relation,
+                             sum({strength("r")}) AS strength,
+                             collect(r.evidence) AS evidence,
+                             min(r.created_at) AS created_at,
+                             max(r.last_updated) AS last_updated
+                        MATCH (c:Entity {{name: $canonical}})
+                        MERGE (c)-[n:RELATED_TO]->(t)
+                        ON CREATE SET
+                            n.relation = relation,
+                            n.strength = strength,
+                            n.evidence = {evidence("evidence")},
+                            n.created_at = created_at,
+                            n.last_updated = last_updated,
+                            n.last_decay_reference = $now
+                        ON MATCH SET
+                            n.strength = {strength("n")} + strength,
+                            n.evidence = {merged_evidence},
+                            n.last_decay_reference = $now
+                        """,
+                        decay_params,
+                    )
+
+                    # 3. 转移入边
+                    self.conn.execute(
+                        f"""
+                        MATCH (s:Entity)-[r:RELATED_TO]->(m:Entity)
+                        WHERE m.name IN $members
+                          AND s.name <> $canonical AND NOT s.name IN $members
+                        WITH s,
+                             list_extract(collect(r.relation), 1) AS relation,
+                             sum({strength("r")}) AS strength,
+                             collect(r.evidence) AS evidence,
+                             min(r.created_at) AS created_at,
+                             max(r.last_updated) AS last_updated
+                        MATCH (c:Entity {{name: $canonical}})
+                        MERGE (s)-[n:RELATED_TO]->(c)
+                        ON CREATE SET
+                            n.relation = relation,
+                            n.strength = strength,
+                            n.evidence = {evidence("evidence")},
+                            n.created_at = created_at,
+                            n.last_updated = last_updated,
+                            n.last_decay_reference = $now
+                        ON MATCH SET
+                            n.strength = {strength("n")} + strength,
+                            n.evidence = {merged_evidence},
+                            n.last_decay_reference = $now
+                        """,
+                        decay_params,
+                    )
+
+                    # 4. 转移 MENTIONED_IN 关系（按会话聚合）
+                    self.conn.execute(
+                        """
+                        MATCH (m:Entity)-[r:MENTIONED_IN]->(s:Session)
+                        WHERE m.name IN $members
+                        WITH s,
+                             min(r.first_mentioned) AS first_mentioned,
+                             max(r.last_mentioned) AS last_mentioned,
+                             sum(r.mention_count) AS mention_count,
+                             list_extract(collect(r.sentiment), 1) AS sentiment
+                        MATCH (c:Entity {name: $canonical})
+                        MERGE (c)-[n:MENTIONED_IN]->(s)
+                        ON CREATE SET
+                            n.first_mentioned = first_mentioned,
+                            n.last_mentioned = last_mentioned,
+                            n.mention_count = mention_count,
+                            n.sentiment = sentiment
+                        ON MATCH SET
+                            n.mention_count = n.mention_count + mention_count,
+                            n.last_mentioned = CASE
+                                WHEN last_mentioned > n.last_mentioned THEN last_mentioned
+                                ELSE n.last_mentioned
+                            END
+                        """,
+                        params,
+                    )
 
-        return await self._execute_in_thread(_prune)
+                    # 5. 删除成员实体
+                    self.conn.execute(
+                        "MATCH (m:Entity) WHERE m.name IN $members DETACH DELETE m",
+                        {"members": members},
+                    )
+
+                    # 6. 记录别名，并将指向成员的旧别名改为指向保留实体
+                    self.conn.execute(
+                        """
+                        MATCH (a:EntityAlias)
+                        WHERE a.canonical IN $members
+                        SET a.canonical = $canonical
+                        """,
+                        params,
+                    )
+                    self.conn.execute(
+                        """
+                        UNWIND $members AS alias
+                        MERGE (a:EntityAlias {alias: alias})
+                        SET a.canonical = $canonical, a.merged_at = $now
+                        """,
+                        {**params, "now": now},
+                    )
+
+                # 事务提交后再更新内存中的别名表
+                for alias, target in list(self._aliases.items()):
+                    if target in members:
+                        self._aliases[alias] = canonical
+                for alias in members:
+                    self._aliases[alias] = canonical
+                self._unindex_entities(members)
+                self._index_entities([canonical])
+                self.embeddings.remove(members)
+                # 关系按对端聚合后强度已变化，重建邻接表
+                self._adjacency_stale = True
+                self._mark_written()
+
+                logger.info(f"[GraphMemory] 成功合并实体: {members} -> {canonical}")
+                return True
+
+            except Exception as e:
+                logger.error(f"[GraphMemory] 合并实体失败: {e}", exc_info=True)
+                return False
+
+        return await self._execute_in_thread(_merge)
 
     # ==================== 搜索和管理操作 ====================
 
@@ -497,7 +2001,7 @@ class GraphStore:
             try:
                 # 构建查询条件
                 where_clauses = []
-                params = {"query": query, "limit": limit}
+                params = {"query": query, "limit": limit, **self.decay_params()}
 
                 # 关键词匹配
                 where_clauses.append("(e.name CONTAINS $query OR e.description CONTAINS $query)")
@@ -514,8 +2018,9 @@ class GraphStore:
                     f"""
                     MATCH (e:Entity)
                     WHERE {where_clause}
-                    RETURN e
-                    ORDER BY e.importance DESC, e.access_count DESC
+                    RETURN {self.entity_projection()},
+                           {self.decay_expr("e.importance", "e.last_decay_reference")} AS importance
+                    ORDER BY importance DESC, e.access_count DESC
                     LIMIT $limit
                     """,
                     params,
@@ -523,18 +2028,7 @@ class GraphStore:
 
                 entities = []
                 while result.has_next():
-                    row = result.get_next()
-                    e = row[0]
-                    entity = EntityNode(
-                        name=e["name"],
-                        type=e["type"],
-                        description=e["description"],
-                        importance=e.get("importance", 1.0),
-                        created_at=e.get("created_at"),
-                        last_accessed=e.get("last_accessed"),
-                        access_count=e.get("access_count", 0),
-                    )
-                    entities.append(entity)
+                    entities.append(self.entity_from_row(result.get_next()))
 
                 return entities
             except Exception as e:
@@ -552,18 +2046,21 @@ class GraphStore:
         Returns:
             关系列表
         """
+        entity_name = self.resolve_name(entity_name)
+
         def _get_relations():
             try:
                 relations = []
+                strength = self.decay_expr("r.strength", "r.last_decay_reference")
 
                 # 获取出边关系
                 result = self.conn.execute(
-                    """
-                    MATCH (e1:Entity {name: $name})-[r:RELATED_TO]->(e2:Entity)
+                    f"""
+                    MATCH (e1:Entity {{name: $name}})-[r:RELATED_TO]->(e2:Entity)
                     RETURN e1.name as from, e2.name as to, r.relation as relation,
-                           r.strength as strength, r.evidence as evidence
+                           {strength} as strength, r.evidence as evidence
                     """,
-                    {"name": entity_name},
+                    {"name": entity_name, **self.decay_params()},
                 )
 
                 while result.has_next():
@@ -579,12 +2076,12 @@ class GraphStore:
 
                 # 获取入边关系
                 result = self.conn.execute(
-                    """
-                    MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity {name: $name})
+                    f"""
+                    MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity {{name: $name}})
                     RETURN e1.name as from, e2.name as to, r.relation as relation,
-                           r.strength as strength, r.evidence as evidence
+                           {strength} as strength, r.evidence as evidence
                     """,
-                    {"name": entity_name},
+                    {"name": entity_name, **self.decay_params()},
                 )
 
                 while result.has_next():
@@ -605,15 +2102,97 @@ class GraphStore:
 
         return await self._execute_in_thread(_get_relations)
 
+    async def get_relations_for_entities(
+        self,
+        names: list[str],
+        per_entity_limit: int = 3,
+    ) -> dict[str, tuple[list[dict], int]]:
+        """批量获取多个实体的主要关系
+
+        在邻接表上按有效强度排序和计数（每个实体 O(度数)），
+        再用一次查询只读取选中关系的类型和证据。
+
+        Args:
+            names: 实体名称列表
+            per_entity_limit: 每个实体返回的关系数量（按有效强度降序）
+
+        Returns:
+            {实体名称: (关系列表, 关系总数)}，关系格式与 get_entity_relations 相同
+        """
+        # 别名解析后的名称 -> 调用方传入的名称
+        requested = {self.resolve_name(name): name for name in names}
+
+        def _get_relations():
+            try:
+                if not requested:
+                    return {}
+                adjacency = self._get_adjacency()
+                now = datetime.now(timezone.utc).timestamp()
+
+                selected: dict[str, tuple[list[tuple], int]] = {}
+                for resolved, name in requested.items():
+                    incident = adjacency.incident_edges(resolved)
+                    ranked = sorted(
+                        (
+                            (a, b, self._effective_strength_at(strength, reference, now),
+                             "outgoing" if a == resolved else "incoming")
+                            for a, b, _, strength, reference in incident
+                        ),
+                        key=lambda edge: edge[2],
+                        reverse=True,
+                    )
+                    selected[name] = (ranked[:per_entity_limit], len(incident))
+
+                pairs = {(a, b) for edges, _ in selected.values() for a, b, _, _ in edges}
+                details = {}
+                if pairs:
+                    result = self.conn.execute(
+                        """
+                        UNWIND $pairs AS pair
+                        MATCH (e1:Entity {name: pair.src})-[r:RELATED_TO]->(e2:Entity {name: pair.dst})
+                        RETURN e1.name, e2.name, r.relation, r.evidence
+                        """,
+                        {"pairs": [{"src": a, "dst": b} for a, b in pairs]},
+                    )
+                    while result.has_next():
+                        row = result.get_next()
+                        details[(row[0], row[1])] = (row[2], row[3])
+
+                return {
+                    name: (
+                        [
+                            {
+                                "from": a,
+                                "to": b,
+                                "relation": details[(a, b)][0],
+                                "strength": strength,
+                                "evidence": details[(a, b)][1],
+                                "direction": direction,
+                            }
+                            for a, b, strength, direction in edges
+                            if (a, b) in details
+                        ],
+                        total,
+                    )
+                    for name, (edges, total) in selected.items()
+                }
+            except Exception as e:
+                logger.error(f"[GraphMemory] 批量获取实体关系失败: {e}", exc_info=True)
+                return {}
+
+        return await self._execute_in_thread(_get_relations)
+
     async def delete_entity(self, entity_name: str) -> tuple[bool, int]:
         """删除实体及其所有关系
 
         Args:
-            entity_name: 实体名称
+            entity_name: 实体名称（合并前的旧名称删除的是合并后的实体）
 
         Returns:
             (是否成功, 删除的关系数量)
         """
+        entity_name = self.resolve_name(entity_name)
+
         def _delete():
             try:
                 # 统计关系数量
@@ -634,6 +2213,21 @@ class GraphStore:
                     """,
                     {"name": entity_name},
                 )
+                self._unindex_entities([entity_name])
+                self.embeddings.remove([entity_name])
+                self._adjacency.remove_nodes([entity_name])
+                self._mark_written()
+
+                # 删除指向该实体的别名
+                self.conn.execute(
+                    "MATCH (a:EntityAlias {canonical: $name}) DELETE a",
+                    {"name": entity_name},
+                )
+                self._aliases = {
+                    alias: canonical
+                    for alias, canonical in self._aliases.items()
+                    if canonical != entity_name
+                }
 
                 logger.info(f"[GraphMemory] 删除实体 '{entity_name}' 及其 {relation_count} 条关系")
                 return True, relation_count
@@ -643,6 +2237,126 @@ class GraphStore:
 
         return await self._execute_in_thread(_delete)
 
+    # 导出格式版本
+    EXPORT_VERSION = "0.4.0"
+
+    async def iter_export(
+        self, persona_id: str | None = None, include_embeddings: bool = False
+    ) -> AsyncIterator[dict]:
+        """分块流式导出图谱
+
+        按节点偏移范围分块读取，每块单独提交到执行器，内存占用与图谱大小无关。
+        块之间可能插入写操作，因此导出结果不是严格的时间点快照。
+
+        Args:
+            persona_id: 人格ID过滤（可选），只导出在该人格会话中被提及的实体及其之间的关系
+            include_embeddings: 实体记录是否带 embedding 字段（向量列表）
+
+        Yields:
+            记录字典，kind 字段为 meta / entity / relation / session，第一条为 meta
+        """
+        params = {"persona_id": persona_id} if persona_id else {}
+
+        def in_persona(var: str) -> str:
+            if not persona_id:
+                return "true"
+            return f"EXISTS {{ MATCH ({var})-[:MENTIONED_IN]->(:Session {{persona_id: $persona_id}}) }}"
+
+        embedding_column = ", e.embedding" if include_embeddings else ""
+
+        def _entities(start: int, end: int) -> list[dict]:
+            result = self.conn.execute(
+                f"""
+                MATCH (e:Entity)
+                WHERE offset(ID(e)) >= $chunk_start AND offset(ID(e)) < $chunk_end AND {in_persona("e")}
+                RETURN e.name, e.type, e.description, e.importance,
+                       e.last_decay_reference, e.access_count{embedding_column}
+                """,
+                {"chunk_start": start, "chunk_end": end, **params},
+            )
+            records = []
+            while result.has_next():
+                row = result.get_next()
+                record = {
+                    "kind": "entity",
+                    "name": row[0],
+                    "type": row[1],
+                    "description": row[2],
+                    "importance": self.effective_value(row[3], row[4]),
+                    "access_count": row[5] or 0,
+                }
+                if include_embeddings:
+                    record["embedding"] = row[6]
+                records.append(record)
+            return records
+
+        def _relations(start: int, end: int) -> list[dict]:
+            result = self.conn.execute(
+                f"""
+                MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
+                WHERE offset(ID(e1)) >= $chunk_start AND offset(ID(e1)) < $chunk_end
+                  AND {in_persona("e1")} AND {in_persona("e2")}
+                RETURN e1.name, e2.name, r.relation, r.strength, r.last_decay_reference, r.evidence
+                """,
+                {"chunk_start": start, "chunk_end": end, **params},
+            )
+            records = []
+            while result.has_next():
+                row = result.get_next()
+                records.append({
+                    "kind": "relation",
+                    "from": row[0],
+                    "to": row[1],
+                    "relation": row[2],
+                    "strength": self.effective_value(row[3], row[4]),
+                    "evidence": row[5],
+                })
+            return records
+
+        def _sessions(start: int, end: int) -> list[dict]:
+            persona_filter = "AND s.persona_id = $persona_id" if persona_id else ""
+            result = self.conn.execute(
+                f"""
+                MATCH (s:Session)
+                WHERE offset(ID(s)) >= $chunk_start AND offset(ID(s)) < $chunk_end {persona_filter}
+                RETURN s.id, s.name, s.type, s.persona_id
+                """,
+                {"chunk_start": start, "chunk_end": end, **params},
+            )
+            records = []
+            while result.has_next():
+                row = result.get_next()
+                records.append({
+                    "kind": "session",
+                    "id": row[0],
+                    "name": row[1],
+                    "type": row[2],
+                    "persona_id": row[3] or "default",
+                })
+            return records
+
+        yield {
+            "kind": "meta",
+            "version": self.EXPORT_VERSION,
+            "persona_id": persona_id,
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+        for label, fetch in (("Entity", _entities), ("Entity", _relations), ("Session", _sessions)):
+            bound = await self._execute_in_thread(self._offset_bound, label)
+            for start in range(0, bound, self.chunk_size):
+                for record in await self._execute_in_thread(fetch, start, start + self.chunk_size):
+                    yield record
+
+    def iter_export_ndjson(self, persona_id: str | None = None, compress: bool = False) -> AsyncIterator[bytes]:
+        """以 NDJSON 字节块流式导出图谱，可直接作为 StreamingResponse 的内容
+
+        Args:
+            persona_id: 人格ID过滤（可选）
+            compress: 是否 gzip 压缩
+        """
+        return iter_ndjson(self.iter_export(persona_id), compress)
+
     async def export_graph(self, persona_id: str | None = None) -> dict:
         """导出图谱数据
 
@@ -652,90 +2366,456 @@ class GraphStore:
         Returns:
             图谱数据字典
         """
-        def _export():
-            try:
-                data = {
-                    "version": "0.4.0",
-                    "entities": [],
-                    "relations": [],
-                    "sessions": [],
-                }
+        try:
+            data = {
+                "version": self.EXPORT_VERSION,
+                "entities": [],
+                "relations": [],
+                "sessions": [],
+            }
+            sections = {"entity": "entities", "relation": "relations", "session": "sessions"}
+            async for record in self.iter_export(persona_id):
+                kind = record.pop("kind")
+                if kind in sections:
+                    data[sections[kind]].append(record)
+            return data
+        except Exception as e:
+            logger.error(f"[GraphMemory] 导出图谱失败: {e}", exc_info=True)
+            return {}
+
+    # ==================== 批量导入 ====================
+
+    # COPY FROM 暂存 CSV 的选项（描述中可能含换行，需关闭并行读取）
+    COPY_OPTIONS = "(header=true, parallel=false, escape='\"')"
+
+    # 冲突行每次 UNWIND MERGE 的行数
+    MERGE_BATCH_SIZE = 500
+
+    # 批量导入写入的实体列 / 关系属性列（关系 CSV 前两列为起点、终点名称）
+    ENTITY_IMPORT_COLUMNS = (
+        "name", "type", "description", "embedding", "importance",
+        "created_at", "last_accessed", "access_count", "updated_at", "last_decay_reference",
+    )
+    RELATION_IMPORT_COLUMNS = (
+        "relation", "strength", "evidence", "created_at", "last_updated", "last_decay_reference",
+    )
+
+    @staticmethod
+    def _csv_value(value):
+        """转换为 COPY FROM 可解析的 CSV 字段（None 为空字段，即 NULL）"""
+        if value is None:
+            return ""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, (list, tuple)):
+            return "[" + ",".join(repr(float(v)) for v in value) + "]"
+        return value
+
+    def _copy_rows(self, table: str, columns: tuple[str, ...], header: tuple[str, ...], rows: list[tuple], staging_dir: Path):
+        """把行写入暂存 CSV 并用 COPY FROM 载入（需在执行器线程中调用）
+
+        COPY 在单个事务中完成，失败时不会留下部分数据。
 
-                # 导出实体
-                if persona_id:
-                    # 只导出指定人格相关的实体
-                    result = self.conn.execute(
-                        """
-                        MATCH (e:Entity)-[:MENTIONED_IN]->(s:Session {persona_id: $persona_id})
-                        RETURN DISTINCT e
-                        """,
-                        {"persona_id": persona_id},
+        Args:
+            table: 表名
+            columns: COPY 写入的列
+            header: CSV 表头（关系表在 columns 前多出起点、终点两列）
+            rows: 与 header 对应的行
+            staging_dir: 暂存目录
+        """
+        path = staging_dir / f"{table}_{uuid.uuid4().hex}.csv"
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                for row in rows:
+                    writer.writerow([self._csv_value(value) for value in row])
+            self.conn.execute(
+                f"COPY {table}({', '.join(columns)}) FROM '{path.as_posix()}' {self.COPY_OPTIONS}"
+            )
+        finally:
+            path.unlink(missing_ok=True)
+
+    def _existing_entity_names(self, names: list[str]) -> set[str]:
+        """查询已存在的实体名称（需在执行器线程中调用）"""
+        result = self.conn.execute(
+            "MATCH (e:Entity) WHERE e.name IN $names RETURN e.name", {"names": names}
+        )
+        existing = set()
+        while result.has_next():
+            existing.add(result.get_next()[0])
+        return existing
+
+    def _merge_entity_rows(self, rows: list[dict], merge: bool, now: datetime):
+        """用 UNWIND + MERGE 批量写入实体（需在执行器线程中调用）
+
+        merge=True 时已有实体保留描述和向量，重要性、访问次数取两者较大值；
+        merge=False 时用导入的数据覆盖。
+        """
+        if merge:
+            importance = self.decay_expr("e.importance", "e.last_decay_reference")
+            on_match = f"""
+                e.importance = CASE WHEN {importance} > row.importance THEN {importance} ELSE row.importance END,
+                e.access_count = CASE WHEN e.access_count > row.access_count THEN e.access_count ELSE row.access_count END,
+                e.last_decay_reference = $now
+            """
+            params = {"rows": rows, "now": now, **self.decay_params()}
+        else:
+            on_match = """
+                e.type = row.type,
+                e.description = row.description,
+                e.embedding = row.embedding,
+                e.importance = row.importance,
+                e.access_count = row.access_count,
+                e.updated_at = $now,
+                e.last_decay_reference = $now
+            """
+            params = {"rows": rows, "now": now}
+
+        self.conn.execute(
+            f"""
+            UNWIND $rows AS row
+            MERGE (e:Entity {{name: row.name}})
+            ON CREATE SET
+                e.type = row.type,
+                e.description = row.description,
+                e.embedding = row.embedding,
+                e.importance = row.importance,
+                e.created_at = row.created_at,
+                e.last_accessed = row.last_accessed,
+                e.access_count = row.access_count,
+                e.updated_at = $now,
+                e.last_decay_reference = $now
+            ON MATCH SET {on_match}
+            """,
+            params,
+        )
+
+    def _merge_relation_rows(self, rows: list[dict], merge: bool, now: datetime):
+        """用 UNWIND + MERGE 批量写入关系（需在执行器线程中调用）
+
+        merge=True 时已有关系保留描述和证据，强度取两者较大值；
+        merge=False 时用导入的数据覆盖。
+        """
+        if merge:
+            strength = self.decay_expr("r.strength", "r.last_decay_reference")
+            on_match = f"""
+                r.strength = CASE WHEN {strength} > row.strength THEN {strength} ELSE row.strength END,
+                r.last_decay_reference = $now
+            """
+            params = {"rows": rows, "now": now, **self.decay_params()}
+        else:
+            on_match = """
+                r.relation = row.relation,
+                r.strength = row.strength,
+                r.evidence = row.evidence,
+                r.last_updated = $now,
+                r.last_decay_reference = $now
+            """
+            params = {"rows": rows, "now": now}
+
+        self.conn.execute(
+            f"""
+            UNWIND $rows AS row
+            MATCH (e1:Entity {{name: row.from_name}}), (e2:Entity {{name: row.to_name}})
+            MERGE (e1)-[r:RELATED_TO]->(e2)
+            ON CREATE SET
+                r.relation = row.relation,
+                r.strength = row.strength,
+                r.evidence = row.evidence,
+                r.created_at = row.created_at,
+                r.last_updated = row.last_updated,
+                r.last_decay_reference = $now
+            ON MATCH SET {on_match}
+            """,
+            params,
+        )
+
+    async def _import_entity_batch(self, records: list[dict], merge: bool, staging_dir: Path, stats: dict):
+        """导入一批实体记录"""
+        now = datetime.now(timezone.utc)
+
+        # 按解析后的名称去重（同名记录后者覆盖前者）
+        rows: dict[str, dict] = {}
+        for record in records:
+            if not record.get("name"):
+                stats["skipped"] += 1
+                continue
+            name = self.resolve_name(record["name"])
+            rows[name] = {
+                "name": name,
+                "type": record.get("type") or "",
+                "description": record.get("description") or "",
+                "embedding": record.get("embedding"),
+                "importance": float(record.get("importance", 1.0)),
+                "created_at": now,
+                "last_accessed": now,
+                "access_count": int(record.get("access_count") or 0),
+            }
+
+        def _existing() -> set[str]:
+            for name in rows:
+                if self.cold_store is not None and name in self.cold_store:
+                    self._rehydrate(name, now)
+            return self._existing_entity_names(list(rows))
+
+        existing = await self._execute_in_thread(_existing)
+
+        # 只有会写入向量的行才需要向量: 新实体，或覆盖模式下的已有实体。
+        # 导入数据中维度匹配的向量直接使用，其余才调用嵌入模型
+        for name, row in rows.items():
+            if merge and name in existing:
+                # 合并模式不改写已有实体的向量，占位以保持参数类型一致
+                row["embedding"] = [0.0] * self.embedding_dim
+                continue
+            embedding = row["embedding"]
+            if embedding is not None and len(embedding) == self.embedding_dim:
+                row["embedding"] = [float(v) for v in embedding]
+                stats["embeddings_reused"] += 1
+                continue
+            row["embedding"] = None
+            if self.embedding_provider and row["description"]:
+                try:
+                    row["embedding"] = await self.embedding_provider.get_embedding(row["description"])
+                    stats["embeddings_computed"] += 1
+                except Exception as e:
+                    logger.warning(f"[GraphMemory] 生成 embedding 失败: {e}")
+            if not row["embedding"]:
+                row["embedding"] = [0.0] * self.embedding_dim
+
+        new_rows = [row for name, row in rows.items() if name not in existing]
+        conflict_rows = [row for name, row in rows.items() if name in existing]
+
+        def _load():
+            merge_rows = conflict_rows
+            if new_rows:
+                try:
+                    self._copy_rows(
+                        "Entity",
+                        self.ENTITY_IMPORT_COLUMNS,
+                        self.ENTITY_IMPORT_COLUMNS,
+                        [
+                            (
+                                row["name"], row["type"], row["description"], row["embedding"],
+                                row["importance"], row["created_at"], row["last_accessed"],
+                                row["access_count"], now, now,
+                            )
+                            for row in new_rows
+                        ],
+                        staging_dir,
+                    )
+                    stats["copied"] += len(new_rows)
+                except Exception as e:
+                    logger.warning(f"[GraphMemory] COPY 导入实体失败，改用批量 MERGE: {e}")
+                    merge_rows = conflict_rows + new_rows
+
+            for start in range(0, len(merge_rows), self.MERGE_BATCH_SIZE):
+                self._merge_entity_rows(merge_rows[start:start + self.MERGE_BATCH_SIZE], merge, now)
+            stats["merged"] += len(merge_rows)
+
+            written = [row for row in rows.values() if not (merge and row["name"] in existing)]
+            self.embeddings.upsert_many([(row["name"], row["embedding"]) for row in written])
+            self._index_entities(list(rows))
+
+        await self._execute_in_thread(_load)
+        stats["entities"] += len(rows)
+
+    async def _import_relation_batch(self, records: list[dict], merge: bool, staging_dir: Path, stats: dict):
+        """导入一批关系记录（端点实体不存在的关系会被跳过）"""
+        now = datetime.now(timezone.utc)
+
+        rows: dict[tuple[str, str], dict] = {}
+        for record in records:
+            if not record.get("from") or not record.get("to"):
+                stats["skipped"] += 1
+                continue
+            key = (self.resolve_name(record["from"]), self.resolve_name(record["to"]))
+            rows[key] = {
+                "from_name": key[0],
+                "to_name": key[1],
+                "relation": record.get("relation") or "",
+                "strength": float(record.get("strength", 1.0)),
+                "evidence": record.get("evidence") or "",
+                "created_at": now,
+                "last_updated": now,
+            }
+
+        def _load():
+            endpoints = self._existing_entity_names(list({name for key in rows for name in key}))
+            valid = {key: row for key, row in rows.items() if key[0] in endpoints and key[1] in endpoints}
+            stats["skipped"] += len(rows) - len(valid)
+            if not valid:
+                return
+
+            result = self.conn.execute(
+                """
+                MATCH (e1:Entity)-[:RELATED_TO]->(e2:Entity)
+                WHERE e1.name IN $from_names AND e2.name IN $to_names
+                RETURN e1.name, e2.name
+                """,
+                {
+                    "from_names": list({key[0] for key in valid}),
+                    "to_names": list({key[1] for key in valid}),
+                },
+            )
+            existing = set()
+            while result.has_next():
+                existing.add(tuple(result.get_next()))
+
+            new_rows = [row for key, row in valid.items() if key not in existing]
+            merge_rows = [row for key, row in valid.items() if key in existing]
+            if new_rows:
+                try:
+                    self._copy_rows(
+                        "RELATED_TO",
+                        self.RELATION_IMPORT_COLUMNS,
+                        ("from", "to") + self.RELATION_IMPORT_COLUMNS,
+                        [
+                            (
+                                row["from_name"], row["to_name"], row["relation"], row["strength"],
+                                row["evidence"], row["created_at"], row["last_updated"], now,
+                            )
+                            for row in new_rows
+                        ],
+                        staging_dir,
                     )
-                else:
-                    # 导出所有实体
-                    result = self.conn.execute("MATCH (e:Entity) RETURN e")
+                    stats["copied"] += len(new_rows)
+                except Exception as e:
+                    logger.warning(f"[GraphMemory] COPY 导入关系失败，改用批量 MERGE: {e}")
+                    merge_rows = merge_rows + new_rows
 
-                while result.has_next():
-                    row = result.get_next()
-                    e = row[0]
-                    data["entities"].append({
-                        "name": e["name"],
-                        "type": e["type"],
-                        "description": e["description"],
-                        "importance": e.get("importance", 1.0),
-                        "access_count": e.get("access_count", 0),
-                    })
+            for start in range(0, len(merge_rows), self.MERGE_BATCH_SIZE):
+                self._merge_relation_rows(merge_rows[start:start + self.MERGE_BATCH_SIZE], merge, now)
+            stats["merged"] += len(merge_rows)
+            stats["relations"] += len(valid)
+            self._adjacency_stale = True
 
-                # 导出关系
-                entity_names = [e["name"] for e in data["entities"]]
-                if entity_names:
-                    result = self.conn.execute(
-                        """
-                        MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
-                        WHERE e1.name IN $names AND e2.name IN $names
-                        RETURN e1.name, e2.name, r.relation, r.strength, r.evidence
-                        """,
-                        {"names": entity_names},
-                    )
+        await self._execute_in_thread(_load)
 
-                    while result.has_next():
-                        row = result.get_next()
-                        data["relations"].append({
-                            "from": row[0],
-                            "to": row[1],
-                            "relation": row[2],
-                            "strength": row[3],
-                            "evidence": row[4],
-                        })
-
-                # 导出会话信息（可选）
-                if persona_id:
-                    result = self.conn.execute(
-                        """
-                        MATCH (s:Session {persona_id: $persona_id})
-                        RETURN s
-                        """,
-                        {"persona_id": persona_id},
-                    )
-                else:
-                    result = self.conn.execute("MATCH (s:Session) RETURN s")
+    async def bulk_import(
+        self,
+        records: Iterable[dict],
+        merge: bool = True,
+        batch_size: int | None = None,
+        progress: dict | None = None,
+        on_batch: Callable[[dict], None] | None = None,
+    ) -> dict[str, int]:
+        """批量导入图谱记录
 
-                while result.has_next():
-                    row = result.get_next()
-                    s = row[0]
-                    data["sessions"].append({
-                        "id": s["id"],
-                        "name": s["name"],
-                        "type": s["type"],
-                        "persona_id": s.get("persona_id", "default"),
-                    })
+        记录按批累积: 新实体和新关系写入暂存 CSV 后用 COPY FROM 一次性载入，
+        与已有数据冲突的行（以及 COPY 失败的批次）改用 UNWIND + MERGE 批量写入。
+        记录中维度匹配的 embedding 会直接使用，不再重新调用嵌入模型。
 
-                return data
-            except Exception as e:
-                logger.error(f"[GraphMemory] 导出图谱失败: {e}", exc_info=True)
-                return {}
+        关系的端点实体必须已存在或在之前的记录中出现（导出文件中实体排在关系之前），
+        否则该关系被跳过。会话记录暂不导入。
 
-        return await self._execute_in_thread(_export)
+        Args:
+            records: 带 kind 字段的记录（entity / relation，其余类型忽略），
+                     格式与 iter_export 的输出一致
+            merge: 是否合并（True）或覆盖（False）已有的实体和关系
+            batch_size: 每批记录数，默认为 chunk_size
+            progress: 进度字典（原地更新）；默认记录到 maintenance_progress["bulk_import"]。
+                      其中 committed_records 为已提交的输入记录数（含被忽略的记录），
+                      从该位置重新导入即可续跑；有批次失败时停在失败前最后一次全部写完的位置，
+                      之后的批次仍会写入，续跑时按合并 / 覆盖规则重新写入一遍。
+                      committed_stats 为这些已提交记录的统计，续跑时与新的统计相加不会重复计数
+            on_batch: 每批提交后以进度字典调用的回调
+
+        Returns:
+            统计信息: entities / relations（导入数）、copied（COPY 载入行数）、
+            merged（MERGE 写入行数）、skipped（跳过的记录数）、
+            embeddings_reused / embeddings_computed（复用 / 重新计算的向量数）
+        """
+        batch_size = batch_size or self.chunk_size
+        stats = {
+            "entities": 0,
+            "relations": 0,
+            "copied": 0,
+            "merged": 0,
+            "skipped": 0,
+            "embeddings_reused": 0,
+            "embeddings_computed": 0,
+        }
+        if progress is None:
+            progress = {}
+            self.maintenance_progress["bulk_import"] = progress
+        progress.update({
+            "task": "bulk_import",
+            "status": "running",
+            "completed_chunks": 0,
+            "failed_chunks": 0,
+            "processed": 0,
+            "committed_records": 0,
+            "committed_stats": dict(stats),
+            "chunk_timings_ms": [],
+            "started_at": time.time(),
+            "finished_at": None,
+            **stats,
+        })
+
+        staging_root = self.db_path.parent / "staging"
+        staging_root.mkdir(parents=True, exist_ok=True)
+        pending: dict[str, list[dict]] = {"entity": [], "relation": []}
+        # 出现失败批次后，已提交的记录数不再推进
+        failed = False
+        consumed = 0
+        loaders = {"entity": self._import_entity_batch, "relation": self._import_relation_batch}
+
+        async def flush(kind: str):
+            batch = pending[kind]
+            if not batch:
+                return
+            nonlocal failed
+            pending[kind] = []
+            chunk_start = time.perf_counter()
+            try:
+                await loaders[kind](batch, merge, staging_dir, stats)
+            except Exception as e:
+                progress["failed_chunks"] += 1
+                failed = True
+                logger.error(f"[GraphMemory] 批量导入 {kind} 批次失败: {e}", exc_info=True)
+            self._mark_written()
+            progress["completed_chunks"] += 1
+            progress["processed"] += len(batch)
+            progress.update(stats)
+            if not failed and not any(pending.values()):
+                # 之前的记录全部写入，统计与已提交的记录一一对应
+                progress["committed_records"] = consumed
+                progress["committed_stats"] = dict(stats)
+            timings = progress["chunk_timings_ms"]
+            timings.append(round((time.perf_counter() - chunk_start) * 1000, 2))
+            del timings[:-100]
+            if on_batch is not None:
+                on_batch(progress)
+            await asyncio.sleep(self.chunk_pause)
+
+        with tempfile.TemporaryDirectory(dir=staging_root) as staging:
+            staging_dir = Path(staging)
+            for record in records:
+                consumed += 1
+                kind = record.get("kind")
+                if kind not in pending:
+                    continue
+                pending[kind].append(record)
+                if len(pending[kind]) >= batch_size:
+                    # 关系依赖实体，先写入已累积的实体；两类一起写入，
+                    # 这样每轮写完后没有跨越已提交位置的批次
+                    await flush("entity")
+                    await flush("relation")
+            await flush("entity")
+            await flush("relation")
+
+        if not failed:
+            progress["committed_records"] = consumed
+            progress["committed_stats"] = dict(stats)
+        self.invalidate_communities()
+        progress["status"] = "failed" if progress["failed_chunks"] else "completed"
+        progress["finished_at"] = time.time()
+        logger.info(
+            f"[GraphMemory] 批量导入完成: {stats['entities']} 个实体, {stats['relations']} 条关系 "
+            f"(COPY {stats['copied']}, MERGE {stats['merged']}, 跳过 {stats['skipped']})"
+        )
+        return stats
 
     async def import_graph(self, data: dict, merge: bool = True) -> tuple[int, int]:
         """导入图谱数据
@@ -747,37 +2827,14 @@ class GraphStore:
         Returns:
             (导入的实体数, 导入的关系数)
         """
-        entity_count = 0
-        relation_count = 0
-
         try:
-            # 导入实体
-            for entity_data in data.get("entities", []):
-                entity = EntityNode(
-                    name=entity_data["name"],
-                    type=entity_data["type"],
-                    description=entity_data["description"],
-                    importance=entity_data.get("importance", 1.0),
-                    access_count=entity_data.get("access_count", 0),
-                )
-                if await self.add_entity(entity):
-                    entity_count += 1
-
-            # 导入关系
-            for relation_data in data.get("relations", []):
-                relation = RelatedToRel(
-                    from_entity=relation_data["from"],
-                    to_entity=relation_data["to"],
-                    relation=relation_data["relation"],
-                    strength=relation_data.get("strength", 1.0),
-                    evidence=relation_data.get("evidence", ""),
-                )
-                if await self.add_relation(relation):
-                    relation_count += 1
-
-            logger.info(f"[GraphMemory] 导入完成: {entity_count} 个实体, {relation_count} 条关系")
-            return entity_count, relation_count
+            records = itertools.chain(
+                ({**entity, "kind": "entity"} for entity in data.get("entities", [])),
+                ({**relation, "kind": "relation"} for relation in data.get("relations", [])),
+            )
+            stats = await self.bulk_import(records, merge)
+            return stats["entities"], stats["relations"]
 
         except Exception as e:
             logger.error(f"[GraphMemory] 导入图谱失败: {e}", exc_info=True)
-            return entity_count, relation_count
+            return 0, 0
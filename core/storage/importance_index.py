@@ -0,0 +1,121 @@
+"""实体重要性内存索引模块"""
+
+import bisect
+import math
+from datetime import datetime, timezone
+
+
+class ImportanceIndex:
+    """按有效重要性排序的实体名称索引
+
+    有效重要性 = importance * rate ^ ((now - reference) / interval)，
+    取对数后可拆成与当前时间无关的排序键:
+
+        key = ln(importance) - (reference / interval) * ln(rate)
+
+    因此索引顺序不随时间变化，只在写入时更新；
+    衰减压缩（写回有效值并重置基准时间）不改变排序键。
+
+    注意: 所有方法都应在 GraphStore 的执行器线程中调用。
+    """
+
+    def __init__(self, decay_rate: float, decay_interval: float):
+        self.decay_rate = decay_rate
+        self.decay_interval = decay_interval
+        self._keys: dict[str, float] = {}
+        # 按 (key, name) 升序排列
+        self._sorted: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._keys
+
+    def _log_rate(self) -> float:
+        return math.log(self.decay_rate) if 0 < self.decay_rate < 1 else 0.0
+
+    def _key(self, importance: float | None, reference: datetime | None) -> float:
+        """计算排序键"""
+        if importance is None or importance <= 0:
+            return -math.inf
+        if reference is None:
+            reference = datetime.now(timezone.utc)
+        elif reference.tzinfo is None:
+            reference = reference.replace(tzinfo=timezone.utc)
+        return math.log(importance) - reference.timestamp() / self.decay_interval * self._log_rate()
+
+    def _threshold_key(self, threshold: float) -> float:
+        """有效重要性阈值在当前时间对应的排序键"""
+        if threshold <= 0:
+            return -math.inf
+        now = datetime.now(timezone.utc).timestamp()
+        return math.log(threshold) - now / self.decay_interval * self._log_rate()
+
+    def rebuild(self, rows: list[tuple[str, float | None, datetime | None]]):
+        """从 (名称, 存储重要性, 衰减基准时间) 列表重建索引"""
+        self._keys = {name: self._key(importance, reference) for name, importance, reference in rows}
+        self._sorted = sorted((key, name) for name, key in self._keys.items())
+
+    def update(self, name: str, importance: float | None, reference: datetime | None):
+        """插入或更新实体"""
+        self.remove(name)
+        key = self._key(importance, reference)
+        self._keys[name] = key
+        bisect.insort(self._sorted, (key, name))
+
+    def key_of(self, name: str) -> float:
+        """实体的排序键（不在索引中时为 -inf），可直接比较有效重要性的高低"""
+        return self._keys.get(name, -math.inf)
+
+    def rank(self, name: str) -> int | None:
+        """实体按有效重要性从高到低的名次（0 为最高），不在索引中时为 None"""
+        key = self._keys.get(name)
+        if key is None:
+            return None
+        return len(self._sorted) - 1 - bisect.bisect_left(self._sorted, (key, name))
+
+    def remove(self, name: str):
+        """移除实体"""
+        key = self._keys.pop(name, None)
+        if key is None:
+            return
+        pos = bisect.bisect_left(self._sorted, (key, name))
+        if pos < len(self._sorted) and self._sorted[pos] == (key, name):
+            del self._sorted[pos]
+
+    def below(self, threshold: float) -> list[str]:
+        """有效重要性低于阈值的实体名称（从低到高）"""
+        pos = bisect.bisect_left(self._sorted, (self._threshold_key(threshold), ""))
+        return [name for _, name in self._sorted[:pos]]
+
+    def top(
+        self,
+        limit: int,
+        offset: int = 0,
+        min_importance: float = 0.0,
+        after: tuple[float, str] | None = None,
+    ) -> list[str]:
+        """有效重要性最高的实体名称（从高到低）
+
+        Args:
+            limit: 返回数量
+            offset: 跳过的数量
+            min_importance: 最小有效重要性
+            after: 游标 (排序键, 名称)，只返回排在其后的实体
+
+        Returns:
+            实体名称列表
+        """
+        low = bisect.bisect_left(self._sorted, (self._threshold_key(min_importance), ""))
+        end = len(self._sorted) if after is None else bisect.bisect_left(self._sorted, after)
+        end -= offset
+        start = max(low, end - limit)
+        if end <= start:
+            return []
+        return [name for _, name in reversed(self._sorted[start:end])]
+
+    def count(self, min_importance: float = 0.0) -> int:
+        """有效重要性不低于 min_importance 的实体数量"""
+        low = bisect.bisect_left(self._sorted, (self._threshold_key(min_importance), ""))
+        return len(self._sorted) - low
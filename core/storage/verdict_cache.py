@@ -0,0 +1,112 @@
+"""实体合并判定缓存模块"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+from astrbot.api import logger
+
+from ..models import EntityNode
+
+
+def make_pair_key(entity1: EntityNode, entity2: EntityNode) -> str:
+    """生成实体对的缓存键
+
+    由双方的名称和描述哈希组成，与顺序无关；
+    任意一方的描述变化后键随之变化，会重新判定。
+    """
+    digests = sorted(
+        hashlib.sha1(f"{e.name}\x00{e.description}".encode()).hexdigest()
+        for e in (entity1, entity2)
+    )
+    return ":".join(digests)
+
+
+class MergeVerdictCache:
+    """实体合并判定缓存
+
+    使用 SQLite 持久化 LLM 的合并判定（包括否定结果），
+    避免每个消歧周期重复询问相同的实体对。
+    同时记录增量消歧的水位线（上次消歧开始的时间）。
+    """
+
+    def __init__(self, data_path: Path):
+        self._db_path = data_path / "merge_verdicts.db"
+        self._init_db()
+
+    def _init_db(self):
+        """初始化 SQLite 数据库"""
+        with sqlite3.connect(self._db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS merge_verdicts (
+                    pair_key TEXT PRIMARY KEY,
+                    verdict INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS disambiguation_state (
+                    key TEXT PRIMARY KEY,
+                    value REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            logger.debug("[GraphMemory] 合并判定缓存初始化完成")
+
+    def get_many(self, keys: list[str]) -> dict[str, bool]:
+        """批量查询判定结果"""
+        verdicts = {}
+        if not keys:
+            return verdicts
+
+        with sqlite3.connect(self._db_path) as conn:
+            # SQLite 参数数量有限制，分批查询
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT pair_key, verdict FROM merge_verdicts WHERE pair_key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                verdicts.update({key: bool(verdict) for key, verdict in rows})
+        return verdicts
+
+    def put_many(self, verdicts: dict[str, bool]):
+        """批量写入判定结果"""
+        if not verdicts:
+            return
+
+        now = time.time()
+        with sqlite3.connect(self._db_path) as conn:
+            conn.executemany(
+                """
+                INSERT INTO merge_verdicts (pair_key, verdict, created_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(pair_key) DO UPDATE SET
+                    verdict = excluded.verdict,
+                    created_at = excluded.created_at
+                """,
+                [(key, int(verdict), now) for key, verdict in verdicts.items()],
+            )
+            conn.commit()
+
+    def get_watermark(self) -> float | None:
+        """获取增量消歧水位线（Unix 时间戳），从未运行过返回 None"""
+        with sqlite3.connect(self._db_path) as conn:
+            row = conn.execute(
+                "SELECT value FROM disambiguation_state WHERE key = 'watermark'"
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, timestamp: float):
+        """更新增量消歧水位线"""
+        with sqlite3.connect(self._db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO disambiguation_state (key, value) VALUES ('watermark', ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                """,
+                (timestamp,),
+            )
+            conn.commit()
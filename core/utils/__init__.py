@@ -1,12 +1,59 @@
 """工具层
 
 包含:
+- embedding_sidecar: 导出向量的 .npy 旁路文件
+- graph_ops: 子图打分（个性化 PageRank）、社区发现（标签传播）、力导向布局
+- json_utils: LLM 输出的 JSON 解析
+- ndjson: NDJSON 流式读写
 - prompts: Prompt 模板
+- union_find: 并查集
+- vector_ops: 向量化相似度计算
 """
 
-from .prompts import EXTRACTION_PROMPT, QUERY_REWRITING_PROMPT
+from .embedding_sidecar import (
+    SIDECAR_DTYPES,
+    attach_embeddings,
+    sidecar_path,
+    write_ndjson_with_embeddings,
+)
+from .graph_ops import force_layout, label_propagation, personalized_pagerank
+from .json_utils import find_json_blob
+from .ndjson import iter_ndjson, read_ndjson, write_ndjson
+from .prompts import EXTRACTION_PROMPT, MERGE_VERIFICATION_PROMPT, QUERY_REWRITING_PROMPT
+from .union_find import UnionFind
+from .vector_ops import (
+    QuantizedMatrix,
+    blocked_query_pairs,
+    blocked_similar_pairs,
+    dequantize_int8,
+    quantize_int8,
+    rescore_pairs,
+    search_top_k,
+    to_normalized_matrix,
+)
 
 __all__ = [
     "EXTRACTION_PROMPT",
+    "MERGE_VERIFICATION_PROMPT",
     "QUERY_REWRITING_PROMPT",
+    "QuantizedMatrix",
+    "SIDECAR_DTYPES",
+    "UnionFind",
+    "attach_embeddings",
+    "find_json_blob",
+    "iter_ndjson",
+    "read_ndjson",
+    "write_ndjson",
+    "write_ndjson_with_embeddings",
+    "sidecar_path",
+    "force_layout",
+    "label_propagation",
+    "personalized_pagerank",
+    "blocked_query_pairs",
+    "blocked_similar_pairs",
+    "dequantize_int8",
+    "quantize_int8",
+    "rescore_pairs",
+    "search_top_k",
+    "to_normalized_matrix",
 ]
@@ -0,0 +1,115 @@
+"""导出向量的二进制旁路文件
+
+NDJSON 导出中的向量单独写入 .npy 文件（float16 或 float32），
+实体记录只保留 embedding_row 行号，meta 记录的 embeddings 字段指向该文件。
+导入时以内存映射方式读取，按行号把向量还原到实体记录中，无需重新调用嵌入模型。
+"""
+
+import tempfile
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+
+from .ndjson import write_ndjson
+
+# 支持的向量存储精度
+SIDECAR_DTYPES = ("float16", "float32")
+
+# 组装 .npy 文件时每次复制的行数
+COPY_ROWS = 65536
+
+
+def sidecar_path(path: Path) -> Path:
+    """NDJSON 导出文件对应的向量文件路径（xxx.ndjson[.gz] -> xxx.embeddings.npy）"""
+    name = path.name
+    for suffix in (".gz", ".ndjson"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    return path.with_name(f"{name}.embeddings.npy")
+
+
+async def write_ndjson_with_embeddings(
+    records: AsyncIterable[dict],
+    path: Path,
+    compress: bool = False,
+    dtype: str = "float16",
+) -> dict[str, int]:
+    """把记录流写入 NDJSON 文件，实体向量写入旁路 .npy 文件
+
+    向量先逐行追加到临时文件，写完后再组装为带表头的 .npy，内存占用与实体数量无关。
+
+    Args:
+        records: 记录的异步迭代器，实体记录带 embedding 字段
+        path: NDJSON 输出路径，向量文件路径见 sidecar_path
+        compress: NDJSON 是否 gzip 压缩
+        dtype: 向量精度，float16 或 float32
+
+    Returns:
+        各 kind 的记录数
+    """
+    if dtype not in SIDECAR_DTYPES:
+        raise ValueError(f"不支持的向量精度: {dtype}")
+
+    target = sidecar_path(path)
+    rows = 0
+    dim = 0
+
+    with tempfile.TemporaryFile(dir=path.parent) as raw:
+
+        async def _split() -> AsyncIterator[dict]:
+            nonlocal rows, dim
+            async for record in records:
+                kind = record.get("kind")
+                if kind == "meta":
+                    record["embeddings"] = {"file": target.name, "dtype": dtype}
+                elif kind == "entity":
+                    embedding = record.pop("embedding", None)
+                    if embedding is not None and (not dim or len(embedding) == dim):
+                        dim = dim or len(embedding)
+                        raw.write(np.asarray(embedding, dtype=dtype).tobytes())
+                        record["embedding_row"] = rows
+                        rows += 1
+                yield record
+
+        counts = await write_ndjson(_split(), path, compress)
+
+        matrix = np.lib.format.open_memmap(target, mode="w+", dtype=dtype, shape=(rows, dim))
+        row_bytes = dim * np.dtype(dtype).itemsize
+        raw.seek(0)
+        for start in range(0, rows, COPY_ROWS):
+            end = min(start + COPY_ROWS, rows)
+            block = raw.read((end - start) * row_bytes)
+            matrix[start:end] = np.frombuffer(block, dtype=dtype).reshape(end - start, dim)
+        matrix.flush()
+        del matrix
+
+    return counts
+
+
+def attach_embeddings(records: Iterable[dict], directory: Path) -> Iterator[dict]:
+    """按 meta 记录指向的 .npy 文件还原实体记录的 embedding 字段
+
+    向量文件以内存映射方式打开，只读取实际用到的行。
+    文件不存在或记录没有行号时保持原样（导入时再由嵌入模型生成）。
+
+    Args:
+        records: read_ndjson 读出的记录
+        directory: NDJSON 文件所在目录
+
+    Yields:
+        记录字典，实体记录的 embedding 为 float32 数组
+    """
+    matrix = None
+    for record in records:
+        kind = record.get("kind")
+        if kind == "meta" and record.get("embeddings"):
+            # 只取文件名，避免 meta 中的路径指向目录之外
+            path = directory / Path(record["embeddings"]["file"]).name
+            if path.exists():
+                matrix = np.load(path, mmap_mode="r")
+        elif kind == "entity":
+            row = record.pop("embedding_row", None)
+            if matrix is not None and row is not None and 0 <= row < len(matrix):
+                record["embedding"] = np.asarray(matrix[row], dtype=np.float32)
+        yield record
@@ -0,0 +1,227 @@
+"""图计算工具
+
+基于 NumPy 的边列表运算，用于在检索时对小规模子图打分。
+"""
+
+import numpy as np
+
+
+def personalized_pagerank(
+    num_nodes: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weight: np.ndarray,
+    personalization: np.ndarray,
+    alpha: float = 0.15,
+    iterations: int = 20,
+    tol: float = 1e-6,
+) -> np.ndarray:
+    """按边权重计算个性化 PageRank
+
+    边视为无向边，转移概率与边权重成正比；每一步以 alpha 的概率回到种子节点，
+    因此分数集中在种子附近、且与种子连接更强的节点上。
+
+    Args:
+        num_nodes: 节点数量
+        src: 边的起点 (m,)
+        dst: 边的终点 (m,)
+        weight: 边权重 (m,)，需非负
+        personalization: 种子分布 (num_nodes,)，内部会归一化
+        alpha: 重启概率
+        iterations: 最大迭代次数
+        tol: 收敛阈值（L1）
+
+    Returns:
+        各节点的分数 (num_nodes,)，和为 1
+    """
+    restart = np.asarray(personalization, dtype=np.float64)
+    if num_nodes == 0 or restart.sum() <= 0:
+        return np.zeros(num_nodes, dtype=np.float64)
+    restart = restart / restart.sum()
+
+    # 无向图: 两个方向各一条边
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    weight = np.maximum(np.asarray(weight, dtype=np.float64), 0.0)
+    heads = np.concatenate([src, dst])
+    tails = np.concatenate([dst, src])
+    weights = np.concatenate([weight, weight])
+
+    out_weight = np.bincount(heads, weights=weights, minlength=num_nodes)
+    transition = np.divide(
+        weights, out_weight[heads], out=np.zeros_like(weights), where=out_weight[heads] > 0
+    )
+    # 没有出边的节点把分数交还给种子
+    dangling = out_weight == 0
+
+    scores = restart.copy()
+    for _ in range(iterations):
+        spread = np.bincount(tails, weights=scores[heads] * transition, minlength=num_nodes)
+        updated = (1 - alpha) * (spread + scores[dangling].sum() * restart) + alpha * restart
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+
+    return scores
+
+
+def label_propagation(
+    num_nodes: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weight: np.ndarray,
+    iterations: int = 30,
+    update_ratio: float = 0.5,
+    seed: int = 0,
+) -> np.ndarray:
+    """按边权重做标签传播社区发现
+
+    每个节点采用邻居中权重之和最大的标签（与当前标签并列时保留当前标签）。
+    每轮只随机更新一部分节点（半同步），避免同步更新在二分结构上来回振荡。
+
+    Args:
+        num_nodes: 节点数量
+        src: 边的起点 (m,)
+        dst: 边的终点 (m,)
+        weight: 边权重 (m,)，需非负
+        iterations: 最大迭代次数
+        update_ratio: 每轮更新的节点比例
+        seed: 随机种子，固定后结果可复现
+
+    Returns:
+        各节点的社区编号 (num_nodes,)，编号为 0..k-1；没有边的节点各自成为一个社区
+    """
+    labels = np.arange(num_nodes, dtype=np.int64)
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    weight = np.maximum(np.asarray(weight, dtype=np.float64), 0.0)
+
+    # 无向图: 两个方向各一条边；自环不参与投票
+    loops = src == dst
+    heads = np.concatenate([src[~loops], dst[~loops]])
+    tails = np.concatenate([dst[~loops], src[~loops]])
+    weights = np.concatenate([weight[~loops], weight[~loops]])
+    if num_nodes == 0 or len(heads) == 0:
+        return labels
+
+    rng = np.random.default_rng(seed)
+    for _ in range(iterations):
+        # 汇总每个 (节点, 邻居标签) 的权重
+        keys, inverse = np.unique(heads * num_nodes + labels[tails], return_inverse=True)
+        totals = np.bincount(inverse, weights=weights)
+        nodes, votes = keys // num_nodes, keys % num_nodes
+
+        # 每个节点取权重最大的标签（并列取编号较小的）
+        order = np.lexsort((votes, -totals, nodes))
+        first = order[np.concatenate([[True], nodes[order][1:] != nodes[order][:-1]])]
+        best = labels.copy()
+        best[nodes[first]] = votes[first]
+
+        # 当前标签的权重与最大值并列时保留当前标签
+        current = np.zeros(num_nodes, dtype=np.float64)
+        own = votes == labels[nodes]
+        current[nodes[own]] = totals[own]
+        top = np.zeros(num_nodes, dtype=np.float64)
+        top[nodes[first]] = totals[first]
+        keep = current >= top
+        best[keep] = labels[keep]
+
+        changed = best != labels
+        if not changed.any():
+            break
+        changed &= rng.random(num_nodes) < update_ratio
+        labels[changed] = best[changed]
+
+    return np.unique(labels, return_inverse=True)[1].astype(np.int64)
+
+
+def force_layout(
+    num_nodes: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weight: np.ndarray,
+    initial: np.ndarray | None = None,
+    movable: np.ndarray | None = None,
+    iterations: int = 50,
+    edge_length: float = 100.0,
+    seed: int = 0,
+    block_size: int = 512,
+) -> np.ndarray:
+    """Fruchterman-Reingold 力导向布局
+
+    节点两两之间相互排斥（与距离成反比），边的两端相互吸引（与距离平方和边权重成正比），
+    另有指向原点的弱引力让不连通的部分不会散开。斥力按行分块计算，内存占用为 O(block_size * n)。
+
+    Args:
+        num_nodes: 节点数量
+        src: 边的起点 (m,)
+        dst: 边的终点 (m,)
+        weight: 边权重 (m,)，需非负
+        initial: 初始坐标 (num_nodes, 2)，NaN 行表示没有初始坐标
+                 （放在已有坐标的邻居附近，没有邻居时随机放置）
+        movable: 允许移动的节点掩码 (num_nodes,)，默认全部可移动；
+                 增量布局时只移动新节点，已有节点保持原位
+        iterations: 迭代次数
+        edge_length: 理想边长（坐标单位）
+        seed: 随机种子
+        block_size: 斥力分块的行数
+
+    Returns:
+        坐标 (num_nodes, 2)
+    """
+    rng = np.random.default_rng(seed)
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    weight = np.maximum(np.asarray(weight, dtype=np.float64), 0.0)
+    spread = edge_length * max(np.sqrt(num_nodes), 1.0)
+
+    pos = rng.uniform(-spread / 2, spread / 2, size=(num_nodes, 2))
+    if initial is not None:
+        initial = np.asarray(initial, dtype=np.float64)
+        known = ~np.isnan(initial).any(axis=1)
+        pos[known] = initial[known]
+        # 新节点放在已有坐标的邻居的重心附近
+        if known.any() and not known.all() and len(src):
+            heads = np.concatenate([src, dst])
+            tails = np.concatenate([dst, src])
+            placed = ~known[heads] & known[tails]
+            counts = np.bincount(heads[placed], minlength=num_nodes)
+            sums = np.zeros((num_nodes, 2))
+            np.add.at(sums, heads[placed], pos[tails[placed]])
+            near = counts > 0
+            pos[near] = sums[near] / counts[near, None] + rng.normal(0, edge_length / 4, size=(int(near.sum()), 2))
+    if movable is None:
+        movable = np.ones(num_nodes, dtype=bool)
+    if num_nodes < 2 or not movable.any():
+        return pos
+
+    k2 = edge_length ** 2
+    temperature = spread / 10
+    for step in range(iterations):
+        disp = np.zeros((num_nodes, 2))
+        rows = np.flatnonzero(movable)
+        x, y = pos[:, 0], pos[:, 1]
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            dx = x[block, None] - x[None, :]
+            dy = y[block, None] - y[None, :]
+            force = k2 / np.maximum(dx * dx + dy * dy, 1e-2)
+            disp[block, 0] += (dx * force).sum(axis=1)
+            disp[block, 1] += (dy * force).sum(axis=1)
+
+        if len(src):
+            delta = pos[src] - pos[dst]
+            dist = np.sqrt(np.maximum((delta ** 2).sum(axis=1), 1e-4))
+            pull = delta * (dist * weight / edge_length)[:, None]
+            np.add.at(disp, src, -pull)
+            np.add.at(disp, dst, pull)
+
+        disp -= pos * (0.05 * edge_length / spread)
+
+        # 位移不超过当前温度，温度线性冷却
+        length = np.sqrt(np.maximum((disp ** 2).sum(axis=1), 1e-9))
+        scale = np.minimum(length, temperature * (1 - step / iterations)) / length
+        pos[movable] += (disp * scale[:, None])[movable]
+
+    return pos
@@ -0,0 +1,40 @@
+"""LLM 输出 JSON 解析工具"""
+
+import re
+
+_JSON_BLOCK_PATTERN = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+def find_json_blob(text: str) -> str | None:
+    """从文本中提取 JSON 字符串
+
+    Args:
+        text: 包含 JSON 的文本
+
+    Returns:
+        JSON 字符串，如果未找到返回 None
+    """
+    # 尝试直接解析
+    text = text.strip()
+    if text.startswith("{") and text.endswith("}"):
+        return text
+
+    # 尝试查找 JSON 代码块
+    match = _JSON_BLOCK_PATTERN.search(text)
+    if match:
+        return match.group(1)
+
+    # 尝试查找第一个完整的 JSON 对象
+    brace_count = 0
+    start_idx = -1
+    for i, char in enumerate(text):
+        if char == "{":
+            if brace_count == 0:
+                start_idx = i
+            brace_count += 1
+        elif char == "}":
+            brace_count -= 1
+            if brace_count == 0 and start_idx != -1:
+                return text[start_idx : i + 1]
+
+    return None
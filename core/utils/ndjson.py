@@ -0,0 +1,82 @@
+"""NDJSON 读写工具
+
+每行一个 JSON 对象，可选 gzip 压缩；读写都按行流式进行，内存占用与文件大小无关。
+"""
+
+import gzip
+import json
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator, Iterator
+from pathlib import Path
+
+# 输出块的目标大小（字节）
+FLUSH_BYTES = 64 * 1024
+
+
+def encode_line(record: dict) -> bytes:
+    """把一条记录编码为一行 NDJSON"""
+    return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+async def iter_ndjson(records: AsyncIterable[dict], compress: bool = False) -> AsyncIterator[bytes]:
+    """把记录流编码为 NDJSON 字节块
+
+    Args:
+        records: 记录的异步迭代器
+        compress: 是否输出 gzip 格式
+
+    Yields:
+        约 FLUSH_BYTES 大小的字节块，可直接写入文件或作为 StreamingResponse 的内容
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = bytearray()
+    async for record in records:
+        buffer += encode_line(record)
+        if len(buffer) >= FLUSH_BYTES:
+            chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+            buffer.clear()
+            if chunk:
+                yield chunk
+
+    tail = bytes(buffer)
+    if compressor:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
+
+
+async def write_ndjson(records: AsyncIterable[dict], path: Path, compress: bool = False) -> dict[str, int]:
+    """把记录流写入 NDJSON 文件
+
+    Args:
+        records: 记录的异步迭代器，每条记录带 kind 字段
+        path: 输出文件路径
+        compress: 是否 gzip 压缩
+
+    Returns:
+        各 kind 的记录数
+    """
+    counts: dict[str, int] = {}
+
+    async def _counted():
+        async for record in records:
+            kind = record.get("kind", "")
+            counts[kind] = counts.get(kind, 0) + 1
+            yield record
+
+    with open(path, "wb") as f:
+        async for chunk in iter_ndjson(_counted(), compress):
+            f.write(chunk)
+    return counts
+
+
+def read_ndjson(path: Path) -> Iterator[dict]:
+    """逐行读取 NDJSON 文件（按 gzip 魔数自动识别压缩格式）"""
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    opener = gzip.open if compressed else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
@@ -88,3 +88,25 @@ QUERY_REWRITING_PROMPT = """你是一个查询优化专家。请将用户的问
 
 现在请重写用户的问题，只返回重写后的问题，不要其他解释。
 """
+
+# 实体合并批量验证 Prompt
+MERGE_VERIFICATION_PROMPT = """你是一个实体消歧专家。下面列出了若干对候选实体，请逐对判断两个实体是否指向同一个事物。
+
+候选实体对:
+{pairs}
+
+判断规则:
+- 综合名称和描述判断，名称相似但描述指向不同事物时判定为否
+- 别名、简称、全称、中英文名称指向同一事物时判定为是
+- 无法确定时判定为否
+
+返回格式（严格的 JSON）:
+{{
+    "verdicts": [
+        {{"id": 1, "same": true}},
+        {{"id": 2, "same": false}}
+    ]
+}}
+
+请对每一对都给出判断，只返回 JSON，不要其他解释。
+"""
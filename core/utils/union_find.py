@@ -0,0 +1,46 @@
+"""并查集"""
+
+from collections.abc import Hashable, Iterable
+
+
+class UnionFind:
+    """并查集（路径压缩 + 按大小合并）"""
+
+    def __init__(self, items: Iterable[Hashable] = ()):
+        self._parent: dict[Hashable, Hashable] = {}
+        self._size: dict[Hashable, int] = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item: Hashable):
+        """添加元素"""
+        if item not in self._parent:
+            self._parent[item] = item
+            self._size[item] = 1
+
+    def find(self, item: Hashable) -> Hashable:
+        """查找元素所在集合的根"""
+        self.add(item)
+        root = item
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[item] != root:
+            self._parent[item], item = root, self._parent[item]
+        return root
+
+    def union(self, a: Hashable, b: Hashable):
+        """合并两个元素所在的集合"""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+
+    def groups(self) -> list[list[Hashable]]:
+        """返回所有元素数大于 1 的集合"""
+        groups: dict[Hashable, list[Hashable]] = {}
+        for item in self._parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return [members for members in groups.values() if len(members) > 1]
@@ -0,0 +1,347 @@
+"""向量计算工具
+
+基于 NumPy 的向量化相似度计算，替代逐元素的 Python 循环。
+"""
+
+from collections.abc import Callable, Sequence
+
+import numpy as np
+
+
+def to_normalized_matrix(embeddings: Sequence[Sequence[float]]) -> tuple[np.ndarray, np.ndarray]:
+    """将向量列表转换为 L2 归一化的 float32 矩阵
+
+    Args:
+        embeddings: 向量列表（需维度一致）
+
+    Returns:
+        (归一化矩阵, 有效行掩码)，零向量对应的行保持为 0 且掩码为 False
+    """
+    if len(embeddings) == 0:
+        return np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=bool)
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1)
+    valid = norms > 0
+    matrix[valid] /= norms[valid, None]
+    matrix[~valid] = 0.0
+    return matrix, valid
+
+
+def _float_block(matrix, start: int, end: int) -> np.ndarray:
+    """取出 [start, end) 行并转换为 float32（量化矩阵在这里按块还原）"""
+    return np.asarray(matrix[start:end], dtype=np.float32)
+
+
+def _blocked_top_k(
+    matrix,
+    queries: np.ndarray,
+    query_ids: np.ndarray | None,
+    k: int,
+    block_size: int,
+    upper_only: bool = False,
+    mask: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """按列分块计算 queries 与 matrix 各行的相似度，保留每行 top_k
+
+    每次只还原 block_size 行，内存占用为 O(len(queries) * (block_size + k))。
+
+    Args:
+        matrix: 已归一化的矩阵（ndarray 或 QuantizedMatrix）
+        queries: 已归一化的 float32 查询矩阵 (m, dim)
+        query_ids: 查询在 matrix 中的行号（用于排除自身），None 表示不排除
+        k: 每行保留的数量
+        block_size: 分块行数
+        upper_only: 只保留列号大于查询行号的结果
+        mask: 行掩码，为 False 的行不参与比较（可选）
+
+    Returns:
+        (行号矩阵 (m, k), 相似度矩阵 (m, k))，不足 k 个时以 -1 / -inf 填充
+    """
+    m = len(queries)
+    best_idx = np.full((m, k), -1, dtype=np.int64)
+    best_sims = np.full((m, k), -np.inf, dtype=np.float32)
+    lowest = int(query_ids.min()) if upper_only and m else 0
+
+    for start in range(0, len(matrix), block_size):
+        end = min(start + block_size, len(matrix))
+        if end <= lowest:
+            # 整块都在所有查询行之前
+            continue
+
+        sims = queries @ _float_block(matrix, start, end).T
+        cols = np.arange(start, end)[None, :]
+        if query_ids is not None:
+            if upper_only:
+                sims[cols <= query_ids[:, None]] = -np.inf
+            else:
+                sims[cols == query_ids[:, None]] = -np.inf
+        if mask is not None:
+            sims[:, ~mask[start:end]] = -np.inf
+
+        merged_sims = np.concatenate([best_sims, sims], axis=1)
+        merged_idx = np.concatenate([best_idx, np.broadcast_to(cols, sims.shape)], axis=1)
+        keep = np.argpartition(-merged_sims, k - 1, axis=1)[:, :k]
+        best_sims = np.take_along_axis(merged_sims, keep, axis=1)
+        best_idx = np.take_along_axis(merged_idx, keep, axis=1)
+
+    return best_idx, best_sims
+
+
+def blocked_similar_pairs(
+    matrix,
+    threshold: float,
+    top_k: int = 10,
+    block_size: int = 1024,
+) -> list[tuple[int, int, float]]:
+    """分块矩阵乘法查找相似行对
+
+    行和列都按 block_size 分块，内存占用为 O(block_size ** 2)。
+    每行只保留相似度最高的 top_k 个候选，且只考虑 j > i 的组合以避免重复。
+
+    Args:
+        matrix: 已归一化的 float32 矩阵 (n, dim)，或 QuantizedMatrix
+        threshold: 相似度阈值
+        top_k: 每行最多保留的候选数量
+        block_size: 分块行数
+
+    Returns:
+        [(行号 i, 行号 j, 相似度)]，其中 i < j
+    """
+    n = len(matrix)
+    if n < 2 or top_k <= 0:
+        return []
+
+    k = min(top_k, n - 1)
+    pairs: list[tuple[int, int, float]] = []
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        rows = np.arange(start, end)
+        top_idx, top_sims = _blocked_top_k(
+            matrix, _float_block(matrix, start, end), rows, k, block_size, upper_only=True
+        )
+
+        hit_rows, hit_cols = np.nonzero(top_sims >= threshold)
+        for r, c in zip(hit_rows.tolist(), hit_cols.tolist()):
+            pairs.append((start + r, int(top_idx[r, c]), float(top_sims[r, c])))
+
+    return pairs
+
+
+def blocked_query_pairs(
+    matrix,
+    query_rows: np.ndarray,
+    threshold: float,
+    top_k: int = 10,
+    block_size: int = 1024,
+) -> list[tuple[int, int, float]]:
+    """分块查找指定行与全矩阵中其他行的相似行对
+
+    只有 query_rows 参与矩阵乘法，计算量为 O(len(query_rows) * n)，
+    适合只比较新增或变化的行。
+
+    Args:
+        matrix: 已归一化的 float32 矩阵 (n, dim)，或 QuantizedMatrix
+        query_rows: 需要比较的行号
+        threshold: 相似度阈值
+        top_k: 每行最多保留的候选数量
+        block_size: 分块行数
+
+    Returns:
+        [(行号 i, 行号 j, 相似度)]，其中 i < j，已去重
+    """
+    n = len(matrix)
+    query_rows = np.asarray(query_rows, dtype=np.int64)
+    if n < 2 or top_k <= 0 or len(query_rows) == 0:
+        return []
+
+    k = min(top_k, n - 1)
+    found: dict[tuple[int, int], float] = {}
+
+    for start in range(0, len(query_rows), block_size):
+        rows = query_rows[start:start + block_size]
+        queries = np.asarray(matrix[rows], dtype=np.float32)
+        top_idx, top_sims = _blocked_top_k(matrix, queries, rows, k, block_size)
+
+        hit_rows, hit_cols = np.nonzero(top_sims >= threshold)
+        for r, c in zip(hit_rows.tolist(), hit_cols.tolist()):
+            i, j = int(rows[r]), int(top_idx[r, c])
+            found.setdefault((min(i, j), max(i, j)), float(top_sims[r, c]))
+
+    return [(i, j, similarity) for (i, j), similarity in found.items()]
+
+
+def search_top_k(
+    matrix,
+    query: Sequence[float],
+    k: int,
+    block_size: int = 4096,
+    rescore: Callable[[np.ndarray], Sequence[Sequence[float]]] | None = None,
+    oversample: int = 4,
+    mask: np.ndarray | None = None,
+) -> list[tuple[int, float]]:
+    """查找与查询向量最相似的 k 行
+
+    对量化矩阵检索时先取 k * oversample 个候选，再用 rescore 取回的
+    原始向量重新计算相似度并排序，以弥补量化误差。
+
+    Args:
+        matrix: 已归一化的 float32 矩阵 (n, dim)，或 QuantizedMatrix
+        query: 查询向量（无需归一化）
+        k: 返回数量
+        block_size: 分块行数
+        rescore: 按行号取回原始向量的函数（可选）
+        oversample: 有 rescore 时的候选倍数
+        mask: 行掩码，为 False 的行（如已删除的行）不会出现在结果中（可选）
+
+    Returns:
+        [(行号, 相似度)]，按相似度降序
+    """
+    n = len(matrix)
+    queries, valid = to_normalized_matrix([query])
+    if n == 0 or k <= 0 or not valid[0] or queries.shape[1] != matrix.shape[1]:
+        return []
+
+    candidates = min(n, k * oversample if rescore is not None else k)
+    top_idx, top_sims = _blocked_top_k(matrix, queries, None, candidates, block_size, mask=mask)
+    rows, sims = top_idx[0], top_sims[0]
+    if mask is not None:
+        found = np.isfinite(sims) & (rows >= 0)
+        rows, sims = rows[found], sims[found]
+        if not len(rows):
+            return []
+
+    if rescore is not None:
+        vectors, _ = to_normalized_matrix(rescore(rows))
+        sims = vectors @ queries[0]
+
+    order = np.argsort(-sims, kind="stable")[:k]
+    return [(int(rows[i]), float(sims[i])) for i in order]
+
+
+def rescore_pairs(
+    fetch_rows: Callable[[np.ndarray], Sequence[Sequence[float]]],
+    pairs: np.ndarray,
+) -> np.ndarray:
+    """用原始向量重新计算行对的余弦相似度
+
+    Args:
+        fetch_rows: 按行号取回原始向量的函数
+        pairs: 行对数组 (m, 2)
+
+    Returns:
+        相似度数组 (m,)
+    """
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    if len(pairs) == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    rows = np.unique(pairs)
+    vectors, _ = to_normalized_matrix(fetch_rows(rows))
+    pos = np.searchsorted(rows, pairs)
+    return np.einsum("ij,ij->i", vectors[pos[:, 0]], vectors[pos[:, 1]])
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """按行对称量化为 int8
+
+    每行使用各自的缩放系数 scale = max(|x|) / 127，存储量约为 float32 的 1/4。
+
+    Args:
+        matrix: float 矩阵 (n, dim)
+
+    Returns:
+        (int8 矩阵, float32 缩放系数 (n,))
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127.0 if matrix.size else np.zeros(len(matrix))
+    scales = scales.astype(np.float32)
+    safe = np.where(scales > 0, scales, 1.0)[:, None]
+    codes = np.clip(np.rint(matrix / safe), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """将 int8 矩阵还原为 float32"""
+    return codes.astype(np.float32) * np.asarray(scales, dtype=np.float32)[:, None]
+
+
+class QuantizedMatrix:
+    """按行量化的归一化向量矩阵
+
+    - int8: 每行一个缩放系数，内存约为 float32 的 1/4
+    - float16: 内存为 float32 的 1/2，误差更小
+
+    可以直接传给 blocked_similar_pairs / blocked_query_pairs / search_top_k，
+    计算时按块还原为 float32；行切片和花式索引返回新的 QuantizedMatrix，
+    np.asarray() 得到还原后的 float32 矩阵。
+    """
+
+    DTYPES = ("int8", "float16")
+
+    def __init__(self, codes: np.ndarray, scales: np.ndarray | None = None):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        embeddings: Sequence[Sequence[float]],
+        dtype: str = "int8",
+        block_size: int = 4096,
+    ) -> tuple["QuantizedMatrix", np.ndarray]:
+        """分块归一化并量化，不构造完整的 float32 矩阵
+
+        Args:
+            embeddings: 向量列表（需维度一致）
+            dtype: 量化类型（int8 / float16）
+            block_size: 每次归一化的行数
+
+        Returns:
+            (量化矩阵, 有效行掩码)
+        """
+        if dtype not in cls.DTYPES:
+            raise ValueError(f"不支持的量化类型: {dtype}")
+
+        codes, scales, valid = [], [], []
+        for start in range(0, len(embeddings), block_size):
+            block, block_valid = to_normalized_matrix(embeddings[start:start + block_size])
+            valid.append(block_valid)
+            if dtype == "int8":
+                block_codes, block_scales = quantize_int8(block)
+                codes.append(block_codes)
+                scales.append(block_scales)
+            else:
+                codes.append(block.astype(np.float16))
+
+        if not codes:
+            return cls(np.zeros((0, 0), dtype=np.int8), np.zeros(0, dtype=np.float32)), np.zeros(0, dtype=bool)
+        return (
+            cls(np.vstack(codes), np.concatenate(scales) if scales else None),
+            np.concatenate(valid),
+        )
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, rows) -> "QuantizedMatrix":
+        return QuantizedMatrix(
+            self.codes[rows],
+            self.scales[rows] if self.scales is not None else None,
+        )
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if self.scales is not None:
+            matrix = dequantize_int8(self.codes, self.scales)
+        else:
+            matrix = self.codes.astype(np.float32)
+        return matrix if dtype is None else matrix.astype(dtype, copy=False)
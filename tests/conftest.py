@@ -35,11 +35,17 @@ def mock_config():
         "enable_query_rewriting": False,
         "retrieval_top_k": 3,
         "enable_function_calling": False,
+        "graph_expansion_hops": 0,
+        "graph_expansion_budget": 10,
         "webui_port": 8082,
         "webui_key": "test_key",
         "prune_interval": 3600,
         "time_decay_rate": 0.95,
+        "maintenance_chunk_size": 1000,
+        "maintenance_chunk_pause": 0.05,
         "min_importance_threshold": 0.1,
+        "enable_cold_storage": True,
+        "embedding_quantization": "none",
     }
 
 
@@ -121,15 +127,17 @@ def mock_buffer(temp_dir):
 
 
 @pytest.fixture
-def test_client(mock_graph_store, mock_config):
+def test_client(mock_graph_store, mock_config, temp_dir):
     """创建测试客户端"""
     from fastapi.testclient import TestClient
+    from core.services import ImportJobManager
     from webui.app import create_app
 
     # 创建模拟管理器
     class MockManager:
         def __init__(self):
             self.graph_store = mock_graph_store
+            self.import_jobs = ImportJobManager(mock_graph_store, temp_dir / "import_jobs")
             self._core_initialized = True
 
         async def ensure_initialized(self):
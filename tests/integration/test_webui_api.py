@@ -5,14 +5,16 @@ from fastapi.testclient import TestClient
 
 
 @pytest.fixture
-def test_client(mock_graph_store, mock_config):
+def test_client(mock_graph_store, mock_config, temp_dir):
     """创建测试客户端"""
+    from core.services import ImportJobManager
     from webui.app import create_app
 
     # 创建模拟管理器
     class MockManager:
         def __init__(self):
             self.graph_store = mock_graph_store
+            self.import_jobs = ImportJobManager(mock_graph_store, temp_dir / "import_jobs")
             self._core_initialized = True
 
         async def ensure_initialized(self):
@@ -143,3 +145,289 @@ def test_missing_key(test_client):
     """测试缺少密钥"""
     response = test_client.get("/api/system/status")
     assert response.status_code == 422  # Validation error
+
+
+@pytest.mark.integration
+@pytest.mark.webui
+def test_vector_search_true_top_k(test_client, mock_graph_store):
+    """测试向量搜索返回真实的 top_k（不受重要性排序影响）"""
+    import asyncio
+
+    import numpy as np
+
+    from core.models.entities import EntityNode
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(20, mock_graph_store.embedding_dim))
+
+    async def _populate():
+        for i, vector in enumerate(vectors):
+            await mock_graph_store.add_entity(EntityNode(
+                name=f"实体{i}",
+                type="THING",
+                description=f"实体{i}",
+                embedding=vector.tolist(),
+                # 目标实体的重要性最低
+                importance=0.05 if i == 7 else 0.9,
+            ))
+
+    asyncio.run(_populate())
+
+    class MockEmbeddingProvider:
+        async def get_embedding(self, text):
+            return (vectors[7] + 0.01).tolist()
+
+    test_client.app.state.manager.embedding_provider = MockEmbeddingProvider()
+    response = test_client.post(
+        "/api/search/vector?key=test_key",
+        json={"query": "目标", "top_k": 3},
+    )
+    data = response.json()
+
+    assert data["success"] is True
+    results = data["data"]["results"]
+    assert len(results) == 3
+    assert results[0]["entity"]["name"] == "实体7"
+    assert results[0]["similarity"] > 0.99
+    assert [r["similarity"] for r in results] == sorted((r["similarity"] for r in results), reverse=True)
+    assert set(data["data"]["timings_ms"]) == {"embedding", "search", "fetch", "total"}
+
+
+@pytest.mark.integration
+@pytest.mark.webui
+@pytest.mark.parametrize("query", [
+    "",
+    "&type=THING",
+    "&sort_by=name&order=asc",
+    "&sort_by=created_at",
+    "&sort_by=access_count&order=asc",
+])
+def test_entity_cursor_pagination(test_client, mock_graph_store, query):
+    """测试实体列表游标分页与 offset 分页结果一致"""
+    import asyncio
+
+    from core.models.entities import EntityNode, RelatedToRel
+
+    async def _populate():
+        for i in range(12):
+            await mock_graph_store.add_entity(EntityNode(
+                name=f"实体{i:02d}",
+                type="THING",
+                description=f"实体{i}",
+                # 重复的重要性用于检验同值时按名称排序
+                importance=0.1 * (i % 4 + 1),
+                access_count=i % 3,
+            ))
+        for i in range(11):
+            await mock_graph_store.add_relation(RelatedToRel(
+                from_entity=f"实体{i:02d}", to_entity=f"实体{i + 1:02d}",
+                relation="相邻", strength=0.2 * (i % 3 + 1),
+            ))
+
+    asyncio.run(_populate())
+
+    def collect(path: str, key: str) -> list:
+        pages, cursor = [], None
+        while True:
+            url = f"{path}?key=test_key&limit=5{query if path.endswith('entities') else ''}"
+            response = test_client.get(url + (f"&cursor={cursor}" if cursor else "")).json()
+            assert response["success"] is True
+            pages.extend(response["data"][key])
+            cursor = response["data"]["next_cursor"]
+            if cursor is None:
+                return pages
+
+    offset_page = test_client.get(
+        f"/api/entities?key=test_key&limit=100{query}"
+    ).json()["data"]
+    entities = collect("/api/entities", "entities")
+    assert [e["name"] for e in entities] == [e["name"] for e in offset_page["entities"]]
+    assert offset_page["total"] == 12
+
+    relations = collect("/api/relations", "relations")
+    offset_page = test_client.get("/api/relations?key=test_key&limit=100").json()["data"]
+    assert [(r["from"], r["to"]) for r in relations] == [(r["from"], r["to"]) for r in offset_page["relations"]]
+    assert len(relations) == 11
+
+    response = test_client.get("/api/entities?key=test_key&cursor=坏游标").json()
+    assert response["error"] == "INVALID_CURSOR"
+
+
+@pytest.mark.integration
+@pytest.mark.webui
+def test_export_graph_ndjson_stream(test_client, mock_graph_store):
+    """测试 NDJSON 流式导出"""
+    import asyncio
+    import gzip
+    import json
+
+    from core.models.entities import EntityNode
+
+    async def _populate():
+        for i in range(3):
+            await mock_graph_store.add_entity(EntityNode(name=f"实体{i}", type="THING", description="描述"))
+
+    asyncio.run(_populate())
+
+    response = test_client.get("/api/system/export?key=test_key&format=ndjson")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["kind"] == "meta"
+    assert sum(line["kind"] == "entity" for line in lines) == 3
+
+    response = test_client.get("/api/system/export?key=test_key&format=ndjson&compress=true")
+    lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+    assert sum(json.loads(line)["kind"] == "entity" for line in lines) == 3
+
+
+@pytest.mark.integration
+@pytest.mark.webui
+def test_chunked_import_job(test_client, mock_graph_store):
+    """测试分块上传导入: 偏移校验、后台导入和从已提交位置续跑"""
+    import json
+    import time
+
+    mock_graph_store.chunk_size = 2
+    records = [{"kind": "meta", "version": mock_graph_store.EXPORT_VERSION}]
+    records += [{"kind": "entity", "name": f"实体{i}", "type": "THING", "description": f"描述{i}"} for i in range(5)]
+    records += [{"kind": "relation", "from": f"实体{i}", "to": f"实体{i + 1}", "relation": "相邻"} for i in range(4)]
+    content = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+
+    with test_client as client:
+        response = client.post("/api/system/import/jobs?key=test_key", json={"filename": "backup.txt"})
+        assert response.json()["error"] == "INVALID_PARAMETER"
+
+        job = client.post("/api/system/import/jobs?key=test_key", json={"filename": "backup.ndjson"}).json()["data"]
+        url = f"/api/system/import/jobs/{job['id']}"
+
+        half = len(content) // 2
+        assert client.put(f"{url}/chunks?offset=0&key=test_key", content=content[:half]).json()["data"] == {
+            "uploaded_bytes": half
+        }
+        # 偏移不一致时返回已接收字节数，供客户端续传
+        response = client.put(f"{url}/chunks?offset=0&key=test_key", content=content[half:]).json()
+        assert response["error"] == "INVALID_OFFSET"
+        assert response["data"]["uploaded_bytes"] == half
+        client.put(f"{url}/chunks?offset={half}&key=test_key", content=content[half:])
+
+        def wait(job_url):
+            for _ in range(100):
+                job = client.get(f"{job_url}?key=test_key").json()["data"]
+                if job["status"] != "running":
+                    return job
+                time.sleep(0.1)
+            return job
+
+        assert client.post(f"{url}/start?key=test_key").json()["success"] is True
+        job = wait(url)
+
+        assert job["status"] == "completed"
+        assert job["committed_records"] == len(records)
+        assert job["stats"]["entities"] == 5
+        assert job["stats"]["relations"] == 4
+        assert client.post(f"{url}/start?key=test_key").json()["error"] == "INVALID_STATE"
+
+        jobs = client.get("/api/system/import/jobs?key=test_key").json()["data"]["jobs"]
+        assert [j["id"] for j in jobs] == [job["id"]]
+
+        # multipart 上传一步完成
+        response = client.post(
+            "/api/system/import/upload?key=test_key",
+            files={"file": ("more.ndjson", content, "application/x-ndjson")},
+            data={"merge": "true"},
+        ).json()
+        assert response["success"] is True
+        assert response["data"]["status"] == "running"
+        assert wait(f"/api/system/import/jobs/{response['data']['id']}")["status"] == "completed"
+
+
+@pytest.mark.integration
+@pytest.mark.webui
+def test_cluster_graph(test_client, mock_graph_store):
+    """测试社区级别全局图谱和展开社区"""
+    import asyncio
+
+    from core.models.entities import EntityNode, RelatedToRel
+
+    async def _populate():
+        for i in range(3):
+            await mock_graph_store.add_entity(EntityNode(name=f"实体{i}", type="THING", description=f"描述{i}"))
+        await mock_graph_store.add_relation(RelatedToRel(from_entity="实体0", to_entity="实体1", relation="相邻"))
+
+    asyncio.run(_populate())
+
+    data = test_client.get("/api/graph/clusters?key=test_key").json()["data"]
+    assert data["total_clusters"] == 2
+    assert [node["properties"]["size"] for node in data["nodes"]] == [2, 1]
+
+    cluster_id = data["nodes"][0]["properties"]["cluster_id"]
+    data = test_client.get(f"/api/graph/clusters/{cluster_id}?key=test_key").json()["data"]
+    assert sorted(node["id"] for node in data["nodes"]) == ["实体0", "实体1"]
+    assert [(edge["source"], edge["target"]) for edge in data["edges"]] == [("实体0", "实体1")]
+
+    response = test_client.get("/api/graph/clusters/99?key=test_key").json()
+    assert response["error"] == "CLUSTER_NOT_FOUND"
+
+
+@pytest.mark.integration
+@pytest.mark.webui
+def test_global_graph_layout(test_client, mock_graph_store):
+    """测试全局图谱附带预先计算的布局坐标"""
+    import asyncio
+
+    from core.models.entities import EntityNode, RelatedToRel
+
+    async def _populate():
+        for i in range(3):
+            await mock_graph_store.add_entity(EntityNode(name=f"实体{i}", type="THING", description=f"描述{i}"))
+        await mock_graph_store.add_relation(RelatedToRel(from_entity="实体0", to_entity="实体1", relation="相邻"))
+        await mock_graph_store.update_layout()
+
+    asyncio.run(_populate())
+
+    data = test_client.get("/api/graph/global?key=test_key").json()["data"]
+    assert data["layout_pending"] is False
+    assert len(data["nodes"]) == 3
+    assert all(isinstance(node["x"], float) and isinstance(node["y"], float) for node in data["nodes"])
+
+
+@pytest.mark.integration
+@pytest.mark.webui
+def test_compact_graph_formats(test_client, mock_graph_store):
+    """测试图谱接口的列式 / msgpack 响应格式和响应压缩"""
+    import asyncio
+
+    from core.models.entities import EntityNode, RelatedToRel
+    from webui.utils.encoding import MSGPACK_AVAILABLE
+
+    async def _populate():
+        for i in range(20):
+            await mock_graph_store.add_entity(EntityNode(name=f"实体{i}", type="THING", description=f"描述{i}"))
+        for i in range(19):
+            await mock_graph_store.add_relation(RelatedToRel(from_entity=f"实体{i}", to_entity=f"实体{i + 1}", relation="相邻"))
+
+    asyncio.run(_populate())
+
+    plain = test_client.get("/api/graph/global?key=test_key").json()["data"]
+    response = test_client.get("/api/graph/global?key=test_key&format=columnar", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    data = response.json()["data"]
+    assert data["encoding"] == "columnar"
+    assert data["node_count"] == len(plain["nodes"]) == 20
+    assert data["nodes"]["id"] == [node["id"] for node in plain["nodes"]]
+    assert data["nodes"]["type"] == [node["properties"]["type"] for node in plain["nodes"]]
+    ids = data["nodes"]["id"]
+    assert sorted(zip(data["edges"]["source"], data["edges"]["target"])) == sorted(
+        (ids.index(edge["source"]), ids.index(edge["target"])) for edge in plain["edges"]
+    )
+    assert data["edges"]["relation"] == ["相邻"] * 19
+
+    response = test_client.get("/api/graph/global?key=test_key&format=xml").json()
+    assert response["error"] == "INVALID_PARAMETER"
+
+    if MSGPACK_AVAILABLE:
+        from webui.utils.encoding import msgpack
+
+        response = test_client.get("/api/graph/global?key=test_key", headers={"Accept": "application/msgpack"})
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content)["data"]["nodes"]["id"] == ids
@@ -0,0 +1,135 @@
+"""实体消歧性能测试"""
+
+import time
+
+import numpy as np
+import pytest
+
+
+def _make_dataset(num_entities: int, num_duplicates: int, dim: int, seed: int = 0):
+    """生成带聚类结构的向量和已知的重复对"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(64, dim))
+    labels = rng.integers(0, len(centers), size=num_entities)
+    base = centers[labels] * 0.6 + rng.normal(size=(num_entities, dim))
+    letters = list("abcdefghijklmnopqrstuvwxyz")
+    names = [
+        "".join(rng.choice(letters, size=int(rng.integers(4, 10))))
+        for _ in range(num_entities)
+    ]
+
+    sources = rng.choice(num_entities, size=num_duplicates, replace=False)
+    duplicates = base[sources] + rng.normal(scale=0.25, size=(num_duplicates, dim))
+    # 一半重复实体使用名称变体（大小写 + 多一个字符），一半使用完全不同的名称
+    dup_names = [
+        names[s].capitalize() + "s" if k % 2 == 0 else f"alias_{k}"
+        for k, s in enumerate(sources.tolist())
+    ]
+
+    embeddings = np.vstack([base, duplicates])
+    truth = {(int(s), num_entities + k) for k, s in enumerate(sources.tolist())}
+    return embeddings, names + dup_names, truth
+
+
+@pytest.mark.slow
+def test_candidate_generation_recall():
+    """测试 LSH + 名称分块的候选数量与重复召回率"""
+    from core.services.candidate_generation import CandidateGenerator, score_pairs
+    from core.utils.vector_ops import blocked_similar_pairs, to_normalized_matrix
+
+    embeddings, names, truth = _make_dataset(10000, 200, 256)
+    matrix, _ = to_normalized_matrix(embeddings)
+    n = len(names)
+    threshold = 0.85
+
+    generator = CandidateGenerator()
+    start_time = time.time()
+    lsh_pairs = generator.embedding_candidates(matrix)
+    name_pairs = generator.name_candidates(names)
+    candidates = np.unique(np.vstack([lsh_pairs, name_pairs]), axis=0)
+    elapsed = time.time() - start_time
+
+    scores = score_pairs(matrix, candidates)
+    found = {tuple(p) for p in candidates[scores >= threshold].tolist()}
+
+    # 真实重复中，相似度达到阈值的部分才是可召回的上限
+    reachable = {
+        (i, j) for i, j in truth
+        if float(matrix[i] @ matrix[j]) >= threshold
+    }
+    recall = len(found & reachable) / max(len(reachable), 1)
+    total_pairs = n * (n - 1) // 2
+
+    # 对照: 分块全量比较
+    start_time = time.time()
+    exhaustive = blocked_similar_pairs(matrix, threshold, top_k=10)
+    exhaustive_elapsed = time.time() - start_time
+
+    print(f"\n实体数: {n}, 全量实体对: {total_pairs}")
+    print(f"LSH 候选: {len(lsh_pairs)}, 名称候选: {len(name_pairs)}, 合计: {len(candidates)}")
+    print(f"候选占比: {len(candidates) / total_pairs:.4%}")
+    print(f"可召回重复: {len(reachable)}/{len(truth)}, 召回率: {recall:.2%}")
+    print(f"候选生成耗时: {elapsed:.2f}s")
+    print(f"全量比较: 命中 {len(exhaustive)} 对，耗时 {exhaustive_elapsed:.2f}s")
+
+    assert len(candidates) < total_pairs * 0.05
+    assert recall >= 0.9
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_similarity_recall(dtype):
+    """测试量化矩阵的内存占用、耗时与召回率（相对 float32 结果）"""
+    from core.utils.vector_ops import (
+        QuantizedMatrix,
+        blocked_similar_pairs,
+        rescore_pairs,
+        search_top_k,
+        to_normalized_matrix,
+    )
+
+    embeddings, _, _ = _make_dataset(5000, 200, 1024)
+    threshold = 0.85
+    margin = 0.02
+
+    start_time = time.time()
+    matrix, _ = to_normalized_matrix(embeddings)
+    reference = {(i, j) for i, j, _ in blocked_similar_pairs(matrix, threshold, top_k=10)}
+    float_elapsed = time.time() - start_time
+
+    start_time = time.time()
+    quantized, _ = QuantizedMatrix.from_embeddings(embeddings, dtype)
+    candidates = np.array(
+        [(i, j) for i, j, _ in blocked_similar_pairs(quantized, threshold - margin, top_k=10)],
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    scores = rescore_pairs(lambda rows: embeddings[rows], candidates)
+    found = {tuple(p) for p in candidates[scores >= threshold].tolist()}
+    quantized_elapsed = time.time() - start_time
+
+    pair_recall = len(found & reference) / max(len(reference), 1)
+
+    # top-k 检索: 量化候选 + 原始向量重打分
+    rng = np.random.default_rng(1)
+    queries = embeddings[rng.choice(len(embeddings), size=50, replace=False)]
+    queries = queries + rng.normal(scale=0.5, size=queries.shape)
+    k = 10
+    hits = 0
+    for query in queries:
+        expected = {row for row, _ in search_top_k(matrix, query, k)}
+        actual = {
+            row for row, _ in
+            search_top_k(quantized, query, k, rescore=lambda rows: embeddings[rows])
+        }
+        hits += len(expected & actual)
+    topk_recall = hits / (len(queries) * k)
+
+    print(f"\n量化类型: {dtype}, 实体数: {len(embeddings)}")
+    print(f"内存: float32 {matrix.nbytes / 1e6:.1f} MB, {dtype} {quantized.nbytes / 1e6:.1f} MB")
+    print(f"相似对: float32 {len(reference)} 对 {float_elapsed:.2f}s, "
+          f"{dtype} {len(found)} 对 {quantized_elapsed:.2f}s, 召回率 {pair_recall:.2%}")
+    print(f"top-{k} 检索召回率: {topk_recall:.2%}")
+
+    assert quantized.nbytes <= matrix.nbytes / (4 if dtype == "int8" else 2) * 1.01
+    assert pair_recall >= 0.99
+    assert topk_recall >= 0.99
@@ -189,3 +189,53 @@ async def test_concurrent_operations(mock_graph_store):
     print(f"\n并发执行 30 个操作耗时: {elapsed:.2f}s")
 
     assert elapsed < 5.0, f"并发操作耗时过长: {elapsed:.2f}s"
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_projection_allocations(mock_graph_store):
+    """对比整节点返回与列投影的每行内存分配"""
+    import tracemalloc
+
+    import numpy as np
+
+    from core.models.entities import EntityNode
+
+    num_entities = 200
+    rng = np.random.default_rng(0)
+    for i in range(num_entities):
+        await mock_graph_store.add_entity(EntityNode(
+            name=f"实体_{i}",
+            type="测试",
+            description=f"测试实体 {i}",
+            embedding=rng.normal(size=mock_graph_store.embedding_dim).tolist(),
+        ))
+
+    def measure(query: str, decode) -> tuple[float, float, float]:
+        tracemalloc.start()
+        start_time = time.time()
+        result = mock_graph_store.conn.execute(query)
+        rows = []
+        while result.has_next():
+            rows.append(decode(result.get_next()))
+        elapsed = time.time() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        tracemalloc.stop()
+        assert len(rows) == num_entities
+        return peak / num_entities, blocks / num_entities, elapsed
+
+    full = await mock_graph_store._execute_in_thread(
+        measure, "MATCH (e:Entity) RETURN e", lambda row: row[0]
+    )
+    projected = await mock_graph_store._execute_in_thread(
+        measure,
+        f"MATCH (e:Entity) RETURN {mock_graph_store.entity_projection()}",
+        mock_graph_store.decode_entity,
+    )
+
+    print(f"\nRETURN e: 每行峰值 {full[0]:.0f} 字节, 存活分配 {full[1]:.1f} 块, 耗时 {full[2]*1000:.2f}ms")
+    print(f"列投影: 每行峰值 {projected[0]:.0f} 字节, 存活分配 {projected[1]:.1f} 块, 耗时 {projected[2]*1000:.2f}ms")
+
+    # 列投影不再把向量转换为 Python 列表
+    assert projected[0] < full[0] / 4
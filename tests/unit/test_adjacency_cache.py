@@ -0,0 +1,69 @@
+"""关系邻接表缓存测试"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+
+def _rows(edges):
+    now = datetime.now(timezone.utc)
+    return [(a, b, "相关", 0.5, now) for a, b in edges]
+
+
+@pytest.mark.unit
+def test_adjacency_cache_bfs():
+    """测试无向广度优先遍历"""
+    from core.storage.adjacency_cache import AdjacencyCache
+
+    cache = AdjacencyCache()
+    cache.rebuild(_rows([("A", "B"), ("B", "C"), ("D", "C"), ("E", "F")]))
+
+    assert len(cache) == 4
+    assert cache.bfs(["A"], 1) == {"A": 0, "B": 1}
+    assert cache.bfs(["A"], 3) == {"A": 0, "B": 1, "C": 2, "D": 3}
+    assert cache.bfs(["A", "E"], 1) == {"A": 0, "B": 1, "E": 0, "F": 1}
+    assert cache.bfs(["不存在"], 2) == {}
+
+
+@pytest.mark.unit
+def test_adjacency_cache_incremental_updates():
+    """测试增量写入、删除与合并"""
+    from core.storage.adjacency_cache import AdjacencyCache
+
+    cache = AdjacencyCache()
+    cache.rebuild(_rows([("A", "B"), ("B", "C")]))
+
+    # 更新已有边、新增边和新节点
+    cache.upsert_edge("A", "B", "朋友", 0.9, None)
+    cache.upsert_edge("C", "D", "同事", 0.3, None)
+    assert len(cache) == 3
+    assert cache.bfs(["A"], 3)["D"] == 3
+    assert [(a, b, rel) for a, b, rel, _, _ in cache.incident_edges("A")] == [("A", "B", "朋友")]
+    assert cache.incident_edges("A")[0][3] == pytest.approx(0.9)
+
+    cache.remove_edge("B", "C")
+    assert "C" not in cache.bfs(["A"], 3)
+
+    cache.remove_nodes(["D"])
+    assert cache.incident_edges("C") == []
+
+    # 合并后结果不变
+    cache._merge()
+    assert len(cache) == 1
+    assert sorted((a, b) for a, b, *_ in cache.edges_among(["A", "B", "C"])) == [("A", "B")]
+    assert cache.bfs(["B"], 2) == {"B": 0, "A": 1}
+
+
+@pytest.mark.unit
+def test_adjacency_cache_merges_when_overlay_grows():
+    """测试增量超过阈值时自动合并为 CSR"""
+    from core.storage.adjacency_cache import AdjacencyCache
+
+    cache = AdjacencyCache()
+    cache.MIN_MERGE = 4
+    for i in range(10):
+        cache.upsert_edge(f"N{i}", f"N{i + 1}", "下一个", 0.5, None)
+
+    assert len(cache._added) < 4
+    assert len(cache) == 10
+    assert cache.bfs(["N0"], 20)["N10"] == 10
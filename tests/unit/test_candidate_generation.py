@@ -0,0 +1,50 @@
+"""重复实体候选生成测试"""
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.unit
+def test_normalize_name():
+    """测试名称规范化"""
+    from core.services.candidate_generation import normalize_name
+
+    assert normalize_name("Python ") == "python"
+    assert normalize_name("ＡＩ-助手") == "ai助手"
+
+
+@pytest.mark.unit
+def test_edit_distance():
+    """测试编辑距离"""
+    from core.services.candidate_generation import edit_distance
+
+    assert edit_distance("北京市", "北京") == 1
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("kitten", "sitting", max_distance=1) == 2
+
+
+@pytest.mark.unit
+def test_name_candidates():
+    """测试名称分块"""
+    from core.services.candidate_generation import CandidateGenerator
+
+    names = ["北京", "北京市", "Python", "python ", "上海"]
+    pairs = CandidateGenerator().name_candidates(names)
+
+    assert {tuple(p) for p in pairs.tolist()} == {(0, 1), (2, 3)}
+
+
+@pytest.mark.unit
+def test_embedding_candidates_include_near_duplicates():
+    """测试 LSH 能召回近似重复的向量"""
+    from core.services.candidate_generation import CandidateGenerator
+    from core.utils.vector_ops import to_normalized_matrix
+
+    rng = np.random.default_rng(1)
+    base = rng.normal(size=(200, 64))
+    matrix, _ = to_normalized_matrix(np.vstack([base, base[:10] * 1.01]).tolist())
+
+    pairs = {tuple(p) for p in CandidateGenerator().embedding_candidates(matrix).tolist()}
+
+    assert all((i, 200 + i) in pairs for i in range(10))
+    assert len(pairs) < 210 * 209 // 2
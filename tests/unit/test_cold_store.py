@@ -0,0 +1,80 @@
+"""冷存储测试"""
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.unit
+def test_quantize_int8_round_trip():
+    """测试 int8 量化还原误差"""
+    from core.utils import dequantize_int8, quantize_int8
+
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(4, 64)).astype(np.float32)
+    matrix[3] = 0.0
+
+    codes, scales = quantize_int8(matrix)
+    assert codes.dtype == np.int8
+    restored = dequantize_int8(codes, scales)
+
+    assert np.abs(restored - matrix).max() <= scales.max() / 2 + 1e-6
+    assert not restored[3].any()
+
+
+@pytest.mark.unit
+def test_cold_store_archive_get_remove(temp_dir):
+    """测试归档、读取和删除"""
+    from core.storage.cold_store import ColdStore
+
+    store = ColdStore(temp_dir)
+    store.archive_many([{
+        "name": "旧项目",
+        "type": "THING",
+        "description": "很久以前的项目",
+        "importance": 0.05,
+        "access_count": 3,
+        "embedding": [0.5, -0.25, 0.0, 1.0],
+        "relations": [{"from": "张三", "to": "旧项目", "relation": "负责", "strength": 0.4}],
+        "mentions": [],
+    }])
+
+    assert "旧项目" in store
+    assert len(store) == 1
+
+    record = store.get("旧项目")
+    assert record["access_count"] == 3
+    assert record["relations"][0]["relation"] == "负责"
+    assert np.allclose(record["embedding"], [0.5, -0.25, 0.0, 1.0], atol=1e-2)
+
+    # 重新打开后名称集合从数据库加载
+    assert "旧项目" in ColdStore(temp_dir)
+
+    store.remove("旧项目")
+    assert "旧项目" not in store
+    assert store.get("旧项目") is None
+
+    store.archive_many([{"name": name, "importance": 0.05} for name in ("甲", "乙", "丙")])
+    store.remove_many(["甲", "乙"])
+    assert len(store) == 1
+    assert store.get("甲") is None
+    assert store.get("丙") is not None
+
+
+@pytest.mark.unit
+def test_cold_store_search(temp_dir):
+    """测试关键词和向量检索"""
+    from core.storage.cold_store import ColdStore
+
+    store = ColdStore(temp_dir)
+    store.archive_many([
+        {"name": "红茶", "type": "THING", "description": "一种饮品", "importance": 0.05, "embedding": [1.0, 0.0, 0.0]},
+        {"name": "绿茶", "type": "THING", "description": "一种饮品", "importance": 0.05, "embedding": [0.0, 1.0, 0.0]},
+        {"name": "火车", "type": "THING", "description": "交通工具", "importance": 0.05, "embedding": [0.0, 0.0, 1.0]},
+    ])
+
+    names = [item["name"] for item in store.search("茶", limit=5)]
+    assert sorted(names) == ["红茶", "绿茶"]
+
+    results = store.search("出行", query_embedding=[0.1, 0.0, 0.9], limit=1)
+    assert results[0]["name"] == "火车"
+    assert results[0]["score"] > 0.9
@@ -0,0 +1,246 @@
+"""实体消歧模块测试"""
+
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+
+class MockContext:
+    """模拟 Context，按 Prompt 中的实体对逐一给出判定"""
+
+    def __init__(self, same_names: set[str]):
+        self.same_names = same_names
+        self.calls = 0
+
+    async def llm_generate(self, chat_provider_id=None, prompt=""):
+        self.calls += 1
+        verdicts = []
+        for pair_id, name in re.findall(r"^(\d+)\. 实体A: (\S+)", prompt, re.MULTILINE):
+            verdicts.append({"id": int(pair_id), "same": name in self.same_names})
+        return SimpleNamespace(completion_text=json.dumps({"verdicts": verdicts}))
+
+
+def _make_pairs(count: int):
+    from core.models.entities import EntityNode
+
+    return [
+        (
+            EntityNode(name=f"A{i}", type="THING", description=f"描述{i}"),
+            EntityNode(name=f"B{i}", type="THING", description=f"描述{i}"),
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_verify_pairs_batches_and_caches(temp_dir):
+    """测试批量验证与判定缓存"""
+    from core.services.entity_disambiguation import EntityDisambiguation
+    from core.storage.verdict_cache import MergeVerdictCache
+
+    context = MockContext(same_names={"A0", "A3"})
+    disambiguation = EntityDisambiguation(
+        context, None, verdict_cache=MergeVerdictCache(temp_dir)
+    )
+    disambiguation.VERIFY_BATCH_SIZE = 2
+
+    pairs = _make_pairs(5)
+    verdicts = await disambiguation.verify_pairs(pairs)
+
+    assert verdicts == [True, False, False, True, False]
+    assert context.calls == 3
+
+    # 第二次验证全部命中缓存（包括否定结果）
+    verdicts = await disambiguation.verify_pairs(list(reversed(pairs)))
+    assert verdicts == [False, True, False, False, True]
+    assert context.calls == 3
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_verify_pairs_skips_missing_verdicts(temp_dir):
+    """测试 LLM 未给出的判定不会被缓存"""
+    from core.services.entity_disambiguation import EntityDisambiguation
+    from core.storage.verdict_cache import MergeVerdictCache, make_pair_key
+
+    class EmptyContext:
+        async def llm_generate(self, chat_provider_id=None, prompt=""):
+            return SimpleNamespace(completion_text='{"verdicts": []}')
+
+    cache = MergeVerdictCache(temp_dir)
+    disambiguation = EntityDisambiguation(EmptyContext(), None, verdict_cache=cache)
+
+    pairs = _make_pairs(2)
+    verdicts = await disambiguation.verify_pairs(pairs)
+
+    assert verdicts == [False, False]
+    assert cache.get_many([make_pair_key(e1, e2) for e1, e2 in pairs]) == {}
+
+
+@pytest.mark.unit
+def test_build_merge_clusters():
+    """测试并查集聚合合并簇"""
+    from core.models.entities import EntityNode
+    from core.services.entity_disambiguation import EntityDisambiguation
+
+    a = EntityNode(name="A", type="THING", description="", importance=0.5)
+    b = EntityNode(name="B", type="THING", description="", importance=0.9)
+    c = EntityNode(name="C", type="THING", description="", importance=0.1)
+    d = EntityNode(name="D", type="THING", description="", importance=0.3)
+    e = EntityNode(name="E", type="THING", description="", importance=0.4)
+
+    clusters = EntityDisambiguation.build_merge_clusters([(a, b), (b, c), (d, e)])
+    clusters = {canonical.name: sorted(m.name for m in members) for canonical, members in clusters}
+
+    assert clusters == {"B": ["A", "C"], "E": ["D"]}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_incremental_disambiguation(mock_graph_store, temp_dir):
+    """测试增量消歧只比较水位线之后变化的实体"""
+    import asyncio
+
+    import numpy as np
+
+    from core.models.entities import EntityNode
+    from core.services.entity_disambiguation import EntityDisambiguation
+    from core.storage.verdict_cache import MergeVerdictCache
+
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(3, mock_graph_store.embedding_dim))
+
+    def _entity(name, vector):
+        return EntityNode(name=name, type="THING", description=name, embedding=vector.tolist())
+
+    # 已存在的一对相似实体
+    await mock_graph_store.add_entity(_entity("旧1", base[0]))
+    await mock_graph_store.add_entity(_entity("旧2", base[0] + 0.01))
+    await mock_graph_store.add_entity(_entity("旧3", base[1]))
+
+    context = MockContext(same_names=set())
+    disambiguation = EntityDisambiguation(
+        context,
+        mock_graph_store,
+        embedding_provider=SimpleNamespace(),
+        verdict_cache=MergeVerdictCache(temp_dir),
+    )
+
+    # 第一次运行全部实体参与比较
+    result = await disambiguation.run_disambiguation()
+    assert result["checked"] == 3
+    assert result["found"] == 1
+
+    # 增量消歧不分块读取全表
+    full_load = mock_graph_store.run_chunked
+
+    async def _no_full_load(task, *args, **kwargs):
+        assert task != "disambiguation_load"
+        return await full_load(task, *args, **kwargs)
+
+    mock_graph_store.run_chunked = _no_full_load
+
+    # 没有变化时不做任何比较
+    await asyncio.sleep(0.01)
+    result = await disambiguation.run_disambiguation()
+    assert result == {"found": 0, "merged": 0, "checked": 0}
+
+    # 新实体只与已有实体比较，已判定过的旧实体对不会重新出现
+    await mock_graph_store.add_entity(_entity("新1", base[1] + 0.01))
+    result = await disambiguation.run_disambiguation()
+    assert result["checked"] == 1
+    assert result["found"] == 1
+
+    mock_graph_store.run_chunked = full_load
+
+    # 全量模式忽略水位线
+    result = await disambiguation.run_disambiguation(full_scan=True)
+    assert result["checked"] == 4
+    assert result["found"] == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_migration_backfills_updated_at(mock_graph_store, temp_dir):
+    """测试迁移回填旧数据的 updated_at，之后的消歧仍是增量的"""
+    import numpy as np
+
+    from core.models.entities import EntityNode
+    from core.models.schema import _migrate_tables
+    from core.services.entity_disambiguation import EntityDisambiguation
+    from core.storage.verdict_cache import MergeVerdictCache
+
+    rng = np.random.default_rng(1)
+    base = rng.normal(size=(4, mock_graph_store.embedding_dim))
+    for i in range(3):
+        await mock_graph_store.add_entity(
+            EntityNode(name=f"旧{i}", type="THING", description=f"旧{i}", embedding=base[i].tolist())
+        )
+
+    disambiguation = EntityDisambiguation(
+        MockContext(same_names=set()),
+        mock_graph_store,
+        embedding_provider=SimpleNamespace(),
+        verdict_cache=MergeVerdictCache(temp_dir),
+    )
+    result = await disambiguation.run_disambiguation()
+    assert result["checked"] == 3
+
+    # 模拟升级前写入的实体: updated_at 为 NULL，然后执行迁移
+    def _legacy_and_migrate():
+        conn = mock_graph_store.conn
+        conn.execute("MATCH (e:Entity) SET e.updated_at = NULL")
+        _migrate_tables(conn)
+        result = conn.execute("MATCH (e:Entity) WHERE e.updated_at IS NULL RETURN count(e)")
+        return result.get_next()[0]
+
+    assert await mock_graph_store._execute_in_thread(_legacy_and_migrate) == 0
+
+    # 回填后的旧实体不再被当作变化实体，只有新实体参与比较
+    await mock_graph_store.add_entity(
+        EntityNode(name="新0", type="THING", description="新0", embedding=base[3].tolist())
+    )
+    result = await disambiguation.run_disambiguation()
+    assert result["checked"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_quantized_find_similar_entities(mock_graph_store):
+    """测试量化矩阵与 float32 矩阵找到相同的相似实体对"""
+    import numpy as np
+
+    from core.models.entities import EntityNode
+    from core.services.entity_disambiguation import EntityDisambiguation
+
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(6, mock_graph_store.embedding_dim))
+    vectors = {f"实体{i}": base[i] for i in range(6)}
+    vectors["实体0副本"] = base[0] + 0.01
+    vectors["实体3副本"] = base[3] + 0.01
+    for name, vector in vectors.items():
+        await mock_graph_store.add_entity(
+            EntityNode(name=name, type="THING", description=name, embedding=vector.tolist())
+        )
+
+    results = {}
+    for quantization in (None, "int8", "float16"):
+        disambiguation = EntityDisambiguation(
+            MockContext(same_names=set()),
+            mock_graph_store,
+            embedding_provider=SimpleNamespace(),
+            quantization=quantization,
+        )
+        pairs = await disambiguation.find_similar_entities(0.9)
+        results[quantization] = {
+            tuple(sorted((e1.name, e2.name))): similarity for e1, e2, similarity in pairs
+        }
+
+    assert set(results[None]) == {("实体0", "实体0副本"), ("实体3", "实体3副本")}
+    for quantization in ("int8", "float16"):
+        assert results[quantization].keys() == results[None].keys()
+        for pair, similarity in results[quantization].items():
+            assert similarity == pytest.approx(results[None][pair], abs=1e-5)
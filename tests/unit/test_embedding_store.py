@@ -0,0 +1,87 @@
+"""向量旁路存储测试"""
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.unit
+def test_embedding_store_upsert_remove_reopen(temp_dir):
+    """测试追加写入、墓碑和重新打开"""
+    from core.storage.embedding_store import EmbeddingStore
+
+    store = EmbeddingStore(temp_dir, dim=4)
+    store.upsert_many([("甲", [1.0, 0.0, 0.0, 0.0]), ("乙", [0.0, 2.0, 0.0, 0.0])])
+    assert len(store) == 2
+    assert np.allclose(store.matrix[store.rows_for(["乙"])[0]], [0.0, 1.0, 0.0, 0.0])
+
+    # 向量未变化时不追加
+    store.upsert_many([("甲", [3.0, 0.0, 0.0, 0.0])])
+    assert store.tombstones == 0
+
+    # 向量变化时追加新行，旧行成为墓碑
+    old_row = store.rows_for(["甲"])[0]
+    store.upsert_many([("甲", [0.0, 0.0, 1.0, 0.0])])
+    assert store.tombstones == 1
+    assert store.name_of(old_row) is None
+    assert not store.matrix[old_row].any()
+
+    store.remove(["乙", "不存在"])
+    assert "乙" not in store
+    assert store.rows_for(["乙", "甲"]).tolist()[0] == -1
+
+    reopened = EmbeddingStore(temp_dir, dim=4)
+    assert len(reopened) == 1
+    assert reopened.tombstones == 2
+    assert reopened.search([0.0, 0.0, 1.0, 0.0], top_k=3) == [("甲", pytest.approx(1.0))]
+
+    reopened.compact()
+    assert reopened.tombstones == 0
+    assert reopened.rows_for(["甲"]).tolist() == [0]
+    assert EmbeddingStore(temp_dir, dim=4).search([0.0, 0.0, 1.0, 0.0], top_k=1)[0][0] == "甲"
+
+    # 维度变化时清空
+    assert len(EmbeddingStore(temp_dir, dim=8)) == 0
+
+
+@pytest.mark.unit
+def test_embedding_store_growth(temp_dir):
+    """测试超过初始容量后扩容"""
+    from core.storage.embedding_store import EmbeddingStore
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(EmbeddingStore.MIN_GROWTH + 10, 8))
+    store = EmbeddingStore(temp_dir, dim=8)
+    store.upsert_many([(f"e{i}", vector.tolist()) for i, vector in enumerate(vectors)])
+
+    assert len(store) == len(vectors)
+    name, similarity = store.search(vectors[-1].tolist(), top_k=1)[0]
+    assert name == f"e{len(vectors) - 1}"
+    assert similarity == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.unit
+def test_embedding_store_generations(temp_dir):
+    """测试扩容和压缩写入新一代文件，旧快照在压缩后仍然一致"""
+    from core.storage.embedding_store import EmbeddingStore
+
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(EmbeddingStore.MIN_GROWTH + 10, 8))
+    store = EmbeddingStore(temp_dir, dim=8)
+    store.upsert_many([(f"e{i}", vector.tolist()) for i, vector in enumerate(vectors)])
+    assert [path.name for path in temp_dir.glob("vectors*.f32")] == [store._matrix_path.name]
+
+    # 删除大部分行后，墓碑不会挤占检索结果
+    store.remove([f"e{i}" for i in range(len(vectors) - 3)])
+    assert [name for name, _ in store.search(vectors[-1].tolist(), top_k=10)][0] == f"e{len(vectors) - 1}"
+    assert len(store.search(vectors[-1].tolist(), top_k=10)) == 3
+
+    # 压缩前取得的快照中，行号与名称仍然对应旧文件
+    matrix, names, _ = store._snapshot
+    store.compact()
+    row = names.index(f"e{len(vectors) - 1}")
+    assert np.allclose(matrix[row], vectors[-1] / np.linalg.norm(vectors[-1]), atol=1e-6)
+    assert store.rows_for([f"e{len(vectors) - 1}"]).tolist() == [2]
+
+    reopened = EmbeddingStore(temp_dir, dim=8)
+    assert reopened._matrix_path == store._matrix_path
+    assert reopened.search(vectors[-2].tolist(), top_k=1)[0][0] == f"e{len(vectors) - 2}"
@@ -0,0 +1,145 @@
+"""图扩展检索测试"""
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.unit
+def test_personalized_pagerank():
+    """测试分数集中在种子附近且随关系强度变化"""
+    from core.utils.graph_ops import personalized_pagerank
+
+    # 0 为种子: 0-1 强关系，0-2 弱关系，1-3 为第二跳，4 不连通
+    src = np.array([0, 0, 1])
+    dst = np.array([1, 2, 3])
+    weight = np.array([1.0, 0.1, 1.0])
+    personalization = np.array([1.0, 0, 0, 0, 0])
+
+    scores = personalized_pagerank(5, src, dst, weight, personalization)
+
+    assert scores.sum() == pytest.approx(1.0)
+    assert scores[1] > scores[2]
+    assert scores[0] > scores[2]
+    assert scores[3] > 0
+    assert scores[4] == 0
+
+
+@pytest.mark.unit
+def test_label_propagation():
+    """测试两个弱连接的团被划分为两个社区"""
+    from core.utils.graph_ops import label_propagation
+
+    src, dst = [], []
+    for base in (0, 5):
+        for i in range(5):
+            for j in range(i + 1, 5):
+                src.append(base + i)
+                dst.append(base + j)
+    weight = [1.0] * len(src)
+    # 两个团之间的弱关系，10 不连通
+    src.append(0)
+    dst.append(5)
+    weight.append(0.1)
+
+    labels = label_propagation(11, np.array(src), np.array(dst), np.array(weight))
+
+    assert len(set(labels[:5].tolist())) == 1
+    assert len(set(labels[5:10].tolist())) == 1
+    assert labels[0] != labels[5]
+    assert labels[10] not in (labels[0], labels[5])
+    assert sorted(set(labels.tolist())) == [0, 1, 2]
+
+
+@pytest.mark.unit
+def test_force_layout():
+    """测试力导向布局: 团内距离小于团间距离，增量布局不移动已有节点"""
+    from core.utils.graph_ops import force_layout
+
+    src, dst = [], []
+    for base in (0, 5):
+        for i in range(5):
+            for j in range(i + 1, 5):
+                src.append(base + i)
+                dst.append(base + j)
+    src.append(0)
+    dst.append(5)
+    src, dst = np.array(src), np.array(dst)
+    weight = np.ones(len(src))
+
+    pos = force_layout(10, src, dst, weight)
+    assert pos.shape == (10, 2) and np.isfinite(pos).all()
+
+    def mean_distance(a, b):
+        return np.mean([np.linalg.norm(pos[i] - pos[j]) for i in a for j in b if i != j])
+
+    assert mean_distance(range(5), range(5)) < mean_distance(range(5), range(5, 10))
+
+    # 增量: 节点 9 没有坐标，只移动它，并放在邻居附近
+    initial = pos.copy()
+    initial[9] = np.nan
+    movable = np.isnan(initial).any(axis=1)
+    updated = force_layout(10, src, dst, weight, initial, movable)
+    assert np.array_equal(updated[:9], pos[:9])
+    assert np.linalg.norm(updated[9] - pos[5:9].mean(axis=0)) < mean_distance(range(5), range(5, 10))
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_expand_graph(mock_graph_store):
+    """测试从种子实体扩展两跳邻域"""
+    from core.models.entities import EntityNode, RelatedToRel
+    from core.retrieval.memory_retriever import MemoryRetriever
+
+    for name in ["张三", "公司", "城市", "同事", "无关"]:
+        await mock_graph_store.add_entity(EntityNode(name=name, type="THING", description=name))
+    for from_entity, relation, to_entity, strength in [
+        ("张三", "就职于", "公司", 0.9),
+        ("公司", "位于", "城市", 0.8),
+        ("同事", "就职于", "公司", 0.2),
+    ]:
+        await mock_graph_store.add_relation(RelatedToRel(
+            from_entity=from_entity, to_entity=to_entity, relation=relation, strength=strength
+        ))
+
+    retriever = MemoryRetriever(mock_graph_store, expansion_hops=1, expansion_budget=5)
+    seed = await mock_graph_store.get_entity("张三")
+
+    expanded, relations = await retriever.expand_graph([(seed, 1.0)])
+    assert [entity.name for entity, _ in expanded] == ["公司"]
+    assert [(r["from"], r["to"]) for r in relations] == [("张三", "公司")]
+
+    expanded, relations = await retriever.expand_graph([(seed, 1.0)], hops=2)
+    names = [entity.name for entity, _ in expanded]
+    assert names[0] == "公司"
+    assert set(names) == {"公司", "城市", "同事"}
+    assert len(relations) == 3
+
+    # 节点预算限制扩展数量
+    expanded, _ = await retriever.expand_graph([(seed, 1.0)], hops=2, budget=1)
+    assert [entity.name for entity, _ in expanded] == ["公司"]
+
+    text = retriever._format_memory_context([(seed, 1.0)], expanded, relations)
+    assert "相关实体:" in text
+    assert "- 张三 -> 公司: 就职于" in text
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_strongest_edges_per_node_cap(mock_graph_store):
+    """测试每个前沿实体单独限制边数，高度数实体不会挤掉其他实体的关系"""
+    from core.models.entities import EntityNode, RelatedToRel
+
+    names = ["枢纽", "李四", "朋友"] + [f"邻居{i}" for i in range(30)]
+    for name in names:
+        await mock_graph_store.add_entity(EntityNode(name=name, type="THING", description=name))
+    for i in range(30):
+        await mock_graph_store.add_relation(
+            RelatedToRel(from_entity="枢纽", to_entity=f"邻居{i}", relation="关联", strength=0.5 + i * 0.01)
+        )
+    await mock_graph_store.add_relation(RelatedToRel(from_entity="朋友", to_entity="李四", relation="认识", strength=0.1))
+
+    edges = await mock_graph_store._execute_in_thread(
+        lambda: mock_graph_store.strongest_edges(["枢纽", "李四"], per_node=5)
+    )
+    assert sorted(b for a, b, _, _ in edges if a == "枢纽") == [f"邻居{i}" for i in range(25, 30)]
+    assert ("朋友", "李四", "认识") in [(a, b, relation) for a, b, relation, _ in edges]
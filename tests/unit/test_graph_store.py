@@ -178,3 +178,675 @@ async def test_get_stats(mock_graph_store):
     assert stats["entities"] >= 3
     assert "relations" in stats
     assert "sessions" in stats
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_merge_entity_cluster(mock_graph_store):
+    """测试簇合并与别名解析"""
+    from core.models.entities import EntityNode, RelatedToRel, SessionNode
+
+    for name in ["北京", "北京市", "Beijing", "长城"]:
+        await mock_graph_store.add_entity(
+            EntityNode(name=name, type="地点", description=name, importance=0.5)
+        )
+    await mock_graph_store.add_session(SessionNode(id="s1", name="会话", type="PRIVATE"))
+    await mock_graph_store.link_entity_to_session("北京市", "s1")
+    await mock_graph_store.link_entity_to_session("Beijing", "s1")
+
+    # 两个成员都指向长城，簇内部的边应被丢弃
+    for source in ["北京市", "Beijing"]:
+        await mock_graph_store.add_relation(
+            RelatedToRel(from_entity=source, to_entity="长城", relation="拥有", strength=0.5)
+        )
+    await mock_graph_store.add_relation(
+        RelatedToRel(from_entity="北京市", to_entity="北京", relation="即", strength=0.5)
+    )
+
+    success = await mock_graph_store.merge_entity_cluster("北京", ["北京市", "Beijing"])
+    assert success is True
+
+    relations = await mock_graph_store.get_entity_relations("北京")
+    assert len(relations) == 1
+    assert relations[0]["to"] == "长城"
+    # 读取时按时间衰减，允许微小误差
+    assert relations[0]["strength"] == pytest.approx(1.0, rel=1e-3)
+
+    merged = await mock_graph_store.get_entity("北京")
+    assert merged.importance == pytest.approx(1.5, rel=1e-3)
+
+    # 旧名称解析到保留实体
+    alias = await mock_graph_store.get_entity("北京市")
+    assert alias is not None
+    assert alias.name == "北京"
+
+    stats = await mock_graph_store.get_stats()
+    assert stats["entities"] == 2
+
+    # 通过旧名称删除的是合并后的实体
+    success, _ = await mock_graph_store.delete_entity("Beijing")
+    assert success is True
+    assert await mock_graph_store.get_entity("北京") is None
+    assert await mock_graph_store.get_entity("北京市") is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_merge_entity_cluster_evidence(mock_graph_store):
+    """测试合并关系时依据去重、跳过空值，全部为空时保持 NULL"""
+    from core.models.entities import EntityNode, RelatedToRel
+
+    for name in ["甲", "甲1", "甲2", "乙", "丙"]:
+        await mock_graph_store.add_entity(EntityNode(name=name, type="THING", description=name))
+    await mock_graph_store.add_relation(
+        RelatedToRel(from_entity="甲", to_entity="乙", relation="认识", evidence="同事")
+    )
+    for member, evidence in [("甲1", "同事"), ("甲2", "同学")]:
+        await mock_graph_store.add_relation(
+            RelatedToRel(from_entity=member, to_entity="乙", relation="认识", evidence=evidence)
+        )
+    for member in ["甲1", "甲2"]:
+        await mock_graph_store.add_relation(
+            RelatedToRel(from_entity=member, to_entity="丙", relation="认识", evidence="")
+        )
+
+    assert await mock_graph_store.merge_entity_cluster("甲", ["甲1", "甲2"]) is True
+
+    def _evidence():
+        result = mock_graph_store.conn.execute(
+            "MATCH (:Entity {name: '甲'})-[r:RELATED_TO]->(t:Entity) RETURN t.name, r.evidence"
+        )
+        rows = {}
+        while result.has_next():
+            name, evidence = result.get_next()
+            rows[name] = evidence
+        return rows
+
+    evidence = await mock_graph_store._execute_in_thread(_evidence)
+    assert evidence["乙"] == "同事; 同学"
+    assert evidence["丙"] is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_lazy_time_decay(mock_graph_store):
+    """测试读取时计算时间衰减、清理和衰减压缩"""
+    import asyncio
+
+    from core.models.entities import EntityNode
+
+    await mock_graph_store.add_entity(
+        EntityNode(name="衰减实体", type="THING", description="测试", importance=0.5)
+    )
+    await mock_graph_store.add_entity(
+        EntityNode(name="保留实体", type="THING", description="测试", importance=1.0)
+    )
+
+    # 缩短衰减周期，至少经过 4 个周期
+    mock_graph_store.decay_interval = 0.1
+    await asyncio.sleep(0.4)
+
+    entity = await mock_graph_store.get_entity("衰减实体")
+    assert 0 < entity.importance < 0.5 * 0.95 ** 3
+
+    # 清理按有效重要性判断
+    assert await mock_graph_store.prune_low_importance_entities(0.45) == 1
+    assert await mock_graph_store.get_entity("衰减实体") is None
+
+    # 衰减系数未低于 max_drift 时不写回
+    assert await mock_graph_store.compact_time_decay(max_drift=0.01) == 0
+    assert await mock_graph_store.compact_time_decay(max_drift=0.99) == 1
+
+    # 写回后存储值即为有效值，且低于初始值
+    mock_graph_store.decay_interval = 3600
+    result = mock_graph_store.conn.execute(
+        "MATCH (e:Entity {name: '保留实体'}) RETURN e.importance"
+    )
+    stored = result.get_next()[0]
+    assert stored < 0.95 ** 3
+    entity = await mock_graph_store.get_entity("保留实体")
+    assert entity.importance == pytest.approx(stored, rel=1e-3)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_chunked_maintenance_progress(mock_graph_store):
+    """测试维护任务分块执行并记录进度"""
+    from core.models.entities import EntityNode
+
+    for i in range(5):
+        await mock_graph_store.add_entity(
+            EntityNode(name=f"实体{i}", type="THING", description="测试", importance=0.05 * (i % 2) + 0.01)
+        )
+
+    mock_graph_store.chunk_size = 2
+    mock_graph_store.chunk_pause = 0
+
+    # 按偏移范围分块的任务覆盖全部 5 个实体
+    await mock_graph_store.compact_time_decay()
+    progress = mock_graph_store.get_maintenance_progress()["compact_time_decay"]
+    assert progress["total_chunks"] == 3
+    assert len(progress["chunk_timings_ms"]) == 3
+
+    count = await mock_graph_store.prune_low_importance_entities(0.03)
+    assert count == 3
+
+    # 只有重要性索引给出的 3 个候选参与分块
+    progress = mock_graph_store.get_maintenance_progress()["prune_low_importance"]
+    assert progress["status"] == "completed"
+    assert progress["total_chunks"] == 2
+    assert progress["completed_chunks"] == 2
+    assert progress["processed"] == 3
+    assert len(progress["chunk_timings_ms"]) == 2
+
+    stats = await mock_graph_store.get_stats()
+    assert stats["entities"] == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_importance_index_sync(mock_graph_store):
+    """测试写入后重要性索引同步更新"""
+    from core.models.entities import EntityNode
+
+    for name, importance in [("甲", 0.3), ("乙", 0.6), ("丙", 0.9)]:
+        await mock_graph_store.add_entity(
+            EntityNode(name=name, type="THING", description=name, importance=importance)
+        )
+
+    names, total = await mock_graph_store.top_entity_names(10)
+    assert names == ["丙", "乙", "甲"]
+    assert total == 3
+
+    # 再次提及会提高重要性
+    await mock_graph_store.add_entity(EntityNode(name="甲", type="THING", description="甲"))
+    await mock_graph_store.add_entity(EntityNode(name="甲", type="THING", description="甲"))
+    await mock_graph_store.add_entity(EntityNode(name="甲", type="THING", description="甲"))
+    await mock_graph_store.add_entity(EntityNode(name="甲", type="THING", description="甲"))
+    names, _ = await mock_graph_store.top_entity_names(1)
+    assert names == ["丙"]
+    names, _ = await mock_graph_store.top_entity_names(1, offset=1)
+    assert names == ["甲"]
+
+    await mock_graph_store.merge_entity_cluster("乙", ["丙"])
+    names, total = await mock_graph_store.top_entity_names(10)
+    assert names == ["乙", "甲"]
+    assert total == 2
+
+    await mock_graph_store.delete_entity("甲")
+    names, total = await mock_graph_store.top_entity_names(10, min_importance=0.5)
+    assert names == ["乙"]
+    assert total == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_prune_rolls_back_archive_on_failed_delete(mock_graph_store, temp_dir):
+    """测试清理时删除失败会撤销归档，实体保留在热图谱中"""
+    from core.models.entities import EntityNode
+    from core.storage.cold_store import ColdStore
+
+    mock_graph_store.cold_store = ColdStore(temp_dir)
+    await mock_graph_store.add_entity(EntityNode(name="旧项目", type="THING", description="旧", importance=0.05))
+
+    class _FailingDelete:
+        def __init__(self, conn):
+            self._conn = conn
+
+        def execute(self, query, *args, **kwargs):
+            if "DETACH DELETE" in query:
+                raise RuntimeError("模拟删除失败")
+            return self._conn.execute(query, *args, **kwargs)
+
+    conn = mock_graph_store.conn
+    mock_graph_store.conn = _FailingDelete(conn)
+    try:
+        assert await mock_graph_store.prune_low_importance_entities(threshold=0.1) == 0
+    finally:
+        mock_graph_store.conn = conn
+
+    assert "旧项目" not in mock_graph_store.cold_store
+    assert mock_graph_store.cold_store.get("旧项目") is None
+    assert await mock_graph_store.get_entity("旧项目") is not None
+    assert mock_graph_store.get_maintenance_progress()["prune_low_importance"]["failed_chunks"] == 1
+
+    # 再次清理时正常归档
+    assert await mock_graph_store.prune_low_importance_entities(threshold=0.1) == 1
+    assert "旧项目" in mock_graph_store.cold_store
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_prune_archives_and_rehydrates(mock_graph_store, temp_dir):
+    """测试清理时归档实体，再次提及时恢复"""
+    from core.models.entities import EntityNode, RelatedToRel, SessionNode
+    from core.storage.cold_store import ColdStore
+
+    mock_graph_store.cold_store = ColdStore(temp_dir)
+
+    await mock_graph_store.add_session(SessionNode(id="s1", name="测试会话", type="PRIVATE"))
+    await mock_graph_store.add_entity(EntityNode(name="张三", type="PERSON", description="用户", importance=0.9))
+    await mock_graph_store.add_entity(EntityNode(name="旧项目", type="THING", description="很久以前的项目", importance=0.05))
+    await mock_graph_store.add_relation(
+        RelatedToRel(from_entity="张三", to_entity="旧项目", relation="负责", strength=0.6, evidence="")
+    )
+    await mock_graph_store.link_entity_to_session("旧项目", "s1")
+
+    count = await mock_graph_store.prune_low_importance_entities(threshold=0.1)
+    assert count == 1
+    assert await mock_graph_store.get_entity("旧项目") is None
+    assert "旧项目" in mock_graph_store.cold_store
+    assert (await mock_graph_store.get_stats())["archived_entities"] == 1
+
+    archived = await mock_graph_store.search_archived("项目")
+    assert archived[0]["name"] == "旧项目"
+
+    # 再次被提及: 从冷存储恢复，并在原有重要性上增加
+    await mock_graph_store.add_entity(EntityNode(name="旧项目", type="THING", description="很久以前的项目"))
+    entity = await mock_graph_store.get_entity("旧项目")
+    assert entity is not None
+    assert entity.importance == pytest.approx(0.15, rel=1e-2)
+    assert "旧项目" not in mock_graph_store.cold_store
+
+    relations = await mock_graph_store.get_entity_relations("旧项目")
+    assert [(rel["from"], rel["relation"]) for rel in relations] == [("张三", "负责")]
+
+    result = mock_graph_store.conn.execute(
+        "MATCH (:Entity {name: '旧项目'})-[m:MENTIONED_IN]->(s:Session) RETURN s.id, m.mention_count"
+    )
+    assert result.get_next() == ["s1", 1]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_embedding_store_sync(mock_graph_store):
+    """测试实体写入、合并和删除时同步向量存储"""
+    import numpy as np
+
+    from core.models.entities import EntityNode
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(3, mock_graph_store.embedding_dim))
+    for name, vector in zip(["甲", "乙", "丙"], vectors):
+        await mock_graph_store.add_entity(
+            EntityNode(name=name, type="THING", description=name, embedding=vector.tolist())
+        )
+
+    hits = await mock_graph_store.vector_search(vectors[1].tolist(), top_k=1)
+    assert hits[0][0] == "乙"
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    await mock_graph_store.merge_entity_cluster("甲", ["乙"])
+    await mock_graph_store.delete_entity("丙")
+    assert len(mock_graph_store.embeddings) == 1
+    hits = await mock_graph_store.vector_search(vectors[1].tolist(), top_k=3)
+    assert [name for name, _ in hits] == ["甲"]
+
+    # 向量存储丢失时从数据库重建
+    mock_graph_store.embeddings.rebuild([])
+    mock_graph_store._sync_embedding_store()
+    assert "甲" in mock_graph_store.embeddings
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_adjacency_cache_sync(mock_graph_store):
+    """测试邻居遍历与关系写入、删除同步"""
+    from core.models.entities import EntityNode, RelatedToRel
+
+    for name, importance in [("中心", 1.0), ("甲", 0.3), ("乙", 0.9), ("远", 0.5)]:
+        await mock_graph_store.add_entity(
+            EntityNode(name=name, type="THING", description=name, importance=importance)
+        )
+    await mock_graph_store.add_relation(RelatedToRel(from_entity="中心", to_entity="甲", relation="认识"))
+
+    # 首次查询时从数据库构建，之后的写入增量更新
+    assert await mock_graph_store.k_hop_neighbors("中心") == [("甲", 1)]
+    await mock_graph_store.add_relation(RelatedToRel(from_entity="乙", to_entity="中心", relation="认识"))
+    await mock_graph_store.add_relation(RelatedToRel(from_entity="乙", to_entity="远", relation="认识"))
+
+    # 同距离按有效重要性降序
+    assert await mock_graph_store.k_hop_neighbors("中心", k=2) == [("乙", 1), ("甲", 1), ("远", 2)]
+
+    nodes, edges = await mock_graph_store.ego_network(["中心"], depth=1)
+    assert nodes == {"中心": 0, "甲": 1, "乙": 1}
+    assert sorted((e["from"], e["to"]) for e in edges) == [("中心", "甲"), ("乙", "中心")]
+
+    await mock_graph_store.delete_relation("乙", "远")
+    await mock_graph_store.delete_entity("甲")
+    assert await mock_graph_store.bfs(["中心"], 3) == {"中心": 0, "乙": 1}
+
+    # 重建后与增量结果一致
+    mock_graph_store._adjacency_stale = True
+    assert await mock_graph_store.bfs(["中心"], 3) == {"中心": 0, "乙": 1}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_get_relations_for_entities(mock_graph_store):
+    """测试批量获取多个实体的主要关系"""
+    from core.models.entities import EntityNode, RelatedToRel
+
+    for name in ["甲", "乙", "丙", "丁"]:
+        await mock_graph_store.add_entity(EntityNode(name=name, type="PERSON", description=name))
+    for target, strength in [("乙", 0.2), ("丙", 0.9), ("丁", 0.5)]:
+        await mock_graph_store.add_relation(
+            RelatedToRel(from_entity="甲", to_entity=target, relation="认识", strength=strength)
+        )
+
+    relations = await mock_graph_store.get_relations_for_entities(["甲", "丙", "无关"], per_entity_limit=2)
+
+    top, total = relations["甲"]
+    assert total == 3
+    assert [rel["to"] for rel in top] == ["丙", "丁"]
+    assert all(rel["direction"] == "outgoing" for rel in top)
+
+    top, total = relations["丙"]
+    assert total == 1
+    assert top[0]["from"] == "甲"
+    assert top[0]["direction"] == "incoming"
+
+    assert relations["无关"] == ([], 0)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_entity_projection_decoding(mock_graph_store):
+    """测试列投影查询不读取向量"""
+    from core.models.entities import EntityNode
+
+    embedding = [0.1] * mock_graph_store.embedding_dim
+    await mock_graph_store.add_entity(
+        EntityNode(name="投影", type="THING", description="描述", embedding=embedding, importance=0.7)
+    )
+
+    entity = await mock_graph_store.get_entity("投影")
+    assert entity.embedding is None
+    assert entity.importance == pytest.approx(0.7, abs=1e-3)
+    assert entity.created_at is not None
+
+    entity = await mock_graph_store.get_entity("投影", include_embedding=True)
+    assert entity.embedding == pytest.approx(embedding)
+
+    [found] = await mock_graph_store.search_entities("投影")
+    assert found.description == "描述"
+    assert found.embedding is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compress", [False, True])
+async def test_streaming_ndjson_export(mock_graph_store, temp_dir, compress):
+    """测试分块流式导出 NDJSON 与字典导出一致"""
+    from core.models.entities import EntityNode, RelatedToRel, SessionNode
+    from core.utils import read_ndjson, write_ndjson
+
+    mock_graph_store.chunk_size = 2
+    await mock_graph_store.add_session(SessionNode(id="s1", name="会话1", type="PRIVATE", persona_id="p1"))
+    await mock_graph_store.add_session(SessionNode(id="s2", name="会话2", type="PRIVATE", persona_id="p2"))
+    for i in range(5):
+        await mock_graph_store.add_entity(EntityNode(name=f"实体{i}", type="THING", description=f"描述{i}"))
+        await mock_graph_store.link_entity_to_session(f"实体{i}", "s1" if i < 3 else "s2")
+    for i in range(4):
+        await mock_graph_store.add_relation(
+            RelatedToRel(from_entity=f"实体{i}", to_entity=f"实体{i + 1}", relation="相邻")
+        )
+
+    path = temp_dir / ("export.ndjson.gz" if compress else "export.ndjson")
+    counts = await write_ndjson(mock_graph_store.iter_export(), path, compress)
+    assert counts == {"meta": 1, "entity": 5, "relation": 4, "session": 2}
+
+    records = list(read_ndjson(path))
+    assert records[0]["kind"] == "meta"
+    data = await mock_graph_store.export_graph()
+    assert sorted(r["name"] for r in records if r["kind"] == "entity") == sorted(e["name"] for e in data["entities"])
+
+    # 人格过滤只保留两端都属于该人格的关系
+    data = await mock_graph_store.export_graph("p1")
+    assert sorted(e["name"] for e in data["entities"]) == ["实体0", "实体1", "实体2"]
+    assert sorted((r["from"], r["to"]) for r in data["relations"]) == [("实体0", "实体1"), ("实体1", "实体2")]
+    assert [s["id"] for s in data["sessions"]] == ["s1"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("merge", [True, False])
+async def test_bulk_import(mock_graph_store, merge):
+    """测试批量导入: 新数据走 COPY，冲突走 MERGE，保留导入的向量"""
+    from core.models.entities import EntityNode, RelatedToRel
+
+    await mock_graph_store.add_entity(EntityNode(name="甲", type="PERSON", description="原描述", importance=0.3))
+    await mock_graph_store.add_entity(EntityNode(name="乙", type="PERSON", description="乙"))
+    await mock_graph_store.add_relation(RelatedToRel(from_entity="甲", to_entity="乙", relation="原关系", strength=0.4))
+
+    dim = mock_graph_store.embedding_dim
+    vector = [0.0] * dim
+    vector[0] = 1.0
+    records = [{"kind": "meta", "version": mock_graph_store.EXPORT_VERSION}]
+    records.append({"kind": "entity", "name": "甲", "type": "PERSON", "description": "新描述", "importance": 0.9})
+    for i in range(5):
+        records.append({
+            "kind": "entity",
+            "name": f"丙{i}",
+            "type": "THING",
+            "description": f"多行\n描述 \"{i}\"",
+            "importance": 0.5,
+            "embedding": vector,
+        })
+    records.append({"kind": "relation", "from": "甲", "to": "乙", "relation": "新关系", "strength": 0.8})
+    for i in range(4):
+        records.append({"kind": "relation", "from": f"丙{i}", "to": f"丙{i + 1}", "relation": "相邻"})
+    records.append({"kind": "relation", "from": "甲", "to": "不存在", "relation": "悬空"})
+
+    stats = await mock_graph_store.bulk_import(iter(records), merge=merge, batch_size=3)
+    assert stats["entities"] == 6
+    assert stats["relations"] == 5
+    assert stats["skipped"] == 1
+    assert stats["copied"] == 9
+    assert stats["merged"] == 2
+    assert stats["embeddings_reused"] == 5
+    assert mock_graph_store.get_maintenance_progress()["bulk_import"]["status"] == "completed"
+
+    entity = await mock_graph_store.get_entity("丙3", include_embedding=True)
+    assert entity.description == '多行\n描述 "3"'
+    assert entity.embedding[0] == pytest.approx(1.0)
+    assert "丙3" in mock_graph_store.embeddings
+
+    entity = await mock_graph_store.get_entity("甲")
+    assert entity.description == ("原描述" if merge else "新描述")
+    assert entity.importance == pytest.approx(0.9, abs=1e-3)
+
+    relations = await mock_graph_store.get_relations_for_entities(["甲"], per_entity_limit=5)
+    top, total = relations["甲"]
+    assert total == 1
+    assert top[0]["relation"] == ("原关系" if merge else "新关系")
+    assert top[0]["strength"] == pytest.approx(0.8, abs=1e-3)
+    assert [name for name, _ in await mock_graph_store.k_hop_neighbors("丙0", k=4)] == ["丙1", "丙2", "丙3", "丙4"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("dtype", ["float16", "float32"])
+async def test_export_embedding_sidecar_roundtrip(mock_graph_store, temp_dir, dtype):
+    """测试导出的 .npy 向量文件在导入时被直接使用"""
+    import numpy as np
+
+    from core.models.entities import EntityNode
+    from core.storage.graph_store import GraphStore
+    from core.utils import attach_embeddings, read_ndjson, sidecar_path, write_ndjson_with_embeddings
+
+    dim = mock_graph_store.embedding_dim
+    rng = np.random.default_rng(0)
+    vectors = {f"实体{i}": rng.standard_normal(dim).astype(np.float32) * 0.1 for i in range(5)}
+    for name, vector in vectors.items():
+        await mock_graph_store.add_entity(
+            EntityNode(name=name, type="THING", description=name, embedding=vector.tolist())
+        )
+
+    path = temp_dir / "export.ndjson.gz"
+    counts = await write_ndjson_with_embeddings(
+        mock_graph_store.iter_export(include_embeddings=True), path, compress=True, dtype=dtype
+    )
+    assert counts["entity"] == 5
+
+    matrix = np.load(sidecar_path(path), mmap_mode="r")
+    assert sidecar_path(path).name == "export.embeddings.npy"
+    assert matrix.shape == (5, dim) and matrix.dtype == np.dtype(dtype)
+    records = list(read_ndjson(path))
+    assert records[0]["embeddings"]["file"] == "export.embeddings.npy"
+    assert all("embedding" not in r for r in records)
+
+    target = GraphStore(temp_dir / "restored")
+    try:
+        stats = await target.bulk_import(attach_embeddings(read_ndjson(path), path.parent))
+        assert stats["entities"] == 5
+        assert stats["embeddings_reused"] == 5
+        assert stats["embeddings_computed"] == 0
+
+        tolerance = 1e-3 if dtype == "float16" else 1e-6
+        for name, vector in vectors.items():
+            entity = await target.get_entity(name, include_embedding=True)
+            assert np.allclose(entity.embedding, vector, atol=tolerance)
+    finally:
+        target.close()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_community_overview(mock_graph_store):
+    """测试社区划分、社区间关系、展开社区和缓存失效"""
+    from core.models.entities import EntityNode, RelatedToRel
+
+    for group in ("甲", "乙"):
+        for i in range(4):
+            await mock_graph_store.add_entity(
+                EntityNode(name=f"{group}{i}", type="PERSON", description="", importance=0.5 + i * 0.1)
+            )
+        for i in range(4):
+            for j in range(i + 1, 4):
+                await mock_graph_store.add_relation(
+                    RelatedToRel(from_entity=f"{group}{i}", to_entity=f"{group}{j}", relation="认识")
+                )
+    await mock_graph_store.add_relation(RelatedToRel(from_entity="甲0", to_entity="乙0", relation="认识", strength=0.1))
+    await mock_graph_store.add_entity(EntityNode(name="孤立", type="PLACE", description=""))
+
+    overview = await mock_graph_store.get_community_overview(top_members=2)
+    assert overview["total_clusters"] == 3
+    sizes = [(c["size"], c["isolated"]) for c in overview["clusters"]]
+    assert sizes == [(4, False), (4, False), (1, True)]
+    assert overview["clusters"][0]["top_members"][0][1] == "3"
+    assert len(overview["clusters"][0]["top_members"]) == 2
+    assert [(link["source"], link["target"], link["count"]) for link in overview["links"]] == [(0, 1, 1)]
+
+    expanded = await mock_graph_store.expand_community(0, limit=3)
+    assert len(expanded["members"]) == 3
+    assert len(expanded["edges"]) == 3
+    assert [link["cluster"] for link in expanded["links"]] == [1]
+    assert await mock_graph_store.expand_community(99) is None
+
+    # 维护周期之间复用缓存，失效后重新计算
+    await mock_graph_store.add_entity(EntityNode(name="新实体", type="PLACE", description=""))
+    assert (await mock_graph_store.get_community_overview())["computed_at"] == overview["computed_at"]
+    mock_graph_store.invalidate_communities()
+    overview = await mock_graph_store.get_community_overview()
+    assert overview["clusters"][2]["size"] == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_community_propagation_off_executor(mock_graph_store, monkeypatch):
+    """测试标签传播不在数据库执行器线程中进行"""
+    import threading
+
+    from core.models.entities import EntityNode, RelatedToRel
+    from core.storage import graph_store as graph_store_module
+
+    for name in ("甲", "乙"):
+        await mock_graph_store.add_entity(EntityNode(name=name, type="PERSON", description=""))
+    await mock_graph_store.add_relation(RelatedToRel(from_entity="甲", to_entity="乙", relation="认识"))
+
+    threads = []
+    propagate = graph_store_module.label_propagation
+
+    def _recording(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return propagate(*args, **kwargs)
+
+    monkeypatch.setattr(graph_store_module, "label_propagation", _recording)
+    overview = await mock_graph_store.get_community_overview()
+    assert overview["clusters"][0]["size"] == 2
+
+    executor_thread = await mock_graph_store._execute_in_thread(threading.current_thread)
+    assert threads and threads[0] is not executor_thread
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_layout_cache(mock_graph_store):
+    """测试布局坐标缓存: 只覆盖重要实体，增量更新不移动已有实体"""
+    from core.models.entities import EntityNode, RelatedToRel
+
+    mock_graph_store.layout_max_nodes = 4
+    for i in range(5):
+        await mock_graph_store.add_entity(
+            EntityNode(name=f"实体{i}", type="THING", description="", importance=0.9 - i * 0.1)
+        )
+    for i in range(4):
+        await mock_graph_store.add_relation(RelatedToRel(from_entity=f"实体{i}", to_entity=f"实体{i + 1}", relation="相邻"))
+
+    names = [f"实体{i}" for i in range(5)]
+    assert await mock_graph_store.missing_layout(names) == names[:4]
+    assert await mock_graph_store.update_layout() == 4
+    positions = mock_graph_store.layout_positions(names)
+    assert sorted(positions) == names[:4]
+    # 布局范围之外的实体没有坐标，但不算待计算
+    assert await mock_graph_store.missing_layout(names) == []
+    assert await mock_graph_store.update_layout() == 0
+
+    # 新的重要实体进入布局范围，只计算它的坐标，跌出范围的实体被移除
+    await mock_graph_store.add_entity(EntityNode(name="新实体", type="THING", description="", importance=1.0))
+    await mock_graph_store.add_relation(RelatedToRel(from_entity="新实体", to_entity="实体0", relation="相邻"))
+    assert await mock_graph_store.update_layout() == 1
+    updated = mock_graph_store.layout_positions(names + ["新实体"])
+    assert sorted(updated) == sorted(["新实体"] + names[:3])
+    assert all(updated[name] == positions[name] for name in names[:3])
+
+    assert await mock_graph_store.update_layout(full=True) == 4
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stats_cache(mock_graph_store):
+    """测试统计按写入代数缓存: 只有增删节点或关系才重新计数"""
+    from core.models.entities import EntityNode, RelatedToRel, UserNode
+
+    await mock_graph_store.add_entity(EntityNode(name="实体1", type="人物", description="测试"))
+    await mock_graph_store.add_entity(EntityNode(name="实体2", type="地点", description="测试"))
+    stats = await mock_graph_store.get_stats()
+    assert stats["entities"] == 2
+    assert {row["type"]: row["count"] for row in await mock_graph_store.get_entity_type_distribution()} == {
+        "人物": 1,
+        "地点": 1,
+    }
+
+    # 再次提及已有实体、更新已有用户不影响计数，缓存保持有效
+    generation = mock_graph_store._write_generation
+    await mock_graph_store.add_user(UserNode(id="u1", name="用户", platform="test"))
+    assert mock_graph_store._write_generation == generation + 1
+    await mock_graph_store.add_user(UserNode(id="u1", name="用户改名", platform="test"))
+    await mock_graph_store.add_entity(EntityNode(name="实体1", type="人物", description="测试"))
+    assert mock_graph_store._write_generation == generation + 1
+
+    await mock_graph_store.add_relation(RelatedToRel(from_entity="实体1", to_entity="实体2", relation="位于"))
+    await mock_graph_store.add_entity(EntityNode(name="实体3", type="人物", description="测试"))
+    stats = await mock_graph_store.get_stats()
+    assert (stats["entities"], stats["relations"], stats["users"]) == (3, 1, 1)
+    assert await mock_graph_store.get_stats() == stats
+
+    await mock_graph_store.delete_entity("实体1")
+    stats = await mock_graph_store.get_stats()
+    assert (stats["entities"], stats["relations"]) == (2, 0)
+    assert {row["type"]: row["count"] for row in await mock_graph_store.get_entity_type_distribution()} == {
+        "人物": 1,
+        "地点": 1,
+    }
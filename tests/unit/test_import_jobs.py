@@ -0,0 +1,113 @@
+"""导入任务模块测试"""
+
+import json
+
+import pytest
+
+
+def _ndjson(records: list[dict]) -> bytes:
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_import_job_resume_after_restart(mock_graph_store, temp_dir):
+    """测试进程重启后中断的任务从已提交的记录之后续跑"""
+    from core.services import ImportJobManager
+
+    records = [{"kind": "entity", "name": f"实体{i}", "type": "THING", "description": ""} for i in range(4)]
+    records += [{"kind": "relation", "from": "实体0", "to": f"实体{i}", "relation": "关联"} for i in range(1, 4)]
+
+    jobs = ImportJobManager(mock_graph_store, temp_dir / "jobs")
+    job = jobs.create("backup.ndjson")
+    await jobs.append_chunk(job["id"], 0, _ndjson(records))
+
+    # 模拟上次运行已提交前 4 条记录（全部实体）后进程退出
+    await mock_graph_store.bulk_import(iter(records[:4]))
+    saved = jobs.get(job["id"])
+    saved.update(status="running", committed_records=4)
+    jobs._save(saved)
+
+    jobs = ImportJobManager(mock_graph_store, temp_dir / "jobs")
+    assert jobs.get(job["id"])["status"] == "interrupted"
+
+    jobs.start(job["id"])
+    await jobs.wait(job["id"])
+
+    job = jobs.get(job["id"])
+    assert job["status"] == "completed"
+    assert job["committed_records"] == len(records)
+    assert job["stats"]["entities"] == 0
+    assert job["stats"]["relations"] == 3
+    assert not (temp_dir / "jobs" / f"{job['id']}.upload").exists()
+    assert sorted(name for name, _ in await mock_graph_store.k_hop_neighbors("实体0")) == ["实体1", "实体2", "实体3"]
+
+    with pytest.raises(ValueError):
+        jobs.create("backup.csv")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_import_job_chunked_upload(mock_graph_store, temp_dir):
+    """测试分块上传按偏移续传，并发写入同一任务时按顺序校验偏移"""
+    import asyncio
+
+    from core.services import ImportJobManager
+
+    jobs = ImportJobManager(mock_graph_store, temp_dir / "jobs")
+    job = jobs.create("backup.ndjson")
+    data = _ndjson([{"kind": "entity", "name": "实体", "type": "THING", "description": ""}])
+
+    results = await asyncio.gather(
+        jobs.append_chunk(job["id"], 0, data[:10]),
+        jobs.append_chunk(job["id"], 0, data[:10]),
+        return_exceptions=True,
+    )
+    assert sum(isinstance(result, ValueError) for result in results) == 1
+    assert await jobs.append_chunk(job["id"], 10, data[10:]) == len(data)
+    assert (temp_dir / "jobs" / f"{job['id']}.upload").read_bytes() == data
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_import_job_retry_after_failed_batch(mock_graph_store, temp_dir, monkeypatch):
+    """测试批次失败后已提交的记录数停在失败批次之前，重试时重新导入该批次"""
+    from core.services import ImportJobManager
+
+    records = [{"kind": "entity", "name": f"e{i}", "type": "THING", "description": ""} for i in range(6)]
+    monkeypatch.setattr(mock_graph_store, "chunk_size", 3)
+
+    original = mock_graph_store._import_entity_batch
+    calls = 0
+
+    async def flaky(batch, *args):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("注入的批次失败")
+        return await original(batch, *args)
+
+    monkeypatch.setattr(mock_graph_store, "_import_entity_batch", flaky)
+
+    jobs = ImportJobManager(mock_graph_store, temp_dir / "jobs")
+    job = jobs.create("backup.ndjson")
+    await jobs.append_chunk(job["id"], 0, _ndjson(records))
+
+    jobs.start(job["id"])
+    await jobs.wait(job["id"])
+    job = jobs.get(job["id"])
+    assert job["status"] == "failed"
+    assert job["committed_records"] == 0
+    # 失败批次之后写入的批次不计入，续跑时会重新写入
+    assert job["stats"]["entities"] == 0
+    assert (temp_dir / "jobs" / f"{job['id']}.upload").exists()
+
+    jobs.start(job["id"])
+    await jobs.wait(job["id"])
+    job = jobs.get(job["id"])
+    assert job["status"] == "completed"
+    assert job["committed_records"] == len(records)
+    assert job["stats"]["entities"] == len(records)
+    assert not (temp_dir / "jobs" / f"{job['id']}.upload").exists()
+    for i in range(6):
+        assert await mock_graph_store.get_entity(f"e{i}") is not None
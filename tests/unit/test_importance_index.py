@@ -0,0 +1,47 @@
+"""重要性索引测试"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.mark.unit
+def test_importance_index_orders_by_effective_value():
+    """测试索引按衰减后的有效重要性排序"""
+    from core.storage.importance_index import ImportanceIndex
+
+    now = datetime.now(timezone.utc)
+    index = ImportanceIndex(decay_rate=0.5, decay_interval=3600)
+    index.rebuild([
+        # 存储值高但已衰减两个周期: 有效值 0.2
+        ("旧", 0.8, now - timedelta(hours=2)),
+        ("新", 0.3, now),
+        ("低", 0.05, now),
+    ])
+
+    assert index.top(3) == ["新", "旧", "低"]
+    assert index.top(1, offset=1) == ["旧"]
+    assert index.top(3, min_importance=0.1) == ["新", "旧"]
+    assert index.count(min_importance=0.25) == 1
+    assert index.below(0.25) == ["低", "旧"]
+    # 游标分页从游标之后继续
+    assert index.top(3, after=(index.key_of("新"), "新")) == ["旧", "低"]
+
+
+@pytest.mark.unit
+def test_importance_index_update_and_remove():
+    """测试增量更新"""
+    from core.storage.importance_index import ImportanceIndex
+
+    now = datetime.now(timezone.utc)
+    index = ImportanceIndex(decay_rate=0.95, decay_interval=3600)
+    index.update("A", 0.5, now)
+    index.update("B", 0.6, now)
+    index.update("A", 0.9, now)
+
+    assert len(index) == 2
+    assert index.top(2) == ["A", "B"]
+
+    index.remove("A")
+    index.remove("不存在")
+    assert index.top(2) == ["B"]
@@ -0,0 +1,110 @@
+"""向量计算工具测试"""
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.unit
+def test_to_normalized_matrix():
+    """测试归一化矩阵和零向量掩码"""
+    from core.utils.vector_ops import to_normalized_matrix
+
+    matrix, valid = to_normalized_matrix([[3.0, 4.0], [0.0, 0.0]])
+
+    assert matrix.dtype == np.float32
+    assert valid.tolist() == [True, False]
+    assert np.allclose(matrix[0], [0.6, 0.8])
+    assert np.allclose(matrix[1], [0.0, 0.0])
+
+
+@pytest.mark.unit
+def test_blocked_similar_pairs_matches_brute_force():
+    """测试分块结果与暴力计算一致"""
+    from core.utils.vector_ops import blocked_similar_pairs, to_normalized_matrix
+
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(20, 16))
+    # 构造 5 对近似重复
+    noisy = base[:5] + rng.normal(scale=0.01, size=(5, 16))
+    matrix, _ = to_normalized_matrix(np.vstack([base, noisy]).tolist())
+
+    pairs = blocked_similar_pairs(matrix, threshold=0.95, top_k=3, block_size=7)
+
+    sims = matrix @ matrix.T
+    expected = {
+        (i, j)
+        for i in range(len(matrix))
+        for j in range(i + 1, len(matrix))
+        if sims[i, j] >= 0.95
+    }
+    assert {(i, j) for i, j, _ in pairs} == expected
+    assert all(i < j for i, j, _ in pairs)
+
+
+@pytest.mark.unit
+def test_blocked_similar_pairs_small_input():
+    """测试少于两行时返回空"""
+    from core.utils.vector_ops import blocked_similar_pairs, to_normalized_matrix
+
+    matrix, _ = to_normalized_matrix([[1.0, 0.0]])
+    assert blocked_similar_pairs(matrix, threshold=0.5) == []
+
+
+@pytest.mark.unit
+def test_blocked_query_pairs_matches_full_scan():
+    """测试只比较指定行时，结果是全量结果中涉及这些行的子集"""
+    from core.utils.vector_ops import (
+        blocked_query_pairs,
+        blocked_similar_pairs,
+        to_normalized_matrix,
+    )
+
+    rng = np.random.default_rng(1)
+    base = rng.normal(size=(20, 16))
+    noisy = base[:5] + rng.normal(scale=0.01, size=(5, 16))
+    matrix, _ = to_normalized_matrix(np.vstack([base, noisy]).tolist())
+
+    query_rows = np.array([2, 21, 24])
+    full = {
+        (i, j) for i, j, _ in blocked_similar_pairs(matrix, 0.95)
+        if i in query_rows or j in query_rows
+    }
+    partial = {(i, j) for i, j, _ in blocked_query_pairs(matrix, query_rows, 0.95, block_size=2)}
+
+    assert partial == full == {(1, 21), (2, 22), (4, 24)}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_matrix_search(dtype):
+    """测试量化矩阵的相似对查找和重打分检索"""
+    from core.utils.vector_ops import (
+        QuantizedMatrix,
+        blocked_similar_pairs,
+        rescore_pairs,
+        search_top_k,
+        to_normalized_matrix,
+    )
+
+    rng = np.random.default_rng(1)
+    base = rng.normal(size=(30, 32))
+    noisy = base[:5] + rng.normal(scale=0.01, size=(5, 32))
+    embeddings = np.vstack([base, noisy, np.zeros((1, 32))])
+
+    quantized, valid = QuantizedMatrix.from_embeddings(embeddings.tolist(), dtype, block_size=8)
+    matrix, expected_valid = to_normalized_matrix(embeddings.tolist())
+    assert valid.tolist() == expected_valid.tolist()
+    assert quantized.nbytes < matrix.nbytes
+
+    pairs = blocked_similar_pairs(quantized, threshold=0.95, top_k=3, block_size=7)
+    assert {(i, j) for i, j, _ in pairs} == {(i, 30 + i) for i in range(5)}
+
+    exact = rescore_pairs(lambda rows: embeddings[rows], np.array([(i, j) for i, j, _ in pairs]))
+    expected = [float(matrix[i] @ matrix[j]) for i, j, _ in pairs]
+    assert np.allclose(exact, expected, atol=1e-5)
+
+    query = embeddings[3] + rng.normal(scale=0.01, size=32)
+    results = search_top_k(quantized, query, k=2, block_size=8, rescore=lambda rows: embeddings[rows])
+    assert {row for row, _ in results} == {3, 33}
+    query_matrix, _ = to_normalized_matrix([query])
+    assert results[0][1] == pytest.approx(float(matrix[results[0][0]] @ query_matrix[0]), abs=1e-5)
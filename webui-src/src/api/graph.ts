@@ -4,6 +4,9 @@ export interface GraphNode {
   id: string
   label: string
   properties: Record<string, any>
+  // 服务端预先计算的布局坐标（可选）
+  x?: number
+  y?: number
 }
 
 export interface GraphEdge {
@@ -19,14 +22,65 @@ export interface GraphData {
   edges: GraphEdge[]
 }
 
+// 列式响应（format=columnar）：节点和边按字段拆成数组，边端点为节点下标
+interface ColumnarGraph {
+  encoding: 'columnar'
+  node_count: number
+  edge_count: number
+  nodes: Record<string, any[]>
+  edges: Record<string, any[]>
+  [key: string]: any
+}
+
+const NODE_FIELDS = ['id', 'label', 'x', 'y']
+const EDGE_FIELDS = ['source', 'target', 'label']
+
+// 还原为逐节点、逐边的对象
+export const fromColumnar = (data: ColumnarGraph) => {
+  const { nodes: nodeColumns, edges: edgeColumns, encoding, node_count, edge_count, ...rest } = data
+  const ids = nodeColumns.id
+
+  const nodes: GraphNode[] = []
+  for (let i = 0; i < node_count; i++) {
+    const node: any = { id: ids[i], label: nodeColumns.label[i], properties: {} }
+    for (const [key, values] of Object.entries(nodeColumns)) {
+      if (!NODE_FIELDS.includes(key)) node.properties[key] = values[i]
+      else if ((key === 'x' || key === 'y') && values[i] != null) node[key] = values[i]
+    }
+    nodes.push(node)
+  }
+
+  const edges: GraphEdge[] = []
+  for (let i = 0; i < edge_count; i++) {
+    const source = ids[edgeColumns.source[i]]
+    const target = ids[edgeColumns.target[i]]
+    const edge: GraphEdge = { id: `${source}-${target}`, source, target, label: edgeColumns.label[i], properties: {} }
+    for (const [key, values] of Object.entries(edgeColumns)) {
+      if (!EDGE_FIELDS.includes(key)) edge.properties[key] = values[i]
+    }
+    edges.push(edge)
+  }
+
+  return { ...rest, nodes, edges }
+}
+
+const decodeGraph = (response: any) =>
+  response.success && response.data?.encoding === 'columnar'
+    ? { ...response, data: fromColumnar(response.data) }
+    : response
+
 export const graphApi = {
   // 获取会话图谱
   getSessionGraph: (sessionId: string, params?: any) =>
-    apiClient.get<any, any>(`/graph/session/${sessionId}`, { params }),
+    apiClient
+      .get<any, any>(`/graph/session/${sessionId}`, { params: { format: 'columnar', ...params } })
+      .then(decodeGraph),
 
   // 获取全局图谱
   getGlobalGraph: (params?: any) =>
-    apiClient.get<any, any>('/graph/global', { params }),
+    apiClient
+      .get<any, any>('/graph/global', { params: { format: 'columnar', ...params } })
+      .then(decodeGraph),
 
   // 获取实体邻居
   getNeighbors: (entityName: string, params?: any) =>
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from ..schemas.common import ApiResponse
 from ..utils.auth import verify_key
+from ..utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter()
 
@@ -26,6 +27,17 @@ class EntityUpdate(BaseModel):
     importance: float | None = None
 
 
+# 可排序字段 -> 排序表达式（空值按最小值处理，保证游标比较有意义）
+# 重要性使用 decay_key_expr 排序键，游标不随时间衰减失效
+SORT_EXPRESSIONS = {
+    "name": "e.name",
+    "type": "coalesce(e.type, '')",
+    "access_count": "coalesce(e.access_count, 0)",
+    "created_at": "coalesce(e.created_at, timestamp('1970-01-01'))",
+    "last_accessed": "coalesce(e.last_accessed, timestamp('1970-01-01'))",
+}
+
+
 @router.get("")
 async def list_entities(
     request: Request,
@@ -34,11 +46,15 @@ async def list_entities(
     sort_by: str = Query("importance", description="排序字段"),
     order: str = Query("desc", description="排序方向"),
     limit: int = Query(50, description="每页数量"),
-    offset: int = Query(0, description="分页偏移"),
+    offset: int = Query(0, description="分页偏移（兼容模式，提供 cursor 时忽略）"),
+    cursor: str | None = Query(None, description="分页游标（上一页返回的 next_cursor）"),
     _: bool = Depends(verify_key),
 ):
     """获取实体列表
 
+    提供 cursor 时按 (排序字段, 名称) 做游标分页，翻页代价与页深无关；
+    否则按 offset 分页。两种模式都会返回下一页的 next_cursor。
+
     Args:
         type: 实体类型过滤
         search: 名称搜索
@@ -46,6 +62,7 @@ async def list_entities(
         order: 排序方向
         limit: 每页数量
         offset: 分页偏移
+        cursor: 分页游标
 
     Returns:
         实体列表
@@ -53,6 +70,27 @@ async def list_entities(
     try:
         manager = request.app.state.manager
         await manager.ensure_initialized()
+        graph_store = manager.graph_store
+
+        if sort_by == "importance":
+            sort_expr = graph_store.decay_key_expr("e.importance", "e.last_decay_reference")
+        elif sort_by in SORT_EXPRESSIONS:
+            sort_expr = SORT_EXPRESSIONS[sort_by]
+        else:
+            return ApiResponse(success=False, error="INVALID_PARAMETER", message=f"不支持的排序字段: {sort_by}")
+
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError as e:
+                return ApiResponse(success=False, error="INVALID_CURSOR", message=str(e))
+            if len(after) != 2:
+                return ApiResponse(success=False, error="INVALID_CURSOR", message=f"无效的游标: {cursor}")
+
+        descending = order == "desc"
+        direction, compare = ("DESC", "<") if descending else ("ASC", ">")
+        projection = f"{graph_store.entity_projection()}, {sort_expr} AS sort_value"
 
         # 构建查询条件
         where_clauses = []
@@ -66,52 +104,91 @@ async def list_entities(
             where_clauses.append("e.name CONTAINS $search")
             params["search"] = search
 
-        where_clause = " AND ".join(where_clauses) if where_clauses else "true"
-
-        # 排序
-        order_clause = f"e.{sort_by} {'DESC' if order == 'desc' else 'ASC'}"
-
-        # 获取总数
-        count_result = await manager.graph_store._execute_in_thread(
-            lambda: manager.graph_store.conn.execute(
-                f"MATCH (e:Entity) WHERE {where_clause} RETURN count(e) as total",
-                params,
+        if sort_by == "importance" and descending and not where_clauses:
+            # 默认排序且无过滤时由重要性索引直接给出当前页，避免全表排序
+            page_names, total = await graph_store.top_entity_names(
+                limit, 0 if after else offset, after=tuple(after) if after else None
             )
-        )
-        total = count_result.get_next()[0] if count_result.has_next() else 0
-
-        # 获取实体列表
-        params["limit"] = limit
-        params["offset"] = offset
 
-        entities_result = await manager.graph_store._execute_in_thread(
-            lambda: manager.graph_store.conn.execute(
-                f"""
-                MATCH (e:Entity)
-                WHERE {where_clause}
-                RETURN e
-                ORDER BY {order_clause}
-                SKIP $offset
-                LIMIT $limit
-                """,
-                params,
-            )
-        )
+            def _fetch():
+                result = graph_store.conn.execute(
+                    f"MATCH (e:Entity) WHERE e.name IN $names RETURN {projection}",
+                    {"names": page_names, **graph_store.decay_params()},
+                )
+                by_name = {}
+                while result.has_next():
+                    row = result.get_next()
+                    by_name[row[0]] = row
+                return [by_name[name] for name in page_names if name in by_name]
+        else:
+            # 总数按过滤条件缓存，翻页时不重复全表计数
+            where_clause = " AND ".join(where_clauses) if where_clauses else "true"
+            count_params = dict(params)
+
+            async def _count():
+                def _run():
+                    result = graph_store.conn.execute(
+                        f"MATCH (e:Entity) WHERE {where_clause} RETURN count(e) as total",
+                        count_params,
+                    )
+                    return result.get_next()[0] if result.has_next() else 0
+
+                return await graph_store._execute_in_thread(_run)
+
+            total = await request.app.state.count_cache.get(("entities", type, search), _count)
+
+            # 获取实体列表
+            if after:
+                where_clauses.append(
+                    f"({sort_expr} {compare} $cursor_value"
+                    f" OR ({sort_expr} = $cursor_value AND e.name {compare} $cursor_name))"
+                )
+                params["cursor_value"], params["cursor_name"] = after
+            else:
+                params["offset"] = offset
+            params["limit"] = limit
+            if sort_by == "importance":
+                params.update(graph_store.decay_params())
+
+            where_clause = " AND ".join(where_clauses) if where_clauses else "true"
+            skip = "" if after else "SKIP $offset"
+
+            def _fetch():
+                result = graph_store.conn.execute(
+                    f"""
+                    MATCH (e:Entity)
+                    WHERE {where_clause}
+                    RETURN {projection}
+                    ORDER BY sort_value {direction}, e.name {direction}
+                    {skip}
+                    LIMIT $limit
+                    """,
+                    params,
+                )
+                rows = []
+                while result.has_next():
+                    rows.append(result.get_next())
+                return rows
+
+        rows = await graph_store._execute_in_thread(_fetch)
 
         entities = []
-        while entities_result.has_next():
-            row = entities_result.get_next()
-            entity = row[0]
+        for row in rows:
+            entity = graph_store.decode_entity(row)
             entities.append({
                 "name": entity["name"],
                 "type": entity.get("type", ""),
                 "description": entity.get("description", ""),
-                "importance": entity.get("importance", 0.0),
-                "access_count": entity.get("access_count", 0),
+                "importance": entity["importance"],
+                "access_count": entity["access_count"],
                 "created_at": entity.get("created_at", ""),
                 "last_accessed": entity.get("last_accessed", ""),
             })
 
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1][-1], rows[-1][0])
+
         return ApiResponse(
             success=True,
             data={
@@ -119,6 +196,7 @@ async def list_entities(
                 "total": total,
                 "limit": limit,
                 "offset": offset,
+                "next_cursor": next_cursor,
             },
         )
 
@@ -145,9 +223,10 @@ async def get_entity(
         await manager.ensure_initialized()
 
         # 获取实体
-        entity_result = await manager.graph_store._execute_in_thread(
-            lambda: manager.graph_store.conn.execute(
-                "MATCH (e:Entity {name: $name}) RETURN e",
+        graph_store = manager.graph_store
+        entity_result = await graph_store._execute_in_thread(
+            lambda: graph_store.conn.execute(
+                f"MATCH (e:Entity {{name: $name}}) RETURN {graph_store.entity_projection()}",
                 {"name": entity_name},
             )
         )
@@ -155,7 +234,7 @@ async def get_entity(
         if not entity_result or not entity_result.has_next():
             return ApiResponse(success=False, error="ENTITY_NOT_FOUND", message="实体不存在")
 
-        entity = entity_result.get_next()[0]
+        entity = graph_store.decode_entity(entity_result.get_next())
 
         # 获取关系
         relations = await manager.get_entity_relations(entity_name)
@@ -189,8 +268,8 @@ async def get_entity(
                     "name": entity["name"],
                     "type": entity.get("type", ""),
                     "description": entity.get("description", ""),
-                    "importance": entity.get("importance", 0.0),
-                    "access_count": entity.get("access_count", 0),
+                    "importance": entity["importance"],
+                    "access_count": entity["access_count"],
                     "created_at": entity.get("created_at", ""),
                     "last_accessed": entity.get("last_accessed", ""),
                 },
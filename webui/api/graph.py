@@ -1,10 +1,15 @@
-"""图谱数据接口"""
+"""图谱数据接口
+
+返回节点和边的接口支持 format=columnar / msgpack 紧凑响应格式（也可通过 Accept 请求头协商），
+见 utils.encoding。
+"""
 
 
 from fastapi import APIRouter, Depends, Query, Request
 
 from ..schemas.common import ApiResponse
 from ..utils.auth import verify_key
+from ..utils.encoding import encode_graph_response
 
 router = APIRouter()
 
@@ -45,16 +50,18 @@ async def get_session_graph(
         session_row = session_result.get_next()
         session_node = session_row[0]
 
-        # 获取会话中的实体
+        # 获取会话中的实体（按衰减后的有效重要性排序）
+        graph_store = manager.graph_store
+        importance = graph_store.decay_expr("e.importance", "e.last_decay_reference")
         entities_result = await manager.graph_store._execute_in_thread(
             lambda: manager.graph_store.conn.execute(
-                """
-                MATCH (e:Entity)-[:MENTIONED_IN]->(s:Session {id: $id})
-                RETURN e
-                ORDER BY e.importance DESC
+                f"""
+                MATCH (e:Entity)-[:MENTIONED_IN]->(s:Session {{id: $id}})
+                RETURN {graph_store.entity_projection()}
+                ORDER BY {importance} DESC
                 LIMIT $limit
                 """,
-                {"id": session_id, "limit": max_entities},
+                {"id": session_id, "limit": max_entities, **graph_store.decay_params()},
             )
         )
 
@@ -63,8 +70,7 @@ async def get_session_graph(
 
         # 添加实体节点
         while entities_result.has_next():
-            row = entities_result.get_next()
-            entity = row[0]
+            entity = graph_store.decode_entity(entities_result.get_next())
             entity_names.append(entity["name"])
             nodes.append({
                 "id": entity["name"],
@@ -73,8 +79,8 @@ async def get_session_graph(
                     "name": entity["name"],
                     "type": entity.get("type", ""),
                     "description": entity.get("description", ""),
-                    "importance": entity.get("importance", 0.0),
-                    "access_count": entity.get("access_count", 0),
+                    "importance": entity["importance"],
+                    "access_count": entity["access_count"],
                 },
             })
 
@@ -84,10 +90,10 @@ async def get_session_graph(
         if include_relations and entity_names:
             relations_result = await manager.graph_store._execute_in_thread(
                 lambda: manager.graph_store.conn.execute(
-                    """
+                    f"""
                     MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
                     WHERE e1.name IN $names AND e2.name IN $names
-                    RETURN e1.name, e2.name, r
+                    RETURN e1.name, e2.name, {graph_store.relation_projection()}
                     """,
                     {"names": entity_names},
                 )
@@ -95,7 +101,8 @@ async def get_session_graph(
 
             while relations_result.has_next():
                 row = relations_result.get_next()
-                from_name, to_name, rel = row
+                from_name, to_name = row[0], row[1]
+                rel = graph_store.decode_relation(row, offset=2)
                 edges.append({
                     "id": f"{from_name}-{to_name}",
                     "source": from_name,
@@ -103,12 +110,12 @@ async def get_session_graph(
                     "label": "RELATED_TO",
                     "properties": {
                         "relation": rel.get("relation", ""),
-                        "strength": rel.get("strength", 0.0),
+                        "strength": rel["strength"],
                         "evidence": rel.get("evidence", ""),
                     },
                 })
 
-        return ApiResponse(
+        response = ApiResponse(
             success=True,
             data={
                 "session": {
@@ -121,6 +128,7 @@ async def get_session_graph(
                 "edges": edges,
             },
         )
+        return encode_graph_response(request, response)
 
     except Exception as e:
         return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
@@ -137,6 +145,10 @@ async def get_global_graph(
 ):
     """获取全局图谱
 
+    节点带有后台预先计算的布局坐标 x / y（只覆盖重要性最高的 layout_max_nodes 个实体，
+    范围之外的节点没有坐标，由前端布局）。
+    layout_pending 为 true 表示覆盖范围内有节点还没有坐标，已在后台计算，稍后刷新即可获得。
+
     Args:
         entity_types: 实体类型过滤
         min_importance: 最小重要性
@@ -150,63 +162,91 @@ async def get_global_graph(
         manager = request.app.state.manager
         await manager.ensure_initialized()
 
-        # 构建查询条件
+        # 构建查询条件（重要性按衰减后的有效值过滤和排序）
+        graph_store = manager.graph_store
+        importance = graph_store.decay_expr("e.importance", "e.last_decay_reference")
         where_clauses = []
-        params = {"limit": limit, "offset": offset}
+        params = {"limit": limit, "offset": offset, **graph_store.decay_params()}
 
         if entity_types:
             where_clauses.append("e.type IN $types")
             params["types"] = entity_types
 
         if min_importance > 0:
-            where_clauses.append("e.importance >= $min_importance")
+            where_clauses.append(f"{importance} >= $min_importance")
             params["min_importance"] = min_importance
 
         where_clause = " AND ".join(where_clauses) if where_clauses else "true"
 
         # 获取实体
-        entities_result = await manager.graph_store._execute_in_thread(
-            lambda: manager.graph_store.conn.execute(
-                f"""
-                MATCH (e:Entity)
-                WHERE {where_clause}
-                RETURN e
-                ORDER BY e.importance DESC
-                SKIP $offset
-                LIMIT $limit
-                """,
-                params,
-            )
-        )
+        if entity_types:
+            def _fetch():
+                result = graph_store.conn.execute(
+                    f"""
+                    MATCH (e:Entity)
+                    WHERE {where_clause}
+                    RETURN {graph_store.entity_projection()}
+                    ORDER BY {importance} DESC
+                    SKIP $offset
+                    LIMIT $limit
+                    """,
+                    params,
+                )
+                rows = []
+                while result.has_next():
+                    rows.append(graph_store.decode_entity(result.get_next()))
+                return rows
+        else:
+            # 无类型过滤时由重要性索引直接给出当前页，避免全表排序
+            page_names, _ = await graph_store.top_entity_names(limit, offset, min_importance)
+
+            def _fetch():
+                result = graph_store.conn.execute(
+                    f"MATCH (e:Entity) WHERE e.name IN $names RETURN {graph_store.entity_projection()}",
+                    {"names": page_names},
+                )
+                by_name = {}
+                while result.has_next():
+                    entity = graph_store.decode_entity(result.get_next())
+                    by_name[entity["name"]] = entity
+                return [by_name[name] for name in page_names if name in by_name]
+
+        entities = await graph_store._execute_in_thread(_fetch)
 
         nodes = []
-        entity_names = []
+        entity_names = [entity["name"] for entity in entities]
 
-        while entities_result.has_next():
-            row = entities_result.get_next()
-            entity = row[0]
-            entity_names.append(entity["name"])
-            nodes.append({
+        # 附带后台预先计算的布局坐标；布局覆盖范围内的实体缺少坐标时在后台增量计算
+        positions = graph_store.layout_positions(entity_names)
+        layout_pending = bool(await graph_store.missing_layout(entity_names))
+        if layout_pending:
+            graph_store.schedule_layout_update()
+
+        for entity in entities:
+            node = {
                 "id": entity["name"],
                 "label": "Entity",
                 "properties": {
                     "name": entity["name"],
                     "type": entity.get("type", ""),
                     "description": entity.get("description", ""),
-                    "importance": entity.get("importance", 0.0),
-                    "access_count": entity.get("access_count", 0),
+                    "importance": entity["importance"],
+                    "access_count": entity["access_count"],
                 },
-            })
+            }
+            if entity["name"] in positions:
+                node["x"], node["y"] = positions[entity["name"]]
+            nodes.append(node)
 
         # 获取关系
         edges = []
         if entity_names:
             relations_result = await manager.graph_store._execute_in_thread(
                 lambda: manager.graph_store.conn.execute(
-                    """
+                    f"""
                     MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
                     WHERE e1.name IN $names AND e2.name IN $names
-                    RETURN e1.name, e2.name, r
+                    RETURN e1.name, e2.name, {graph_store.relation_projection()}
                     """,
                     {"names": entity_names},
                 )
@@ -214,7 +254,8 @@ async def get_global_graph(
 
             while relations_result.has_next():
                 row = relations_result.get_next()
-                from_name, to_name, rel = row
+                from_name, to_name = row[0], row[1]
+                rel = graph_store.decode_relation(row, offset=2)
                 edges.append({
                     "id": f"{from_name}-{to_name}",
                     "source": from_name,
@@ -222,18 +263,20 @@ async def get_global_graph(
                     "label": "RELATED_TO",
                     "properties": {
                         "relation": rel.get("relation", ""),
-                        "strength": rel.get("strength", 0.0),
+                        "strength": rel["strength"],
                     },
                 })
 
-        return ApiResponse(
+        response = ApiResponse(
             success=True,
             data={
                 "nodes": nodes,
                 "edges": edges,
                 "total": len(nodes),
+                "layout_pending": layout_pending,
             },
         )
+        return encode_graph_response(request, response)
 
     except Exception as e:
         return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
@@ -262,9 +305,10 @@ async def get_entity_neighbors(
         await manager.ensure_initialized()
 
         # 获取中心实体
-        center_result = await manager.graph_store._execute_in_thread(
-            lambda: manager.graph_store.conn.execute(
-                "MATCH (e:Entity {name: $name}) RETURN e",
+        graph_store = manager.graph_store
+        center_result = await graph_store._execute_in_thread(
+            lambda: graph_store.conn.execute(
+                f"MATCH (e:Entity {{name: $name}}) RETURN {graph_store.entity_projection()}",
                 {"name": entity_name},
             )
         )
@@ -272,31 +316,35 @@ async def get_entity_neighbors(
         if not center_result or not center_result.has_next():
             return ApiResponse(success=False, error="ENTITY_NOT_FOUND", message="实体不存在")
 
-        center_entity = center_result.get_next()[0]
+        center_entity = graph_store.decode_entity(center_result.get_next())
 
-        # 获取邻居（depth 层）
-        neighbors_result = await manager.graph_store._execute_in_thread(
-            lambda: manager.graph_store.conn.execute(
-                f"""
-                MATCH path = (center:Entity {{name: $name}})-[r:RELATED_TO*1..{depth}]-(neighbor:Entity)
-                RETURN DISTINCT neighbor, length(path) as distance, r
-                ORDER BY distance, neighbor.importance DESC
-                LIMIT $limit
-                """,
-                {"name": entity_name, "limit": max_neighbors},
+        # 在邻接表上遍历邻居（depth 层），再一次性读取邻居属性
+        ranked = await graph_store.k_hop_neighbors(entity_name, depth, max_neighbors)
+
+        def _fetch():
+            result = graph_store.conn.execute(
+                f"MATCH (e:Entity) WHERE e.name IN $names RETURN {graph_store.entity_projection()}",
+                {"names": [name for name, _ in ranked]},
             )
-        )
+            rows = {}
+            while result.has_next():
+                entity = graph_store.decode_entity(result.get_next())
+                rows[entity["name"]] = entity
+            return rows
+
+        props = await graph_store._execute_in_thread(_fetch) if ranked else {}
 
         neighbors = []
-        while neighbors_result.has_next():
-            row = neighbors_result.get_next()
-            neighbor, distance, rels = row
+        for name, distance in ranked:
+            entity = props.get(name)
+            if entity is None:
+                continue
             neighbors.append({
                 "entity": {
-                    "name": neighbor["name"],
-                    "type": neighbor.get("type", ""),
-                    "description": neighbor.get("description", ""),
-                    "importance": neighbor.get("importance", 0.0),
+                    "name": name,
+                    "type": entity["type"] or "",
+                    "description": entity["description"] or "",
+                    "importance": entity["importance"],
                 },
                 "distance": distance,
             })
@@ -308,7 +356,7 @@ async def get_entity_neighbors(
                     "name": center_entity["name"],
                     "type": center_entity.get("type", ""),
                     "description": center_entity.get("description", ""),
-                    "importance": center_entity.get("importance", 0.0),
+                    "importance": center_entity["importance"],
                 },
                 "neighbors": neighbors,
             },
@@ -316,3 +364,162 @@ async def get_entity_neighbors(
 
     except Exception as e:
         return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
+@router.get("/clusters")
+async def get_cluster_graph(
+    request: Request,
+    max_clusters: int = Query(100, description="最大社区数"),
+    top_members: int = Query(5, description="每个社区附带的代表实体数"),
+    _: bool = Depends(verify_key),
+):
+    """获取社区级别的全局图谱（低缩放级别使用）
+
+    每个社区作为一个超级节点返回，边为社区之间的关系数和强度之和。
+    社区划分在维护周期之间缓存，computed_at 变化说明划分已重新计算，
+    此前获取的社区编号不再有效。
+
+    Args:
+        max_clusters: 最大社区数
+        top_members: 每个社区附带的代表实体数
+
+    Returns:
+        超级节点和社区间的边
+    """
+    try:
+        manager = request.app.state.manager
+        await manager.ensure_initialized()
+
+        overview = await manager.graph_store.get_community_overview(max_clusters, top_members)
+
+        nodes = [
+            {
+                "id": f"cluster:{cluster['id']}",
+                "label": "Cluster",
+                "properties": {
+                    "cluster_id": cluster["id"],
+                    "name": cluster["label"],
+                    "type": cluster["type"],
+                    "size": cluster["size"],
+                    "isolated": cluster["isolated"],
+                    "top_members": cluster["top_members"],
+                },
+            }
+            for cluster in overview["clusters"]
+        ]
+        edges = [
+            {
+                "id": f"cluster:{link['source']}-cluster:{link['target']}",
+                "source": f"cluster:{link['source']}",
+                "target": f"cluster:{link['target']}",
+                "label": "CLUSTER_LINK",
+                "properties": {"count": link["count"], "strength": link["strength"]},
+            }
+            for link in overview["links"]
+        ]
+
+        response = ApiResponse(
+            success=True,
+            data={
+                "nodes": nodes,
+                "edges": edges,
+                "total_clusters": overview["total_clusters"],
+                "computed_at": overview["computed_at"],
+            },
+        )
+        return encode_graph_response(request, response)
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
+@router.get("/clusters/{cluster_id}")
+async def expand_cluster(
+    request: Request,
+    cluster_id: int,
+    limit: int = Query(200, description="最大成员数"),
+    _: bool = Depends(verify_key),
+):
+    """展开社区
+
+    返回社区成员（按有效重要性降序）及其之间的关系，
+    以及该社区到其他社区的关系（以超级节点表示，可继续展开）。
+
+    Args:
+        cluster_id: 社区编号
+        limit: 最大成员数
+
+    Returns:
+        社区成员图谱
+    """
+    try:
+        manager = request.app.state.manager
+        await manager.ensure_initialized()
+
+        graph_store = manager.graph_store
+        expanded = await graph_store.expand_community(cluster_id, limit)
+        if expanded is None:
+            return ApiResponse(success=False, error="CLUSTER_NOT_FOUND", message="社区不存在")
+
+        def _fetch():
+            result = graph_store.conn.execute(
+                f"MATCH (e:Entity) WHERE e.name IN $names RETURN {graph_store.entity_projection()}",
+                {"names": expanded["members"]},
+            )
+            rows = {}
+            while result.has_next():
+                entity = graph_store.decode_entity(result.get_next())
+                rows[entity["name"]] = entity
+            return rows
+
+        props = await graph_store._execute_in_thread(_fetch) if expanded["members"] else {}
+
+        nodes = []
+        for name in expanded["members"]:
+            entity = props.get(name)
+            if entity is None:
+                continue
+            nodes.append({
+                "id": name,
+                "label": "Entity",
+                "properties": {
+                    "name": name,
+                    "type": entity.get("type", ""),
+                    "description": entity.get("description", ""),
+                    "importance": entity["importance"],
+                    "access_count": entity["access_count"],
+                },
+            })
+
+        edges = [
+            {
+                "id": f"{edge['from']}-{edge['to']}",
+                "source": edge["from"],
+                "target": edge["to"],
+                "label": "RELATED_TO",
+                "properties": {"relation": edge["relation"], "strength": edge["strength"]},
+            }
+            for edge in expanded["edges"]
+            if edge["from"] in props and edge["to"] in props
+        ]
+
+        response = ApiResponse(
+            success=True,
+            data={
+                "cluster": expanded["cluster"],
+                "nodes": nodes,
+                "edges": edges,
+                "links": [
+                    {
+                        "target": f"cluster:{link['cluster']}",
+                        "count": link["count"],
+                        "strength": link["strength"],
+                    }
+                    for link in expanded["links"]
+                ],
+            },
+        )
+        return encode_graph_response(request, response)
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, Query, Request
 
 from ..schemas.common import ApiResponse
 from ..utils.auth import verify_key
+from ..utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter()
 
@@ -15,17 +16,22 @@ async def list_relations(
     to_entity: str | None = Query(None, description="终点实体过滤"),
     min_strength: float = Query(0.0, description="最小强度"),
     limit: int = Query(50, description="每页数量"),
-    offset: int = Query(0, description="分页偏移"),
+    offset: int = Query(0, description="分页偏移（兼容模式，提供 cursor 时忽略）"),
+    cursor: str | None = Query(None, description="分页游标（上一页返回的 next_cursor）"),
     _: bool = Depends(verify_key),
 ):
     """获取关系列表
 
+    按有效强度降序排列。提供 cursor 时按 (强度排序键, 起点, 终点) 做游标分页，
+    否则按 offset 分页。两种模式都会返回下一页的 next_cursor。
+
     Args:
         from_entity: 起点实体过滤
         to_entity: 终点实体过滤
         min_strength: 最小强度
         limit: 每页数量
         offset: 分页偏移
+        cursor: 分页游标
 
     Returns:
         关系列表
@@ -34,7 +40,19 @@ async def list_relations(
         manager = request.app.state.manager
         await manager.ensure_initialized()
 
-        # 构建查询条件
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError as e:
+                return ApiResponse(success=False, error="INVALID_CURSOR", message=str(e))
+            if len(after) != 3:
+                return ApiResponse(success=False, error="INVALID_CURSOR", message=f"无效的游标: {cursor}")
+
+        # 构建查询条件（强度按衰减后的有效值过滤，按不随时间变化的排序键排序）
+        graph_store = manager.graph_store
+        strength = graph_store.decay_expr("r.strength", "r.last_decay_reference")
+        sort_key = graph_store.decay_key_expr("r.strength", "r.last_decay_reference")
         where_clauses = []
         params = {}
 
@@ -47,59 +65,83 @@ async def list_relations(
             params["to_entity"] = to_entity
 
         if min_strength > 0:
-            where_clauses.append("r.strength >= $min_strength")
+            where_clauses.append(f"{strength} >= $min_strength")
             params["min_strength"] = min_strength
+            params.update(graph_store.decay_params())
 
+        # 获取总数（按过滤条件缓存，翻页时不重复全表计数）
         where_clause = " AND ".join(where_clauses) if where_clauses else "true"
-
-        # 获取总数
-        def _count():
-            result = manager.graph_store.conn.execute(
-                f"""
-                MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
-                WHERE {where_clause}
-                RETURN count(r) as total
-                """,
-                params,
-            )
-            return result.get_next()[0] if result.has_next() else 0
-
-        total = await manager.graph_store._execute_in_thread(_count)
+        count_params = dict(params)
+
+        async def _count():
+            def _run():
+                result = graph_store.conn.execute(
+                    f"""
+                    MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
+                    WHERE {where_clause}
+                    RETURN count(r) as total
+                    """,
+                    count_params,
+                )
+                return result.get_next()[0] if result.has_next() else 0
+
+            return await graph_store._execute_in_thread(_run)
+
+        total = await request.app.state.count_cache.get(
+            ("relations", from_entity, to_entity, min_strength), _count
+        )
 
         # 获取关系列表
+        if after:
+            where_clauses.append(
+                f"({sort_key} < $cursor_value OR ({sort_key} = $cursor_value AND "
+                "(e1.name < $cursor_from OR (e1.name = $cursor_from AND e2.name < $cursor_to))))"
+            )
+            params["cursor_value"], params["cursor_from"], params["cursor_to"] = after
+        else:
+            params["offset"] = offset
         params["limit"] = limit
-        params["offset"] = offset
+        params.update(graph_store.decay_params())
+
+        where_clause = " AND ".join(where_clauses) if where_clauses else "true"
+        skip = "" if after else "SKIP $offset"
 
         def _list():
-            result = manager.graph_store.conn.execute(
+            result = graph_store.conn.execute(
                 f"""
                 MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
                 WHERE {where_clause}
-                RETURN e1.name, e2.name, r
-                ORDER BY r.strength DESC
-                SKIP $offset
+                RETURN e1.name, e2.name, {graph_store.relation_projection()}, {sort_key} AS sort_value
+                ORDER BY sort_value DESC, e1.name DESC, e2.name DESC
+                {skip}
                 LIMIT $limit
                 """,
                 params,
             )
 
-            relations = []
+            rows = []
             while result.has_next():
-                row = result.get_next()
-                from_name, to_name, rel = row
-                relations.append({
-                    "from": from_name,
-                    "to": to_name,
-                    "relation": rel.get("relation", ""),
-                    "strength": rel.get("strength", 0.0),
-                    "evidence": rel.get("evidence", ""),
-                    "created_at": rel.get("created_at", ""),
-                    "last_updated": rel.get("last_updated", ""),
-                })
-
-            return relations
-
-        relations = await manager.graph_store._execute_in_thread(_list)
+                rows.append(result.get_next())
+            return rows
+
+        rows = await graph_store._execute_in_thread(_list)
+
+        relations = []
+        for row in rows:
+            rel = graph_store.decode_relation(row, offset=2)
+            relations.append({
+                "from": row[0],
+                "to": row[1],
+                "relation": rel.get("relation", ""),
+                "strength": rel["strength"],
+                "evidence": rel.get("evidence", ""),
+                "created_at": rel.get("created_at", ""),
+                "last_updated": rel.get("last_updated", ""),
+            })
+
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1][-1], rows[-1][0], rows[-1][1])
 
         return ApiResponse(
             success=True,
@@ -108,6 +150,7 @@ async def list_relations(
                 "total": total,
                 "limit": limit,
                 "offset": offset,
+                "next_cursor": next_cursor,
             },
         )
 
@@ -135,17 +178,8 @@ async def delete_relation(
         manager = request.app.state.manager
         await manager.ensure_initialized()
 
-        def _delete():
-            manager.graph_store.conn.execute(
-                """
-                MATCH (e1:Entity {name: $from})-[r:RELATED_TO]->(e2:Entity {name: $to})
-                DELETE r
-                """,
-                {"from": from_entity, "to": to_entity},
-            )
-            return True
-
-        await manager.graph_store._execute_in_thread(_delete)
+        if not await manager.graph_store.delete_relation(from_entity, to_entity):
+            return ApiResponse(success=False, error="DELETE_FAILED", message="删除失败")
 
         return ApiResponse(
             success=True,
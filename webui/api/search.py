@@ -1,5 +1,7 @@
 """搜索功能接口"""
 
+import time
+
 from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 
@@ -65,8 +67,14 @@ async def hybrid_search(
             search_request.top_k,
         )
 
+        # 一次查询取出全部实体的主要关系
+        relations = await manager.graph_store.get_relations_for_entities(
+            [entity.name for entity in entities], per_entity_limit=3
+        )
+
         results = []
         for entity in entities:
+            top_relations, total = relations.get(entity.name, ([], 0))
             results.append({
                 "entity": {
                     "name": entity.name,
@@ -76,6 +84,17 @@ async def hybrid_search(
                 },
                 "score": entity.importance,  # 使用重要性作为分数
                 "match_type": "hybrid",
+                "relations": [
+                    {
+                        "from": rel["from"],
+                        "to": rel["to"],
+                        "relation": rel["relation"],
+                        "strength": rel["strength"],
+                        **({"evidence": rel["evidence"]} if search_request.include_evidence else {}),
+                    }
+                    for rel in top_relations
+                ],
+                "relation_count": total,
             })
 
         return ApiResponse(
@@ -99,6 +118,9 @@ async def vector_search(
 ):
     """向量搜索测试
 
+    与记忆检索使用同一个向量存储，返回真实的 top_k 结果和各阶段耗时，
+    可用于评估检索性能。
+
     Args:
         search_request: 搜索请求参数
 
@@ -116,62 +138,56 @@ async def vector_search(
                 message="未配置 Embedding Provider",
             )
 
+        graph_store = manager.graph_store
+        started = time.perf_counter()
+
         # 生成查询向量
         query_embedding = await manager.embedding_provider.get_embedding(search_request.query)
-
-        # 向量搜索
-        def _search():
-            result = manager.graph_store.conn.execute(
-                """
-                MATCH (e:Entity)
-                WHERE e.embedding IS NOT NULL
-                RETURN e
-                ORDER BY e.importance DESC
-                LIMIT $limit
-                """,
-                {"limit": search_request.top_k},
+        embedded = time.perf_counter()
+
+        # 在向量存储上计算 top_k
+        hits = await graph_store.vector_search(query_embedding, search_request.top_k)
+        searched = time.perf_counter()
+
+        # 只为命中的实体查询数据库
+        def _fetch():
+            result = graph_store.conn.execute(
+                "MATCH (e:Entity) WHERE e.name IN $names "
+                "RETURN e.name, e.type, e.description, e.importance, e.last_decay_reference",
+                {"names": [name for name, _ in hits]},
             )
-
-            entities = []
+            entities = {}
             while result.has_next():
-                row = result.get_next()
-                entity = row[0]
-
-                # 计算余弦相似度
-                if entity.get("embedding"):
-                    import math
-
-                    vec1 = query_embedding
-                    vec2 = entity["embedding"]
-
-                    if len(vec1) == len(vec2):
-                        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-                        norm1 = math.sqrt(sum(a * a for a in vec1))
-                        norm2 = math.sqrt(sum(b * b for b in vec2))
-
-                        if norm1 > 0 and norm2 > 0:
-                            similarity = dot_product / (norm1 * norm2)
-                            entities.append({
-                                "entity": {
-                                    "name": entity["name"],
-                                    "type": entity.get("type", ""),
-                                    "description": entity.get("description", ""),
-                                    "importance": entity.get("importance", 0.0),
-                                },
-                                "similarity": similarity,
-                            })
-
-            # 按相似度排序
-            entities.sort(key=lambda x: x["similarity"], reverse=True)
-            return entities[:search_request.top_k]
-
-        results = await manager.graph_store._execute_in_thread(_search)
+                name, entity_type, description, importance, reference = result.get_next()
+                entities[name] = {
+                    "name": name,
+                    "type": entity_type,
+                    "description": description,
+                    "importance": graph_store.effective_value(importance, reference),
+                }
+            return entities
+
+        entities = await graph_store._execute_in_thread(_fetch) if hits else {}
+        fetched = time.perf_counter()
+
+        results = [
+            {"entity": entities[name], "similarity": similarity}
+            for name, similarity in hits
+            if name in entities
+        ]
 
         return ApiResponse(
             success=True,
             data={
                 "results": results,
                 "query": search_request.query,
+                "searched_entities": len(graph_store.embeddings),
+                "timings_ms": {
+                    "embedding": round((embedded - started) * 1000, 2),
+                    "search": round((searched - embedded) * 1000, 2),
+                    "fetch": round((fetched - searched) * 1000, 2),
+                    "total": round((fetched - started) * 1000, 2),
+                },
             },
         )
 
@@ -226,3 +242,35 @@ async def keyword_search(
 
     except Exception as e:
         return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
+@router.post("/archived")
+async def archived_search(
+    request: Request,
+    search_request: HybridSearchRequest,
+    _: bool = Depends(verify_key),
+):
+    """检索冷存储中的归档实体
+
+    Args:
+        search_request: 搜索请求参数
+
+    Returns:
+        归档实体列表
+    """
+    try:
+        manager = request.app.state.manager
+        await manager.ensure_initialized()
+
+        results = await manager.search_archived(search_request.query, search_request.top_k)
+
+        return ApiResponse(
+            success=True,
+            data={
+                "results": results,
+                "query": search_request.query,
+            },
+        )
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
@@ -3,7 +3,8 @@
 import json
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, File, Form, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from ..schemas.common import ApiResponse
@@ -19,6 +20,17 @@ class ImportRequest(BaseModel):
     merge: bool = True
 
 
+class ImportJobRequest(BaseModel):
+    """分块上传导入任务创建请求"""
+
+    filename: str
+    merge: bool = True
+
+
+# multipart 上传时每次读取并写入磁盘的字节数
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
 @router.get("/status")
 async def get_system_status(
     request: Request,
@@ -50,16 +62,44 @@ async def get_system_status(
         return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
 
 
+@router.get("/maintenance")
+async def get_maintenance_progress(
+    request: Request,
+    _: bool = Depends(verify_key),
+):
+    """获取维护任务进度
+
+    Returns:
+        各维护任务的分块进度和每块耗时
+    """
+    try:
+        manager = request.app.state.manager
+        return ApiResponse(
+            success=True,
+            data={"tasks": manager.get_maintenance_progress()},
+        )
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
 @router.get("/export")
 async def export_graph(
     request: Request,
     persona_id: str | None = Query(None, description="人格ID"),
+    format: str = Query("json", description="导出格式: json / ndjson"),
+    compress: bool = Query(False, description="ndjson 格式是否 gzip 压缩"),
     _: bool = Depends(verify_key),
 ):
     """导出图谱
 
+    json 格式把整个图谱放在响应的 content 字段中；
+    ndjson 格式以流式响应逐块输出（每行一条实体/关系/会话记录），内存占用与图谱大小无关。
+
     Args:
         persona_id: 人格ID，留空导出全部
+        format: 导出格式
+        compress: 是否 gzip 压缩（仅 ndjson）
 
     Returns:
         导出的图谱数据
@@ -68,6 +108,18 @@ async def export_graph(
         manager = request.app.state.manager
         await manager.ensure_initialized()
 
+        if format == "ndjson":
+            filename = f"memory_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
+            if compress:
+                filename += ".gz"
+            return StreamingResponse(
+                manager.graph_store.iter_export_ndjson(persona_id, compress),
+                media_type="application/gzip" if compress else "application/x-ndjson",
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            )
+        if format != "json":
+            return ApiResponse(success=False, error="INVALID_PARAMETER", message=f"不支持的导出格式: {format}")
+
         data = await manager.export_graph(persona_id)
 
         return ApiResponse(
@@ -128,6 +180,189 @@ async def import_graph(
         return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
 
 
+@router.post("/import/upload")
+async def upload_import(
+    request: Request,
+    file: UploadFile = File(..., description="导出文件（.ndjson / .ndjson.gz / .json）"),
+    merge: bool = Form(True, description="是否合并"),
+    _: bool = Depends(verify_key),
+):
+    """以 multipart 上传导入文件并开始后台导入
+
+    文件按块写入磁盘后逐批导入，进度通过 GET /import/jobs/{job_id} 查询。
+
+    Args:
+        file: 上传的文件
+        merge: 是否合并
+
+    Returns:
+        导入任务状态
+    """
+    try:
+        manager = request.app.state.manager
+        await manager.ensure_initialized()
+
+        try:
+            job = manager.import_jobs.create(file.filename or "", merge)
+        except ValueError as e:
+            return ApiResponse(success=False, error="INVALID_PARAMETER", message=str(e))
+
+        offset = 0
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            offset = await manager.import_jobs.append_chunk(job["id"], offset, chunk)
+
+        return ApiResponse(success=True, data=manager.import_jobs.start(job["id"]), message="导入已开始")
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
+@router.post("/import/jobs")
+async def create_import_job(
+    request: Request,
+    job_request: ImportJobRequest,
+    _: bool = Depends(verify_key),
+):
+    """创建分块上传导入任务
+
+    之后按顺序 PUT /import/jobs/{job_id}/chunks?offset=N 上传各块，
+    再 POST /import/jobs/{job_id}/start 开始导入。
+
+    Args:
+        job_request: 文件名和合并模式
+
+    Returns:
+        导入任务状态
+    """
+    try:
+        manager = request.app.state.manager
+        await manager.ensure_initialized()
+
+        try:
+            job = manager.import_jobs.create(job_request.filename, job_request.merge)
+        except ValueError as e:
+            return ApiResponse(success=False, error="INVALID_PARAMETER", message=str(e))
+        return ApiResponse(success=True, data=job)
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
+@router.put("/import/jobs/{job_id}/chunks")
+async def upload_import_chunk(
+    request: Request,
+    job_id: str,
+    offset: int = Query(..., description="该块在文件中的起始字节偏移"),
+    _: bool = Depends(verify_key),
+):
+    """上传一块文件内容（请求体为原始字节）
+
+    偏移必须等于已接收的字节数；不一致时返回 INVALID_OFFSET 和 uploaded_bytes，
+    客户端从该位置续传即可。
+
+    Args:
+        job_id: 任务 ID
+        offset: 起始字节偏移
+
+    Returns:
+        已接收的字节数
+    """
+    try:
+        manager = request.app.state.manager
+        await manager.ensure_initialized()
+
+        job = manager.import_jobs.get(job_id)
+        if job is None:
+            return ApiResponse(success=False, error="JOB_NOT_FOUND", message="导入任务不存在")
+
+        try:
+            uploaded = await manager.import_jobs.append_chunk(job_id, offset, await request.body())
+        except ValueError as e:
+            return ApiResponse(
+                success=False,
+                error="INVALID_OFFSET",
+                message=str(e),
+                data={"uploaded_bytes": job["uploaded_bytes"]},
+            )
+        return ApiResponse(success=True, data={"uploaded_bytes": uploaded})
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
+@router.post("/import/jobs/{job_id}/start")
+async def start_import_job(
+    request: Request,
+    job_id: str,
+    _: bool = Depends(verify_key),
+):
+    """开始导入，或从最后提交的批次之后续跑中断 / 失败的任务
+
+    Args:
+        job_id: 任务 ID
+
+    Returns:
+        导入任务状态
+    """
+    try:
+        manager = request.app.state.manager
+        await manager.ensure_initialized()
+
+        if manager.import_jobs.get(job_id) is None:
+            return ApiResponse(success=False, error="JOB_NOT_FOUND", message="导入任务不存在")
+
+        try:
+            job = manager.import_jobs.start(job_id)
+        except ValueError as e:
+            return ApiResponse(success=False, error="INVALID_STATE", message=str(e))
+        return ApiResponse(success=True, data=job, message="导入已开始")
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
+@router.get("/import/jobs")
+async def list_import_jobs(
+    request: Request,
+    _: bool = Depends(verify_key),
+):
+    """获取全部导入任务状态"""
+    try:
+        manager = request.app.state.manager
+        await manager.ensure_initialized()
+        return ApiResponse(success=True, data={"jobs": manager.import_jobs.list_jobs()})
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
+@router.get("/import/jobs/{job_id}")
+async def get_import_job(
+    request: Request,
+    job_id: str,
+    _: bool = Depends(verify_key),
+):
+    """获取导入任务状态
+
+    Args:
+        job_id: 任务 ID
+
+    Returns:
+        任务状态: status、uploaded_bytes、committed_records（已提交的记录数）、stats 等
+    """
+    try:
+        manager = request.app.state.manager
+        await manager.ensure_initialized()
+
+        job = manager.import_jobs.get(job_id)
+        if job is None:
+            return ApiResponse(success=False, error="JOB_NOT_FOUND", message="导入任务不存在")
+        return ApiResponse(success=True, data=job)
+
+    except Exception as e:
+        return ApiResponse(success=False, error="INTERNAL_ERROR", message=str(e))
+
+
 @router.post("/cleanup")
 async def cleanup_graph(
     request: Request,
@@ -8,6 +8,8 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from .api import entities, graph, relations, search, stats, system
+from .utils.compression import CompressionMiddleware
+from .utils.pagination import TotalCountCache
 
 
 def create_app(manager, config: dict) -> FastAPI:
@@ -31,10 +33,14 @@ def create_app(manager, config: dict) -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # 响应压缩（brotli / gzip，按 Accept-Encoding 协商）
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
 
     # 存储 manager 和 config 到 app.state
     app.state.manager = manager
     app.state.config = config
+    # 列表接口的总数缓存
+    app.state.count_cache = TotalCountCache()
 
     # 注册 API 路由（优先级最高）
     app.include_router(graph.router, prefix="/api/graph", tags=["图谱数据"])
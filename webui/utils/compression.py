@@ -0,0 +1,120 @@
+"""响应压缩中间件
+
+按 Accept-Encoding 对一次性发送的响应体做 brotli（需要安装 brotli）或 gzip 压缩。
+流式响应（分多块发送，如 NDJSON 导出、静态文件）和已编码的响应原样透传。
+"""
+
+import asyncio
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 检查 brotli 是否可用
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# 本身已压缩、不再重复压缩的类型
+EXCLUDED_CONTENT_TYPES = ("application/gzip", "application/zip", "image/", "font/woff", "text/event-stream")
+
+# 超过该大小的响应体在线程中压缩，避免阻塞事件循环
+THREAD_MINIMUM_SIZE = 256 * 1024
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """根据 Accept-Encoding 选择压缩算法（br 优先于 gzip，q=0 视为不接受）"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(token.strip())
+
+    if BROTLI_AVAILABLE and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """gzip / brotli 响应压缩
+
+    Args:
+        app: ASGI 应用
+        minimum_size: 小于该字节数的响应不压缩
+        gzip_level: gzip 压缩级别
+        brotli_quality: brotli 压缩质量（0-11，越大越慢）
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough or start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"") if message["type"] == "http.response.body" else b""
+            content_type = headers.get("content-type", "")
+            if (
+                message["type"] != "http.response.body"
+                or message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= THREAD_MINIMUM_SIZE:
+                compressed = await asyncio.to_thread(self._compress, body, encoding)
+            else:
+                compressed = self._compress(body, encoding)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            passthrough = True
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,138 @@
+"""图谱响应编码
+
+图谱接口默认返回逐节点、逐边的 JSON 对象。节点较多时可以请求紧凑格式:
+- columnar: 节点和边按字段拆成等长数组，边的端点为节点数组下标，不再重复实体名称
+- msgpack: columnar 结构以 MessagePack 二进制编码（需要安装 msgpack）
+
+格式由 format 查询参数指定，未指定时按 Accept 请求头协商。
+"""
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from ..schemas.common import ApiResponse
+
+# 检查 msgpack 是否可用（ormsgpack 接口兼容，可作为替代）
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    try:
+        import ormsgpack as msgpack
+        MSGPACK_AVAILABLE = True
+    except ImportError:
+        MSGPACK_AVAILABLE = False
+
+RESPONSE_FORMATS = ("json", "columnar", "msgpack")
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.graphmemory.columnar+json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def negotiate_format(request: Request) -> str:
+    """确定响应格式
+
+    format 查询参数优先；否则 Accept 请求头中出现 msgpack / columnar 媒体类型时使用对应格式
+    （msgpack 不可用时忽略），其余情况返回 json。
+
+    Raises:
+        ValueError: 查询参数指定的格式不支持或不可用
+    """
+    requested = request.query_params.get("format")
+    if requested is not None:
+        if requested not in RESPONSE_FORMATS:
+            raise ValueError(f"不支持的响应格式: {requested}")
+        if requested == "msgpack" and not MSGPACK_AVAILABLE:
+            raise ValueError("服务端未安装 msgpack，无法使用 msgpack 格式")
+        return requested
+
+    accept = request.headers.get("accept", "").lower()
+    if MSGPACK_AVAILABLE and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        return "msgpack"
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return "columnar"
+    return "json"
+
+
+def _columns(items: list[dict], skip: tuple[str, ...] = ()) -> dict[str, list]:
+    """把对象列表拆成字段数组（properties 中的字段展开到同一层），缺失的字段补 None"""
+    keys: dict[str, None] = {}
+    for item in items:
+        for key in item:
+            if key != "properties" and key not in skip:
+                keys[key] = None
+        for key in item.get("properties", {}):
+            keys[key] = None
+
+    columns = {}
+    for key in keys:
+        columns[key] = [
+            item[key] if key in item else item.get("properties", {}).get(key)
+            for item in items
+        ]
+    return columns
+
+
+def to_columnar(data: dict) -> dict:
+    """把 {"nodes": [...], "edges": [...]} 形式的图谱数据转换为列式结构
+
+    节点的 id、label、x、y 和各属性分别成为一列；
+    边的 source / target 替换为节点下标，边 id（由两端名称拼接）省略，端点不在节点中的边被丢弃。
+    其余字段原样保留，并增加 encoding: "columnar" 标记。
+
+    Args:
+        data: 图谱接口的 data 字段
+
+    Returns:
+        列式图谱数据
+    """
+    nodes = data.get("nodes", [])
+    index = {node["id"]: i for i, node in enumerate(nodes)}
+    edges = [edge for edge in data.get("edges", []) if edge["source"] in index and edge["target"] in index]
+
+    edge_columns = {
+        "source": [index[edge["source"]] for edge in edges],
+        "target": [index[edge["target"]] for edge in edges],
+        **_columns(edges, skip=("id", "source", "target")),
+    }
+
+    columnar = {key: value for key, value in data.items() if key not in ("nodes", "edges")}
+    columnar.update(
+        encoding="columnar",
+        node_count=len(nodes),
+        edge_count=len(edges),
+        nodes=_columns(nodes),
+        edges=edge_columns,
+    )
+    return columnar
+
+
+def encode_graph_response(request: Request, response: ApiResponse):
+    """按协商的格式编码图谱接口的响应
+
+    失败响应和 json 格式原样返回；columnar / msgpack 格式先把 data 转换为列式结构。
+
+    Args:
+        request: 请求对象
+        response: 图谱接口的响应
+
+    Returns:
+        ApiResponse 或二进制 Response
+    """
+    try:
+        response_format = negotiate_format(request)
+    except ValueError as e:
+        return ApiResponse(success=False, error="INVALID_PARAMETER", message=str(e))
+
+    if response_format == "json" or not response.success or response.data is None:
+        return response
+
+    encoded = response.model_copy(update={"data": to_columnar(response.data)})
+    if response_format == "columnar":
+        return encoded
+
+    return Response(
+        content=msgpack.packb(jsonable_encoder(encoded)),
+        media_type="application/msgpack",
+    )
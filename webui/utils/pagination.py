@@ -0,0 +1,65 @@
+"""分页工具
+
+游标为排序值与名称组成的列表，经 JSON + URL 安全的 Base64 编码后返回给前端，
+下一页请求原样带回即可。
+"""
+
+import base64
+import json
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+
+
+def encode_cursor(*values) -> str:
+    """把排序值编码为游标字符串（时间值按 ISO 格式保存）"""
+    payload = [{"ts": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """解析游标字符串
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+    except Exception as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+    if not isinstance(payload, list):
+        raise ValueError(f"无效的游标: {cursor}")
+    return [
+        datetime.fromisoformat(value["ts"]) if isinstance(value, dict) and "ts" in value else value
+        for value in payload
+    ]
+
+
+class TotalCountCache:
+    """列表总数缓存
+
+    同一组过滤条件的总数在 ttl 秒内直接复用，翻页时不再重复全表计数。
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[tuple, tuple[float, int]] = {}
+
+    async def get(self, key: tuple, loader: Callable[[], Awaitable[int]]) -> int:
+        """获取总数，缓存缺失或过期时调用 loader 重新计数"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            return entry[1]
+
+        total = await loader()
+        if len(self._entries) >= self.max_entries:
+            self._entries = {k: v for k, v in self._entries.items() if now - v[0] < self.ttl}
+        self._entries[key] = (now, total)
+        return total
+
+    def clear(self):
+        self._entries.clear()